@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api.settings")
+# Every ASGI request runs its sync code in a thread of its own, which would keep a persistent
+# connection open after the request: close them (or use the POSTGRES_POOL_SIZE pool) by default.
+# The threads of the ORM pool of the async view keep theirs (see starwars.executors.refresh_connections)
+os.environ.setdefault("POSTGRES_CONN_MAX_AGE", "0")
 
 application = get_asgi_application()
@@ -0,0 +1,35 @@
+# Django
+from django.db.backends.postgresql import base
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+# Pool
+from api.db_pool.pool import get_pool
+
+# Utils
+from functools import partial
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+    PostgreSQL backend whose connections are taken from the pool of the worker process
+    (`api.db_pool.pool.ConnectionPool`) and given back to it when Django closes them, at the
+    end of each request with `CONN_MAX_AGE = 0`, for the WSGI and ASGI entry points alike.
+
+    Configured by the `POOL` database setting: `MAX_SIZE`, `TIMEOUT` and `MAX_LIFETIME`.
+    """
+
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict["NAME"], self.settings_dict["POOL"])
+
+    def get_new_connection(self, conn_params):
+        # Set by the base backend when it opens a connection, needed by the reused ones too
+        self.isolation_level = IsolationLevel(
+            self.settings_dict["OPTIONS"].get("isolation_level", IsolationLevel.READ_COMMITTED)
+        )
+        return self.pool.acquire(partial(super().get_new_connection, conn_params))
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.release(self.connection)
@@ -0,0 +1,214 @@
+# Django
+from django.db import connections
+
+# Externals
+from psycopg2 import OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE
+
+# Utils
+from collections import deque
+from threading import Condition, Lock
+import os
+import time
+
+
+pools_lock = Lock()
+pools = {}
+
+
+class PoolTimeout(OperationalError):
+    """
+    Error raised when no connection of a pool is released within its timeout
+    (a database error, wrapped by Django as `django.db.OperationalError`).
+    """
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of database connections of one worker process.
+
+    - At most `max_size` connections are open; a thread asking for a connection when all of them
+      are in use waits for one to be released, for at most `timeout` seconds.
+    - Released connections are rolled back if a transaction is left open, and closed when broken
+      or older than `max_lifetime` seconds (None keeps them).
+    - Idle connections are reused last released first, so the pool shrinks back to the
+      connections actually needed when their lifetime expires.
+    - `stats` reports the connections and the time spent waiting for them.
+
+    Args:
+        - max_size (int): Maximum number of open connections.
+        - connect (callable, optional): Opens a new connection, when none is idle (unless
+          `acquire` is given its own).
+        - timeout (float, optional): Seconds to wait for a connection.
+        - max_lifetime (float, optional): Seconds after which a released connection is closed.
+    """
+
+    def __init__(self, max_size, connect=None, timeout=10.0, max_lifetime=3600.0):
+        self.max_size = max_size
+        self.connect = connect
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.condition = Condition()
+        self.idle = deque()
+        self.created = {}
+        self.size = 0
+        self.in_use = 0
+        self.counters = {"acquired": 0, "waits": 0, "wait_time": 0.0, "max_wait": 0.0, "timeouts": 0, "discarded": 0}
+
+    def acquire(self, connect=None):
+        """
+        Take an idle connection, open a new one if the pool is not full, or wait for one to be released.
+
+        Args:
+            connect (callable, optional): Opens the connection instead of the `connect` of the pool.
+        Returns:
+            The connection.
+        Raises:
+            - PoolTimeout: If no connection was released within the timeout.
+        """
+        start = time.monotonic()
+        waited = False
+        with self.condition:
+            while True:
+                while self.idle:
+                    connection = self.idle.pop()
+                    if connection.closed or self.is_expired(connection):
+                        self.discard(connection)
+                        continue
+                    self.checkout(start, waited)
+                    return connection
+
+                if self.size < self.max_size:
+                    # Reserve the slot; the connection is opened outside of the lock
+                    self.size += 1
+                    break
+
+                remaining = self.timeout - (time.monotonic() - start)
+                if remaining <= 0:
+                    self.counters["timeouts"] += 1
+                    raise PoolTimeout(
+                        f"No database connection released within {self.timeout}s ({self.max_size} in use)."
+                    )
+                waited = True
+                self.condition.wait(remaining)
+
+        try:
+            connection = (connect or self.connect)()
+        except BaseException:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+
+        with self.condition:
+            self.created[connection] = time.monotonic()
+            self.checkout(start, waited)
+        return connection
+
+    def release(self, connection):
+        """
+        Give a connection back to the pool, or close it when it cannot be reused.
+        """
+        reusable = not connection.closed and not self.is_expired(connection)
+        if reusable and connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except Exception:
+                reusable = False
+
+        with self.condition:
+            self.in_use -= 1
+            if reusable:
+                self.idle.append(connection)
+            else:
+                self.discard(connection)
+            self.condition.notify()
+
+    def checkout(self, start, waited):
+        wait = time.monotonic() - start
+        self.in_use += 1
+        self.counters["acquired"] += 1
+        if waited:
+            self.counters["waits"] += 1
+            self.counters["wait_time"] += wait
+            self.counters["max_wait"] = max(self.counters["max_wait"], wait)
+
+    def discard(self, connection):
+        self.size -= 1
+        self.counters["discarded"] += 1
+        self.created.pop(connection, None)
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+    def is_expired(self, connection):
+        created = self.created.get(connection)
+        return self.max_lifetime is not None and created is not None and time.monotonic() - created > self.max_lifetime
+
+    def close(self):
+        """
+        Close the idle connections.
+        """
+        with self.condition:
+            while self.idle:
+                self.discard(self.idle.pop())
+
+    def stats(self):
+        """
+        Returns:
+            dict: Open, in use and idle connections, and the counters of the pool: connections
+            acquired, acquisitions that waited, total and maximum wait (seconds), timeouts and
+            connections closed by the pool.
+        """
+        with self.condition:
+            return {
+                "max_size": self.max_size,
+                "size": self.size,
+                "in_use": self.in_use,
+                "idle": len(self.idle),
+                **self.counters,
+            }
+
+
+def get_pool(alias, name, options):
+    """
+    Get the connection pool of a database of the current process, creating it on first use
+    (a forked worker does not share the pool of its parent).
+
+    Args:
+        alias (str): The database alias.
+        name (str): The database name (test databases get their own pool).
+        options (dict): `MAX_SIZE`, `TIMEOUT` and `MAX_LIFETIME` of the `POOL` database setting.
+    Returns:
+        ConnectionPool: The pool.
+    """
+    key = (os.getpid(), alias, name)
+    pool = pools.get(key)
+    if pool is None:
+        with pools_lock:
+            pool = pools.get(key)
+            if pool is None:
+                pool = pools[key] = ConnectionPool(
+                    max_size=options["MAX_SIZE"],
+                    timeout=options.get("TIMEOUT", 10.0),
+                    max_lifetime=options.get("MAX_LIFETIME", 3600.0),
+                )
+    return pool
+
+def get_pool_stats():
+    """
+    Returns:
+        dict: The stats of the pools of the current process, by database alias.
+    """
+    pid = os.getpid()
+    return {alias: pool.stats() for (pool_pid, alias, _), pool in list(pools.items()) if pool_pid == pid}
+
+def release_connections():
+    """
+    Give the pooled connections of the current thread back to their pool, for long-lived
+    threads (such as the ORM pool of the async view) which do not see the end of the requests.
+    """
+    for connection in connections.all(initialized_only=True):
+        if connection.settings_dict.get("POOL") and not connection.in_atomic_block:
+            connection.close()
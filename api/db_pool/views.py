@@ -0,0 +1,14 @@
+# Django
+from django.contrib.admin.views.decorators import staff_member_required
+from django.http import JsonResponse
+
+# Pool
+from api.db_pool.pool import get_pool_stats
+
+
+@staff_member_required
+def pool_stats(request):
+    """
+    Connection pool stats of the worker process answering the request (see `ConnectionPool.stats`).
+    """
+    return JsonResponse(get_pool_stats())
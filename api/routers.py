@@ -0,0 +1,186 @@
+# Django
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.utils import timezone
+
+# Utils
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import timedelta
+from threading import Lock
+import random
+import time
+
+
+# Cookie of the clients that wrote recently, whose reads stick to the primary
+STICKY_COOKIE = "primary_reads"
+
+# Replication lag of a PostgreSQL standby in seconds (0 when it has replayed everything it received,
+# since the last replay timestamp does not move while the primary is idle, and 0 on a primary)
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+replica_reads = ContextVar("replica_reads", default=False)
+
+
+@contextmanager
+def reading_from_replicas(enabled=True):
+    """
+    Route the reads of the current context (thread or task, and the threads started from it
+    with `sync_to_async`) to the replicas.
+    """
+    token = replica_reads.set(enabled)
+    try:
+        yield
+    finally:
+        replica_reads.reset(token)
+
+def stick_to_primary(request):
+    """
+    Route the next reads of a request, and of the client for `DATABASE_REPLICA_STICKY_SECONDS`
+    (see `set_sticky_cookie`), to the primary, after a write the replicas may not have replayed.
+    """
+    request.wrote_to_primary = True
+
+def is_sticky(request):
+    """
+    Return whether the reads of a request go to the primary: after a write of the client
+    (see `stick_to_primary`), or when its operation reads recent writes (see `is_recent_write`).
+    """
+    return (
+        getattr(request, "wrote_to_primary", False)
+        or getattr(request, "reads_recent_writes", False)
+        or STICKY_COOKIE in request.COOKIES
+    )
+
+def is_recent_write(changed_at):
+    """
+    Return whether a write may not be replayed by the replicas yet: those in use lagged at most
+    `DATABASE_REPLICA_MAX_LAG` seconds when they were last measured, at most
+    `DATABASE_REPLICA_LAG_CHECK_INTERVAL` seconds ago.
+
+    Args:
+        changed_at (datetime): Time of the write, or None.
+    Returns:
+        bool: True when replicas are configured and the write is within that window.
+    """
+    if not settings.DATABASE_REPLICAS or changed_at is None:
+        return False
+    window = settings.DATABASE_REPLICA_MAX_LAG + settings.DATABASE_REPLICA_LAG_CHECK_INTERVAL
+    return timezone.now() - changed_at < timedelta(seconds=window)
+
+def set_sticky_cookie(request, response):
+    """
+    Set the sticky cookie on the response of a request that wrote to the primary.
+    """
+    if getattr(request, "wrote_to_primary", False) and settings.DATABASE_REPLICA_STICKY_SECONDS:
+        response.set_cookie(
+            STICKY_COOKIE, "1", max_age=settings.DATABASE_REPLICA_STICKY_SECONDS, httponly=True, samesite="Lax"
+        )
+    return response
+
+def measure_lag(alias):
+    """
+    Measure the replication lag of a database.
+
+    Args:
+        alias (str): The database alias.
+    Returns:
+        float: The lag in seconds; 0 for databases without replication info (e.g. SQLite stand-ins).
+    Raises:
+        - DatabaseError: If the database cannot be reached.
+    """
+    connection = connections[alias]
+    if connection.vendor != "postgresql":
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(LAG_SQL)
+        return float(cursor.fetchone()[0] or 0)
+
+
+class ReplicaMonitor:
+    """
+    Replication lag of the replicas, measured at most every `DATABASE_REPLICA_LAG_CHECK_INTERVAL`
+    seconds per replica and worker process. While a replica is measured, the other threads use
+    its previous measure.
+
+    - `lags`: last lag of each replica, None when it could not be reached.
+    """
+
+    def __init__(self, measure=measure_lag):
+        self.measure = measure
+        self.lags = {}
+        self.checked = {}
+        self.lock = Lock()
+
+    def get_lag(self, alias):
+        now = time.monotonic()
+        with self.lock:
+            checked = self.checked.get(alias)
+            if checked is not None and now - checked < settings.DATABASE_REPLICA_LAG_CHECK_INTERVAL:
+                return self.lags.get(alias)
+            self.checked[alias] = now
+
+        try:
+            lag = self.measure(alias)
+        except DatabaseError:
+            lag = None
+        with self.lock:
+            self.lags[alias] = lag
+        return lag
+
+    def get_available(self, aliases):
+        """
+        Returns:
+            list: The replicas that can be reached and lag at most `DATABASE_REPLICA_MAX_LAG` seconds.
+        """
+        available = []
+        for alias in aliases:
+            lag = self.get_lag(alias)
+            if lag is not None and lag <= settings.DATABASE_REPLICA_MAX_LAG:
+                available.append(alias)
+        return available
+
+
+replica_monitor = ReplicaMonitor()
+
+
+class ReplicaRouter:
+    """
+    Database router sending the reads of GraphQL query operations to the replicas
+    (`DATABASE_REPLICAS`), and everything else to the primary: writes, mutations and the
+    reads that follow them, management commands (`load_starwars_data`...) and the admin.
+
+    - Reads go to the replicas only in a `reading_from_replicas` context, set by the GraphQL
+      views for query operations of clients which did not write recently, and which do not read
+      models written since the replicas may have last replayed (`is_sticky`): so their results,
+      cached and tagged with the current versions, are never older than those versions.
+    - Each read picks one of the replicas at random, skipping those lagging more than
+      `DATABASE_REPLICA_MAX_LAG` seconds or unreachable; without any, reads go to the primary.
+    - Related objects are read from the database of the instance they are accessed from.
+    - Migrations only run on the primary.
+    """
+
+    def db_for_read(self, model, **hints):
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        if not settings.DATABASE_REPLICAS or not replica_reads.get():
+            return DEFAULT_DB_ALIAS
+
+        replicas = replica_monitor.get_available(settings.DATABASE_REPLICAS)
+        return random.choice(replicas) if replicas else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
@@ -15,12 +15,17 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
+from django.conf import settings
 from django.contrib import admin
-from graphene_django.views import GraphQLView
+from api.db_pool.views import pool_stats
+from starwars.views import AsyncStarWarsGraphQLView, StarWarsGraphQLView
 from starwars.schema import schema
 from django.urls import path
 
+GraphQLView = AsyncStarWarsGraphQLView if settings.GRAPHQL_ASYNC_VIEW else StarWarsGraphQLView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("db-pool/stats/", pool_stats),
     path("graphql/", GraphQLView.as_view(graphiql=True, schema=schema)),
 ]
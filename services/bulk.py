@@ -0,0 +1,209 @@
+# Django
+from django.db import connections
+
+# Utils
+from contextlib import contextmanager
+import io
+
+
+# Escapes of the COPY text format
+COPY_ESCAPES = str.maketrans({"\\": "\\\\", "\t": "\\t", "\n": "\\n", "\r": "\\r"})
+
+
+def can_copy(using="default"):
+    """
+    Return whether rows can be written with `COPY ... FROM STDIN` (PostgreSQL only).
+    """
+    return connections[using].vendor == "postgresql"
+
+def reserve_pks(model, count, using="default"):
+    """
+    Draw `count` values of the primary key sequence of a model, so that rows written with
+    COPY have known primary keys their relations can point to.
+
+    Args:
+        model (Model): The model, with a serial primary key.
+        count (int): Number of primary keys.
+        using (str, optional): The database alias.
+    Returns:
+        list: The primary keys.
+    """
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT nextval(pg_get_serial_sequence(%s, %s)) FROM generate_series(1, %s)",
+            [model._meta.db_table, model._meta.pk.column, count],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+def format_copy_value(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value).translate(COPY_ESCAPES)
+
+def copy_rows(table, columns, rows, using="default"):
+    """
+    Write rows with one `COPY ... FROM STDIN` statement in the text format.
+
+    Args:
+        table (str): The table name.
+        columns (list): The column names.
+        rows (iterable): Tuples of database values, in the order of `columns`.
+        using (str, optional): The database alias.
+    Returns:
+        int: Number of rows written.
+    """
+    buffer = io.StringIO()
+    count = 0
+    for row in rows:
+        buffer.write("\t".join(map(format_copy_value, row)))
+        buffer.write("\n")
+        count += 1
+    if not count:
+        return 0
+
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    buffer.seek(0)
+    with connection.cursor() as cursor:
+        cursor.copy_expert(f"COPY {quote(table)} ({', '.join(map(quote, columns))}) FROM STDIN", buffer)
+    return count
+
+def copy_instances(model, instances, using="default"):
+    """
+    Write unsaved instances with COPY, like `bulk_create`: `auto_now` fields are set, and primary
+    keys are drawn from the sequence (unless the model is an auto-created through table, whose
+    primary keys are left to the column default).
+
+    Args:
+        model (Model): The model of the instances.
+        instances (list): The unsaved instances.
+        using (str, optional): The database alias.
+    Returns:
+        list: The instances, with their primary keys.
+    """
+    if not instances:
+        return instances
+
+    connection = connections[using]
+    fields = list(model._meta.concrete_fields)
+    if model._meta.auto_created:
+        fields.remove(model._meta.pk)
+    else:
+        for instance, pk in zip(instances, reserve_pks(model, len(instances), using)):
+            instance.pk = pk
+
+    rows = (
+        tuple(field.get_db_prep_save(field.pre_save(instance, True), connection) for field in fields)
+        for instance in instances
+    )
+    copy_rows(model._meta.db_table, [field.column for field in fields], rows, using)
+    for instance in instances:
+        instance._state.adding = False
+        instance._state.db = using
+    return instances
+
+def get_copy_options(copy_format):
+    return "FORMAT binary" if copy_format == "binary" else "FORMAT csv, HEADER true"
+
+def copy_to_file(model, columns, file, copy_format="binary", using="default"):
+    """
+    Stream a table to a file with `COPY ... TO STDOUT`: psycopg2 writes the rows to the file
+    as the server sends them, without holding the table in memory.
+
+    Args:
+        model (Model): The model of the table.
+        columns (list): The column names.
+        file (BinaryIO): The destination file.
+        copy_format (str, optional): `binary` or `csv`.
+        using (str, optional): The database alias.
+    Returns:
+        int: Number of rows written.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {quote(model._meta.db_table)} ({', '.join(map(quote, columns))}) "
+            f"TO STDOUT WITH ({get_copy_options(copy_format)})",
+            file,
+        )
+        return cursor.rowcount
+
+def copy_from_file(model, columns, file, copy_format="binary", using="default"):
+    """
+    Stream a file into a table with `COPY ... FROM STDIN`, read by psycopg2 in blocks.
+
+    Args:
+        model (Model): The model of the table.
+        columns (list): The column names, in the order of the file.
+        file (BinaryIO): The source file.
+        copy_format (str, optional): `binary` or `csv`.
+        using (str, optional): The database alias.
+    Returns:
+        int: Number of rows read.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {quote(model._meta.db_table)} ({', '.join(map(quote, columns))}) "
+            f"FROM STDIN WITH ({get_copy_options(copy_format)})",
+            file,
+        )
+        return cursor.rowcount
+
+@contextmanager
+def deferred_indexes(models, using="default"):
+    """
+    Drop the secondary indexes and unique constraints of tables (primary keys are kept) and
+    rebuild them on exit, so that a bulk load does not maintain them row by row. Foreign keys
+    are created `DEFERRABLE INITIALLY DEFERRED` by Django and are checked at commit.
+
+    Must run in a transaction: if the load fails, the drops are rolled back with it.
+
+    Args:
+        models (list): The models of the tables.
+        using (str, optional): The database alias.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    tables = [model._meta.db_table for model in models]
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.conrelid::regclass::text, c.conname, pg_get_constraintdef(c.oid)
+            FROM pg_constraint c
+            WHERE c.contype = 'u' AND c.conrelid = ANY(%s::regclass[])
+            """,
+            [tables],
+        )
+        constraints = cursor.fetchall()
+        cursor.execute(
+            """
+            SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+            FROM pg_index i
+            WHERE i.indrelid = ANY(%s::regclass[]) AND NOT EXISTS (
+                SELECT 1 FROM pg_constraint c WHERE c.conindid = i.indexrelid AND c.conrelid = i.indrelid
+            )
+            """,
+            [tables],
+        )
+        indexes = cursor.fetchall()
+
+        for table, name, _ in constraints:
+            cursor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {quote(name)}")
+        for name, _ in indexes:
+            cursor.execute(f"DROP INDEX {name}")
+
+    yield
+
+    with connection.cursor() as cursor:
+        # Tables with pending foreign key checks cannot be altered: run the checks first
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        for _, definition in indexes:
+            cursor.execute(definition)
+        for table, name, definition in constraints:
+            cursor.execute(f"ALTER TABLE {table} ADD CONSTRAINT {quote(name)} {definition}")
@@ -0,0 +1,78 @@
+# Models
+from starwars.models import LoadState
+
+# Utils
+from django.utils import timezone
+from utils.logger import logger
+
+
+class LoadProgress:
+    """
+    Iterator over the items of a stream of pages, keeping the `LoadState` of its resource.
+
+    - `pages`: pages whose items were all consumed, counting those of the previous runs.
+    - `items`: items consumed, counting those of the previous runs.
+    - `save` records them; it is the checkpoint of the populate functions, called in the
+      transaction of each chunk, so that the state always matches the committed rows.
+
+    A page is only counted once the item after its last one is requested, so a checkpoint never
+    covers a page whose items are not all written: a resumed load may fetch a page again, whose
+    items already loaded are skipped by the populate functions.
+
+    Args:
+        - state (LoadState): The state of the resource.
+        - pages (iterable): Lists of items, from the first page not yet loaded.
+    """
+
+    def __init__(self, state, pages):
+        self.state = state
+        self.source_pages = pages
+        self.pages = state.pages
+        self.items = state.items
+        self.page_size = state.page_size
+
+    def __iter__(self):
+        for results in self.source_pages:
+            self.page_size = max(self.page_size or 0, len(results))
+            for item in results:
+                self.items += 1
+                yield item
+            self.pages += 1
+
+    def save(self, **fields):
+        fields = {"pages": self.pages, "items": self.items, "page_size": self.page_size, **fields}
+        LoadState.objects.filter(pk=self.state.pk).update(updated_at=timezone.now(), **fields)
+        for name, value in fields.items():
+            setattr(self.state, name, value)
+
+    def complete(self):
+        self.save(completed=True)
+        logger.info(f"{self.state.resource}: {self.items} items loaded from {self.pages} pages.")
+
+
+def get_load_states(resources, source, resume=False):
+    """
+    Return the load state of each resource, resetting it unless the load resumes the
+    previous one from the same source.
+
+    Args:
+        resources (tuple): The resources.
+        source (str): The SWAPI URL or dump path of the load.
+        resume (bool, optional): Keep the progress of the previous load.
+    Returns:
+        dict: The LoadState of each resource.
+    """
+    states = {}
+    for resource in resources:
+        state, created = LoadState.objects.get_or_create(resource=resource, defaults={"source": source})
+        if not created and not (resume and state.source == source):
+            if resume:
+                logger.info(f"{resource}: previous load read {state.source}, starting over.")
+            state.source, state.pages, state.page_size, state.items, state.completed = source, 0, None, 0, False
+            state.save()
+        elif resume and not created:
+            logger.info(
+                f"{resource}: " + ("already loaded." if state.completed else f"resuming after page {state.pages}.")
+            )
+        states[resource] = state
+    return states
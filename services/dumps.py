@@ -0,0 +1,331 @@
+# Django
+from django.db.models import F
+
+# Models
+from starwars.models import Planet, Movie, Character
+
+# Services
+from services.populate import STAR_WARS_API, chunked
+
+# Utils
+from contextlib import ExitStack, contextmanager
+from functools import partial
+from pathlib import Path, PurePosixPath
+import gzip
+import io
+import json
+import tarfile
+import tempfile
+import zipfile
+
+
+RESOURCES = ("planets", "films", "people")
+DUMP_FORMATS = ("ndjson", "json")
+TAR_SUFFIXES = (".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+# Characters read at once by the JSON array parser
+READ_SIZE = 64 * 1024
+
+
+class DumpError(Exception):
+    """
+    Error raised when a SWAPI dump is missing a resource or cannot be parsed.
+    """
+
+
+def get_dump_name(path):
+    """
+    Return the resource and format of a dump file name (e.g. `people.ndjson.gz`), or None.
+    """
+    name = PurePosixPath(path).name
+    if name.endswith(".gz"):
+        name = name[:-3]
+    resource, _, dump_format = name.partition(".")
+    if resource in RESOURCES and dump_format in DUMP_FORMATS:
+        return resource, dump_format
+    return None
+
+def iter_ndjson(stream):
+    """
+    Parse a stream of JSON lines, one item per non-empty line.
+    """
+    for number, line in enumerate(stream, start=1):
+        if line.strip():
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                raise DumpError(f"Invalid JSON on line {number}: {e}") from e
+
+def iter_json_array(stream):
+    """
+    Parse the items of a JSON array incrementally, holding one buffer of `READ_SIZE`
+    characters and the item being decoded instead of the whole document.
+
+    Args:
+        stream (TextIO): The text stream of the array.
+    Yields:
+        The items of the array.
+    Raises:
+        - DumpError: If the document is not a JSON array.
+    """
+    decoder = json.JSONDecoder()
+    buffer, position, eof = "", 0, False
+
+    def fill():
+        nonlocal buffer, position, eof
+        data = stream.read(READ_SIZE)
+        eof = not data
+        buffer = buffer[position:] + data
+        position = 0
+
+    def skip(separators):
+        nonlocal position
+        while True:
+            while position < len(buffer) and (buffer[position].isspace() or buffer[position] in separators):
+                position += 1
+            if position < len(buffer) or eof:
+                return
+            fill()
+
+    skip("")
+    if buffer[position:position + 1] != "[":
+        raise DumpError("A JSON dump must hold an array of items")
+    position += 1
+
+    while True:
+        skip(",")
+        if position >= len(buffer):
+            raise DumpError("Unterminated JSON array")
+        if buffer[position] == "]":
+            return
+        try:
+            item, end = decoder.raw_decode(buffer, position)
+        except ValueError as e:
+            # The item continues past the buffer, unless the stream is exhausted
+            if eof:
+                raise DumpError(f"Invalid JSON item: {e}") from e
+            fill()
+            continue
+        if end == len(buffer) and not eof:
+            # A number may continue in the next read
+            fill()
+            continue
+        position = end
+        yield item
+
+def iter_dump(stream, dump_format):
+    return iter_ndjson(stream) if dump_format == "ndjson" else iter_json_array(stream)
+
+def open_text(binary, name):
+    if str(name).endswith(".gz"):
+        binary = gzip.GzipFile(fileobj=binary)
+    return io.TextIOWrapper(binary, encoding="utf-8")
+
+def find_members(names):
+    """
+    Map each resource to the name of its dump file among `names`.
+
+    Raises:
+        - DumpError: If a resource has no dump file or several.
+    """
+    members = {}
+    for name in names:
+        dump_name = get_dump_name(name)
+        if dump_name is None:
+            continue
+        resource, _ = dump_name
+        if resource in members:
+            raise DumpError(f"Several dump files for {resource}: {members[resource]}, {name}")
+        members[resource] = name
+
+    missing = [resource for resource in RESOURCES if resource not in members]
+    if missing:
+        raise DumpError(f"Missing dump files for: {', '.join(missing)}")
+    return members
+
+@contextmanager
+def open_dump(source):
+    """
+    Open the dump files of a directory or archive (zip or tar, possibly compressed), each file
+    being named after its resource and format: `planets.json`, `films.ndjson`, `people.ndjson.gz`...
+
+    The files are parsed lazily, item by item, so they can be fed to the populate functions
+    like the SWAPI streams.
+
+    Args:
+        source (str): Path of the directory or archive.
+    Yields:
+        dict: The items of each resource (`planets`, `films` and `people`).
+    Raises:
+        - DumpError: If the source does not exist or lacks a resource.
+    """
+    path = Path(source)
+    with ExitStack() as stack:
+        if path.is_dir():
+            members = find_members(str(child) for child in path.rglob("*") if child.is_file())
+            open_member = partial(open, mode="rb")
+        elif path.is_file() and zipfile.is_zipfile(path):
+            archive = stack.enter_context(zipfile.ZipFile(path))
+            members = find_members(archive.namelist())
+            open_member = archive.open
+        elif path.is_file() and tarfile.is_tarfile(path):
+            archive = stack.enter_context(tarfile.open(path, "r:*"))
+            members = find_members(member.name for member in archive.getmembers() if member.isfile())
+            open_member = archive.extractfile
+        else:
+            raise DumpError(f"{source} is neither a directory nor a zip or tar archive")
+
+        streams = {}
+        for resource, name in members.items():
+            text = stack.enter_context(open_text(open_member(name), name))
+            streams[resource] = iter_dump(text, get_dump_name(name)[1])
+        yield streams
+
+def swapi_url(resource, swapi_id):
+    return f"{STAR_WARS_API}{resource}/{swapi_id}/"
+
+def serialize_planet(planet):
+    return {
+        "url": swapi_url("planets", planet.swapi_id),
+        "name": planet.name,
+        "climate": planet.climate,
+        "terrain": planet.terrain,
+        "rotation_period": planet.rotation_period,
+        "orbital_period": planet.orbital_period,
+        "diameter": planet.diameter,
+        "gravity": planet.gravity,
+        "surface_water": planet.surface_water,
+        "population": planet.population,
+    }
+
+def serialize_movie(movie):
+    return {
+        "url": swapi_url("films", movie.swapi_id),
+        "title": movie.title,
+        "episode_id": movie.episode_id,
+        "opening_crawl": movie.opening_crawl,
+        "director": movie.director,
+        "producer": movie.producers,
+        "release_date": movie.release_date.isoformat(),
+        "planets": [swapi_url("planets", swapi_id) for swapi_id in movie.planet_swapi_ids if swapi_id is not None],
+    }
+
+def serialize_character(character):
+    return {
+        "url": swapi_url("people", character.swapi_id),
+        "name": character.name,
+        "birth_year": character.birth_year,
+        "species": [species for species in character.species.split(", ") if species],
+        "height": character.height,
+        "mass": character.mass,
+        "hair_color": character.hair_color,
+        "skin_color": character.skin_color,
+        "eye_color": character.eye_color,
+        "gender": character.gender,
+        "homeworld": swapi_url("planets", character.homeworld_swapi_id) if character.homeworld_swapi_id else None,
+        "films": [swapi_url("films", swapi_id) for swapi_id in character.movie_swapi_ids if swapi_id is not None],
+    }
+
+def iter_dump_items(resource, batch_size):
+    """
+    Serialize the rows of a resource in the SWAPI format, reading them in chunks of `batch_size`
+    rows with one more query per chunk and many-to-many field for their links.
+    Rows without a SWAPI id (created through the API) are not part of the dump.
+
+    Args:
+        resource (str): `planets`, `films` or `people`.
+        batch_size (int): Rows fetched per query.
+    Yields:
+        dict: The SWAPI items.
+    """
+    model, serialize = DUMPED_MODELS[resource]
+    queryset = model.objects.exclude(swapi_id=None).order_by("swapi_id")
+    if model is Character:
+        queryset = queryset.annotate(homeworld_swapi_id=F("homeworld__swapi_id"))
+
+    for chunk in chunked(queryset.iterator(chunk_size=batch_size), batch_size):
+        for field in model._meta.many_to_many:
+            through = field.remote_field.through
+            source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+            links = {}
+            pairs = through.objects.filter(**{f"{source}_id__in": [instance.pk for instance in chunk]}).values_list(
+                f"{source}_id", f"{target}__swapi_id"
+            )
+            for pk, swapi_id in pairs:
+                links.setdefault(pk, []).append(swapi_id)
+            for instance in chunk:
+                swapi_ids = sorted(swapi_id for swapi_id in links.get(instance.pk, ()) if swapi_id is not None)
+                setattr(instance, f"{field.related_model._meta.model_name}_swapi_ids", swapi_ids)
+
+        for instance in chunk:
+            yield serialize(instance)
+
+def write_items(stream, items, dump_format):
+    """
+    Write items to a text stream as JSON lines or as a JSON array, one item per line.
+
+    Returns:
+        int: Number of items written.
+    """
+    count = 0
+    if dump_format == "json":
+        stream.write("[")
+    for item in items:
+        if dump_format == "json":
+            stream.write(",\n" if count else "\n")
+        stream.write(json.dumps(item, ensure_ascii=False))
+        if dump_format == "ndjson":
+            stream.write("\n")
+        count += 1
+    if dump_format == "json":
+        stream.write("\n]\n")
+    return count
+
+def write_dump(target, dump_format="ndjson", batch_size=1000):
+    """
+    Write the SWAPI rows of the database as a dump readable by `open_dump`: a directory,
+    or a zip or tar archive when `target` ends with `.zip` or a tar suffix (`.tar.gz`...).
+
+    Args:
+        target (str): Path of the directory or archive.
+        dump_format (str, optional): `ndjson` or `json`.
+        batch_size (int, optional): Rows fetched per query.
+    Returns:
+        dict: Number of items written per resource.
+    """
+    path = Path(target)
+    counts = {}
+
+    if path.name.endswith(".zip"):
+        with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for resource in RESOURCES:
+                with io.TextIOWrapper(archive.open(f"{resource}.{dump_format}", "w"), encoding="utf-8") as stream:
+                    counts[resource] = write_items(stream, iter_dump_items(resource, batch_size), dump_format)
+    elif path.name.endswith(TAR_SUFFIXES):
+        compression = path.name.rsplit(".", 1)[-1] if not path.name.endswith(".tar") else ""
+        compression = {"tgz": "gz"}.get(compression, compression)
+        with tarfile.open(path, f"w:{compression}") as archive:
+            for resource in RESOURCES:
+                # Tar headers hold the member size, so each file is spooled before being added
+                with tempfile.TemporaryFile() as spool:
+                    stream = io.TextIOWrapper(spool, encoding="utf-8")
+                    counts[resource] = write_items(stream, iter_dump_items(resource, batch_size), dump_format)
+                    stream.flush()
+                    info = tarfile.TarInfo(f"{resource}.{dump_format}")
+                    info.size = spool.tell()
+                    spool.seek(0)
+                    archive.addfile(info, spool)
+                    stream.detach()
+    else:
+        path.mkdir(parents=True, exist_ok=True)
+        for resource in RESOURCES:
+            with open(path / f"{resource}.{dump_format}", "w", encoding="utf-8") as stream:
+                counts[resource] = write_items(stream, iter_dump_items(resource, batch_size), dump_format)
+
+    return counts
+
+
+DUMPED_MODELS = {
+    "planets": (Planet, serialize_planet),
+    "films": (Movie, serialize_movie),
+    "people": (Character, serialize_character),
+}
@@ -0,0 +1,183 @@
+# Models
+from starwars.models import Planet, Movie, Character
+
+# Services
+from services.bulk import copy_instances
+from services.populate import chunked
+
+# Utils
+from itertools import accumulate
+import datetime
+import random
+import time
+from utils.logger import logger
+
+
+SYLLABLES = (
+    "an", "ar", "bel", "cor", "da", "dor", "en", "ga", "hoth", "ik", "ja", "ka", "kes", "lo", "lun", "ma",
+    "na", "nab", "oo", "or", "ra", "ro", "sa", "sul", "ta", "tine", "to", "um", "va", "vin", "xa", "yav", "zo",
+)
+CLIMATES = ("arid", "temperate", "tropical", "frozen", "murky", "humid", "windy", "polluted", "unknown")
+TERRAINS = ("desert", "grasslands", "mountains", "jungle", "tundra", "swamp", "gas giant", "cityscape", "ocean")
+HAIR_COLORS = ("blond", "brown", "black", "auburn", "white", "grey", "none", "n/a")
+SKIN_COLORS = ("fair", "light", "dark", "green", "pale", "gold", "metal", "blue")
+EYE_COLORS = ("blue", "brown", "yellow", "red", "black", "orange", "hazel", "unknown")
+GENDERS = ("male", "female", "n/a", "hermaphrodite", "none")
+
+
+def get_name(rng, words=1):
+    return " ".join(
+        "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize() for _ in range(words)
+    )
+
+def get_zipf_weights(count, exponent=1.1):
+    """
+    Cumulative weights of a Zipf distribution over `count` ranks, for `random.choices`:
+    a few planets are the homeworld of many characters, most of only a few.
+    """
+    return list(accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+def get_degree(rng, mean, maximum):
+    """
+    Draw a link count of at least 1 from a geometric distribution of the given mean, capped at `maximum`.
+    """
+    if maximum <= 0:
+        return 0
+    degree = 1
+    while degree < maximum and rng.random() > 1 / mean:
+        degree += 1
+    return degree
+
+def sample_weighted(rng, population, cum_weights, count):
+    """
+    Draw `count` distinct items, the most weighted first in probability.
+    """
+    count = min(count, len(population))
+    selected = set()
+    while len(selected) < count:
+        selected.update(rng.choices(population, cum_weights=cum_weights, k=count - len(selected)))
+    return selected
+
+def generate_planets(count, rng):
+    for _ in range(count):
+        yield Planet(
+            name=get_name(rng),
+            climate=rng.choice(CLIMATES),
+            terrain=", ".join(rng.sample(TERRAINS, rng.randint(1, 2))),
+            rotation_period=str(rng.randint(6, 60)),
+            orbital_period=str(rng.randint(150, 5000)),
+            diameter=str(rng.randint(1000, 200000)),
+            gravity=f"{rng.choice((0.5, 0.75, 1, 1.5))} standard",
+            surface_water=str(rng.randint(0, 100)),
+            population=str(int(10 ** rng.uniform(2, 12))),
+        ), {}
+
+def generate_movies(count, rng, planet_pks):
+    planet_weights = get_zipf_weights(len(planet_pks))
+    start = datetime.date(1977, 5, 25)
+    for index in range(count):
+        yield Movie(
+            title=get_name(rng, words=rng.randint(2, 4)),
+            episode_id=index + 1,
+            opening_crawl=" ".join(get_name(rng) for _ in range(60)),
+            director=get_name(rng, words=2),
+            producers=", ".join(get_name(rng, words=2) for _ in range(rng.randint(1, 3))),
+            release_date=start + datetime.timedelta(days=rng.randint(0, 50 * 365)),
+        ), {"planets": sample_weighted(rng, planet_pks, planet_weights, get_degree(rng, 4, 30))}
+
+def generate_characters(count, rng, planet_pks, movie_pks):
+    planet_weights = get_zipf_weights(len(planet_pks))
+    movie_weights = get_zipf_weights(len(movie_pks), exponent=0.8)
+    for _ in range(count):
+        # About one character in ten has an unknown homeworld
+        homeworld_id = None
+        if planet_pks and rng.random() > 0.1:
+            homeworld_id = rng.choices(planet_pks, cum_weights=planet_weights)[0]
+        yield Character(
+            name=get_name(rng, words=2),
+            birth_year=f"{rng.randint(1, 900)}BBY",
+            height=str(rng.randint(60, 250)),
+            mass=str(rng.randint(20, 200)),
+            hair_color=rng.choice(HAIR_COLORS),
+            skin_color=rng.choice(SKIN_COLORS),
+            eye_color=rng.choice(EYE_COLORS),
+            gender=rng.choice(GENDERS),
+            homeworld_id=homeworld_id,
+        ), {"movies": sample_weighted(rng, movie_pks, movie_weights, get_degree(rng, 2.5, 10))}
+
+def write_generated(model, rows, batch_size, use_copy):
+    """
+    Write generated rows and their many-to-many links, chunk by chunk, with COPY or `bulk_create`.
+
+    Args:
+        model (Model): The model of the rows.
+        rows (iterable): (instance, dict of many-to-many field name to target primary keys) pairs.
+        batch_size (int): Rows per chunk.
+        use_copy (bool): Write with COPY (PostgreSQL) instead of `bulk_create`.
+    Returns:
+        list: The primary keys of the rows.
+    """
+    pks, links_count = [], 0
+    start = time.perf_counter()
+
+    for chunk in chunked(rows, batch_size):
+        instances = [instance for instance, _ in chunk]
+        if use_copy:
+            copy_instances(model, instances)
+        else:
+            model.objects.bulk_create(instances)
+        pks.extend(instance.pk for instance in instances)
+
+        for field in model._meta.many_to_many:
+            through = field.remote_field.through
+            source, target = f"{field.m2m_field_name()}_id", f"{field.m2m_reverse_field_name()}_id"
+            links = [
+                through(**{source: instance.pk, target: pk})
+                for instance, instance_links in chunk
+                for pk in instance_links.get(field.name, ())
+            ]
+            if use_copy:
+                copy_instances(through, links)
+            else:
+                through.objects.bulk_create(links, batch_size=batch_size)
+            links_count += len(links)
+
+        logger.info(f"{len(pks)} {model._meta.verbose_name_plural} written...")
+
+    logger.info(
+        f"{len(pks)} {model._meta.verbose_name_plural} and {links_count} links written "
+        f"in {time.perf_counter() - start:.3f}s."
+    )
+    return pks
+
+def generate_starwars_data(planets, movies, characters, batch_size=10000, use_copy=False, seed=None):
+    """
+    Generate synthetic planets, movies and characters at scale, for load tests.
+
+    - Homeworlds and movie planets follow a Zipf distribution (a few planets are very popular).
+    - Movie planet counts and character movie counts follow geometric distributions.
+    - Existing planets and movies are reused as relation targets, so characters can be added
+      to an existing dataset.
+
+    Args:
+        planets (int): Number of planets to create.
+        movies (int): Number of movies to create.
+        characters (int): Number of characters to create.
+        batch_size (int, optional): Rows per chunk.
+        use_copy (bool, optional): Write with COPY (PostgreSQL) instead of `bulk_create`.
+        seed (int, optional): Seed of the generator, for reproducible datasets.
+    Returns:
+        dict: Number of rows created per model.
+    """
+    rng = random.Random(seed)
+
+    write_generated(Planet, generate_planets(planets, rng), batch_size, use_copy)
+    planet_pks = list(Planet.objects.order_by("pk").values_list("pk", flat=True))
+    # Shuffled so that the most popular planets are not the oldest ones
+    rng.shuffle(planet_pks)
+
+    write_generated(Movie, generate_movies(movies, rng, planet_pks), batch_size, use_copy)
+    movie_pks = list(Movie.objects.order_by("release_date", "pk").values_list("pk", flat=True))
+
+    write_generated(Character, generate_characters(characters, rng, planet_pks, movie_pks), batch_size, use_copy)
+    return {"planets": planets, "movies": movies, "characters": characters}
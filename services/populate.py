@@ -1,184 +1,690 @@
+# Django
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
 # Models
 from starwars.models import Planet, Movie, Character
 
 # Externals
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import requests
 
 # Utils
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from functools import reduce
+from itertools import chain, islice
+from threading import Event, Lock
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import hashlib
+import json
+import math
+import operator
+import time
 from utils.logger import logger
 
 
 STAR_WARS_API = "https://swapi.dev/api/"
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Fields that do not come from the SWAPI
+HASH_EXCLUDED_FIELDS = {"id", "created_at", "updated_at", "content_hash"}
+
+
+class SwapiFetchError(Exception):
+    """
+    Error raised by strict page streams when a page cannot be fetched.
+    """
+
+
+def get_session():
+    """
+    Create an HTTP session keeping its connections alive, pooled for `SWAPI_MAX_WORKERS` threads
+    and retrying failed requests `SWAPI_RETRIES` times with exponential backoff.
+
+    Returns:
+        requests.Session: The session.
+    """
+    retry = Retry(
+        total=settings.SWAPI_RETRIES,
+        backoff_factor=settings.SWAPI_BACKOFF,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=["GET"],
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.SWAPI_MAX_WORKERS, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def fetch_page(session, url):
+    """
+    Fetch one page of a SWAPI endpoint.
+
+    Args:
+        session (requests.Session): The session.
+        url (str): The URL of the page.
+    Returns:
+        dict: The page, or None if it could not be fetched.
+    """
+    try:
+        response = session.get(url, timeout=settings.SWAPI_TIMEOUT, verify=False)
+        response.raise_for_status()
+        return response.json()
+    except Exception as e:
+        logger.error(f"Error fetching {url}: {e}")
+        return None
+
+def get_page_urls(url, first_page, page_size=None):
+    """
+    Compute the URLs of the pages following the first one, from its `count` and page size.
+
+    Args:
+        url (str): The URL of the first page, with a `page` parameter when the stream starts later.
+        first_page (dict): The first page.
+        page_size (int, optional): The page size, known when the first page may be the last one.
+            Taken from the first page if not given.
+    Returns:
+        list: The URLs of the remaining pages, or None if the page does not report its `count`.
+    """
+    if first_page.get("count") is None or not first_page.get("results"):
+        return None
+
+    pages = math.ceil(first_page["count"] / (page_size or len(first_page["results"])))
+    scheme, netloc, path, query, fragment = urlsplit(url)
+    params = dict(parse_qsl(query))
+    start = int(params.get("page", 1))
+    return [
+        urlunsplit((scheme, netloc, path, urlencode({**params, "page": page}), fragment))
+        for page in range(start + 1, pages + 1)
+    ]
+
+
+class PageStream:
+    """
+    Iterator over the results of the pages of a SWAPI endpoint, one page at a time and in page order.
+
+    The first page is requested on creation. As soon as it arrives, its `count` gives the URLs
+    of the remaining pages, of which at most `window` are fetched ahead in the background: the
+    consumer writes a page while the next ones download, and memory stays bounded by the window.
+    Endpoints not reporting their `count` follow their `next` links. A page that cannot be
+    fetched ends the stream, the previous pages being kept, or raises `SwapiFetchError`
+    if the stream is `strict`.
+
+    Args:
+        - executor (ThreadPoolExecutor): Executor running the requests.
+        - session (requests.Session): The session.
+        - url (str): The URL of the endpoint.
+        - window (int): Maximum number of pages fetched ahead.
+        - strict (bool, optional): Raise instead of ending the stream on a failed page.
+        - page_size (int, optional): Page size of the endpoint, required when `url` is a later page.
+    """
+
+    def __init__(self, executor, session, url, window, strict=False, page_size=None):
+        self.executor = executor
+        self.session = session
+        self.url = url
+        self.window = window
+        self.strict = strict
+        self.page_size = page_size
+        self.page_urls = None
+        self.pending = deque()
+        self.lock = Lock()
+        self.ready = Event()
+        self.first_page = executor.submit(fetch_page, session, url)
+        self.first_page.add_done_callback(self._start)
+
+    def _start(self, future):
+        page = future.result()
+        with self.lock:
+            page_urls = get_page_urls(self.url, page, self.page_size) if page else []
+            self.page_urls = iter(page_urls) if page_urls is not None else None
+            self._fill()
+        self.ready.set()
+
+    def _fill(self):
+        while self.page_urls is not None and len(self.pending) < self.window:
+            page_url = next(self.page_urls, None)
+            if page_url is None:
+                break
+            self.pending.append(self.executor.submit(fetch_page, self.session, page_url))
+
+    def __iter__(self):
+        first_page = self.first_page.result()
+        if first_page is None:
+            self._failed()
+            return
+        yield first_page["results"]
+
+        self.ready.wait()
+        if self.page_urls is None:
+            next_url = first_page.get("next")
+            while next_url:
+                page = fetch_page(self.session, next_url)
+                if page is None:
+                    self._failed()
+                    return
+                yield page["results"]
+                next_url = page.get("next")
+            return
+
+        while True:
+            with self.lock:
+                if not self.pending:
+                    return
+                future = self.pending.popleft()
+                self._fill()
+
+            page = future.result()
+            if page is None:
+                self.close()
+                self._failed()
+                return
+            yield page["results"]
+
+    def _failed(self):
+        if self.strict:
+            raise SwapiFetchError(f"Incomplete data from {self.url}")
+
+    def close(self):
+        with self.lock:
+            self.page_urls = None
+            while self.pending:
+                self.pending.popleft().cancel()
+
+
+@contextmanager
+def open_streams(urls, session=None, strict=False, page_sizes=None):
+    """
+    Open page streams over several SWAPI endpoints, fetched concurrently by at most
+    `SWAPI_MAX_WORKERS` threads over one pooled session.
+
+    Args:
+        urls (list): The URLs of the endpoints.
+        session (requests.Session, optional): The session, created if not given.
+        strict (bool, optional): Raise `SwapiFetchError` when a page cannot be fetched.
+        page_sizes (dict, optional): Page size of the URLs starting at a later page.
+    Yields:
+        dict: The PageStream of each URL.
+    """
+    session = session or get_session()
+    page_sizes = page_sizes or {}
+    executor = ThreadPoolExecutor(max_workers=settings.SWAPI_MAX_WORKERS)
+    streams = {
+        url: PageStream(
+            executor, session, url, window=settings.SWAPI_MAX_WORKERS, strict=strict, page_size=page_sizes.get(url)
+        )
+        for url in urls
+    }
+    try:
+        yield streams
+    finally:
+        for stream in streams.values():
+            stream.close()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+@contextmanager
+def open_swapi(resources=("planets", "films", "people"), session=None, strict=False, start_pages=None):
+    """
+    Open concurrent page streams over resources of the SWAPI.
 
+    Args:
+        resources (tuple, optional): The resources.
+        session (requests.Session, optional): The session, created if not given.
+        strict (bool, optional): Raise `SwapiFetchError` when a page cannot be fetched.
+        start_pages (dict, optional): (page number, page size) to start each resource from,
+            to resume an interrupted load.
+    Yields:
+        dict: The PageStream of each resource.
+    """
+    start_pages = start_pages or {}
+    urls, page_sizes = {}, {}
+    for resource in resources:
+        urls[resource] = f"{settings.SWAPI_URL}{resource}/"
+        page, page_size = start_pages.get(resource, (1, None))
+        if page > 1:
+            urls[resource] += f"?page={page}"
+            page_sizes[urls[resource]] = page_size
+
+    with open_streams(list(urls.values()), session, strict, page_sizes) as streams:
+        yield {resource: streams[url] for resource, url in urls.items()}
+
+def iter_items(url, session=None, strict=False):
+    """
+    Stream the items of a SWAPI endpoint.
 
-def fetch_all(url):
+    Args:
+        url (str): The URL to fetch data from.
+        session (requests.Session, optional): The session, created if not given.
+        strict (bool, optional): Raise `SwapiFetchError` when a page cannot be fetched.
+    Yields:
+        dict: The items, in page order.
     """
-    Fetch all data from a SWAPI endpoint.
+    with open_streams([url], session, strict) as streams:
+        for results in streams[url]:
+            yield from results
+
+def fetch_resources(urls, session=None):
+    """
+    Fetch all the pages of several SWAPI endpoints concurrently.
+
+    Args:
+        urls (list): The URLs of the endpoints.
+        session (requests.Session, optional): The session, created if not given.
+    Returns:
+        dict: The results of each URL, in page order.
+    """
+    with open_streams(urls, session) as streams:
+        return {url: list(chain.from_iterable(stream)) for url, stream in streams.items()}
+
+def fetch_all(url, session=None):
+    """
+    Fetch all data from a SWAPI endpoint, its pages being fetched concurrently.
 
     Args:
         url (str): The URL to fetch data from.
+        session (requests.Session, optional): The session, created if not given.
     Returns:
         list: A list of dictionaries containing the fetched data.
     """
-    results = []
-    while url:
-        try:
-            response = requests.get(url, timeout=10, verify=False)
-            response.raise_for_status()
-            data = response.json()
-            results.extend(data["results"])
-            url = data.get("next")
-        except Exception as e:
-            logger.error(f"Error fetching {url}: {e}")
-            break
-    return results
+    return list(iter_items(url, session))
+
+def chunked(iterable, size):
+    """
+    Split an iterable in lists of at most `size` items, consuming it lazily.
+    """
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
 
 def get_swapi_id_from_url(url):
     return int(url.rstrip('/').split('/')[-1])
 
-def populate_planets():
+def get_swapi_ids(model):
     """
-    Populate the Planet model with data from the SWAPI.
+    Map the SWAPI ids of a model to its primary keys, without loading the rows.
     """
-    logger.info("Populating planets...")
+    return dict(model.objects.exclude(swapi_id=None).values_list("swapi_id", "pk"))
 
-    # Initialize variables
-    existing_ids = set(Planet.objects.values_list('swapi_id', flat=True))
-    new_planets = list()
+def bulk_create_links(through, links):
+    """
+    Insert the rows of a many-to-many through table with one bulk INSERT, skipping existing links.
+
+    Args:
+        through (Model): The through model.
+        links (list): Unsaved through model instances.
+    Returns:
+        float: Seconds taken.
+    """
+    start = time.perf_counter()
+    through.objects.bulk_create(links, batch_size=settings.SWAPI_BATCH_SIZE, ignore_conflicts=True)
+    return time.perf_counter() - start
+
+def get_content_hash(instance, references):
+    """
+    Hash the SWAPI data of a row: its field values and the SWAPI ids of its relations.
+    Relations are hashed by SWAPI id rather than primary key, so that the hash of the
+    same data is the same in every database (e.g. after loading a dump).
+
+    Args:
+        instance (Model): The unsaved row.
+        references (dict): SWAPI ids of the related rows by relation name.
+    Returns:
+        str: SHA-256 hex digest.
+    """
+    values = [
+        getattr(instance, field.attname)
+        for field in instance._meta.concrete_fields
+        if field.name not in HASH_EXCLUDED_FIELDS and not field.is_relation
+    ]
+    payload = json.dumps([values, sorted(references.items())], default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def build_planet(swapi_id, planet):
+    return Planet(
+        swapi_id=swapi_id,
+        name=planet["name"],
+        climate=planet.get("climate", ""),
+        terrain=planet.get("terrain", ""),
+        rotation_period=planet.get("rotation_period", ""),
+        orbital_period=planet.get("orbital_period", ""),
+        diameter=planet.get("diameter", ""),
+        gravity=planet.get("gravity", ""),
+        surface_water=planet.get("surface_water", ""),
+        population=planet.get("population", ""),
+    ), {}, {}
+
+def build_movie(swapi_id, film, planet_ids):
+    movie = Movie(
+        swapi_id=swapi_id,
+        title=film["title"],
+        episode_id=film["episode_id"],
+        opening_crawl=film["opening_crawl"],
+        director=film["director"],
+        producers=film["producer"],
+        release_date=film["release_date"],
+    )
+    planets = sorted({
+        planet_id for planet_id in map(get_swapi_id_from_url, film.get("planets", [])) if planet_id in planet_ids
+    })
+    return movie, {"planets": [planet_ids[planet_id] for planet_id in planets]}, {"planets": planets}
+
+def build_character(swapi_id, character, planet_ids, movie_ids):
+    # Get homeworld
+    homeworld_id = get_swapi_id_from_url(character["homeworld"]) if character.get("homeworld") else None
+
+    instance = Character(
+        swapi_id=swapi_id,
+        name=character.get("name", ""),
+        birth_year=character.get("birth_year", ""),
+        species=", ".join(character.get("species", [])),
+        height=character.get("height", ""),
+        mass=character.get("mass", ""),
+        hair_color=character.get("hair_color", ""),
+        skin_color=character.get("skin_color", ""),
+        eye_color=character.get("eye_color", ""),
+        gender=character.get("gender", ""),
+        homeworld_id=planet_ids.get(homeworld_id),
+    )
+    movies = sorted({
+        film_id for film_id in map(get_swapi_id_from_url, character.get("films", [])) if film_id in movie_ids
+    })
+    references = {"homeworld": homeworld_id if homeworld_id in planet_ids else None, "movies": movies}
+    return instance, {"movies": [movie_ids[film_id] for film_id in movies]}, references
+
+def build_rows(items, build, skip_ids, **kwargs):
+    """
+    Transform SWAPI items into unsaved rows with their content hash, lazily.
 
-    for planet in fetch_all(f"{STAR_WARS_API}planets/"):
-        # Skip existing planet
-        swapi_id = get_swapi_id_from_url(planet["url"])
-        if swapi_id in existing_ids:
+    Args:
+        items (iterable): The SWAPI items.
+        build (callable): Builder of the row, links (primary keys) and references (SWAPI ids) of an item.
+        skip_ids (set): SWAPI ids to skip, updated with the ids of the built rows
+            so that items repeated in the stream are skipped.
+        **kwargs: Extra arguments of `build` (SWAPI id to primary key maps).
+    Yields:
+        tuple: (instance, dict of many-to-many field name to target primary keys).
+    """
+    for item in items:
+        swapi_id = get_swapi_id_from_url(item["url"])
+        if swapi_id in skip_ids:
             continue
+        skip_ids.add(swapi_id)
 
-        new_planets.append(
-            Planet(
-                swapi_id=swapi_id,
-                name=planet["name"],
-                climate=planet.get("climate", ""),
-                terrain=planet.get("terrain", ""),
-                rotation_period=planet.get("rotation_period", ""),
-                orbital_period=planet.get("orbital_period", ""),
-                diameter=planet.get("diameter", ""),
-                gravity=planet.get("gravity", ""),
-                surface_water=planet.get("surface_water", ""),
-                population=planet.get("population", ""),
-            )
-        )
+        instance, links, references = build(swapi_id, item, **kwargs)
+        instance.content_hash = get_content_hash(instance, references)
+        yield instance, links
 
-    # Bulk create the new planets
-    created_planets = Planet.objects.bulk_create(new_planets)
-    logger.info(f"{len(created_planets)} planets created.")
-    return created_planets
+def write_links(model, rows, timings):
+    """
+    Insert the many-to-many links of new rows, one bulk INSERT per through table.
 
-def populate_movies():
+    Args:
+        model (Model): The model of the rows.
+        rows (list): (instance, links) pairs of saved rows.
+        timings (dict): Link count and seconds by through table, updated in place.
     """
-    Populate the Movie model with data from the SWAPI.
+    for field in model._meta.many_to_many:
+        through = field.remote_field.through
+        source, target = f"{field.m2m_field_name()}_id", f"{field.m2m_reverse_field_name()}_id"
+        links = [
+            through(**{source: instance.pk, target: pk})
+            for instance, instance_links in rows
+            for pk in instance_links.get(field.name, ())
+        ]
+        count, seconds = timings.get(through._meta.db_table, (0, 0.0))
+        timings[through._meta.db_table] = (count + len(links), seconds + bulk_create_links(through, links))
+
+def sync_links(model, rows, timings):
     """
-    logger.info("Populating movies...")
+    Diff the many-to-many links of updated rows with the database and apply the difference:
+    one SELECT of the current links, one bulk INSERT and one DELETE per through table.
 
-    # Initialize variables
-    existing_ids = set(Movie.objects.values_list('swapi_id', flat=True))
-    films = fetch_all(f"{STAR_WARS_API}films/")
-    planets_map = {p.swapi_id: p for p in Planet.objects.all()}
-    new_movies = []
-    films_map = {}
+    Args:
+        model (Model): The model of the rows.
+        rows (list): (instance, links) pairs of saved rows.
+        timings (dict): Link count and seconds by through table, updated in place.
+    """
+    pks = [instance.pk for instance, _ in rows]
+    for field in model._meta.many_to_many:
+        through = field.remote_field.through
+        source, target = f"{field.m2m_field_name()}_id", f"{field.m2m_reverse_field_name()}_id"
+
+        start = time.perf_counter()
+        current = set(through.objects.filter(**{f"{source}__in": pks}).values_list(source, target))
+        wanted = {(instance.pk, pk) for instance, links in rows for pk in links.get(field.name, ())}
+
+        stale = current - wanted
+        if stale:
+            through.objects.filter(
+                reduce(operator.or_, (Q(**{source: pk, target: target_pk}) for pk, target_pk in stale))
+            ).delete()
+        added = [through(**{source: pk, target: target_pk}) for pk, target_pk in wanted - current]
+        bulk_create_links(through, added)
+
+        count, seconds = timings.get(through._meta.db_table, (0, 0.0))
+        timings[through._meta.db_table] = (
+            count + len(added) + len(stale), seconds + time.perf_counter() - start
+        )
+
+def log_links(timings):
+    for table, (count, seconds) in timings.items():
+        logger.info(f"{count} links written to {table} in {seconds:.3f}s.")
+
+def insert_rows(model, rows, checkpoint=None):
+    """
+    Insert rows and their many-to-many links, one bulk INSERT per chunk of `SWAPI_BATCH_SIZE` rows.
 
-    for film in films:
-        # Skip existing film
-        swapi_id = get_swapi_id_from_url(film["url"])
-        films_map[swapi_id] = film
+    Args:
+        model (Model): The model of the rows.
+        rows (iterable): (instance, links) pairs of unsaved rows.
+        checkpoint (callable, optional): Called after writing each chunk, in the transaction of
+            the chunk: with a checkpoint, every chunk is committed on its own.
+    Returns:
+        int: Number of rows created.
+    """
+    created, timings = 0, {}
+    for chunk in chunked(rows, settings.SWAPI_BATCH_SIZE):
+        with transaction.atomic() if checkpoint else nullcontext():
+            model.objects.bulk_create([instance for instance, _ in chunk])
+            write_links(model, chunk, timings)
+            if checkpoint:
+                checkpoint()
+        created += len(chunk)
+
+    log_links(timings)
+    return created
+
+def sync_rows(model, rows, seen_ids):
+    """
+    Synchronize a model with the SWAPI rows, chunk by chunk.
 
-        if swapi_id in existing_ids:
+    - The content hashes of the chunk are read with one query; rows whose hash did not
+      change are left untouched.
+    - New and changed rows are upserted with one `INSERT ... ON CONFLICT (swapi_id) DO UPDATE`,
+      their history is written in bulk and their links are diffed with the database.
+    - Rows with a SWAPI id absent from the source are deleted.
+
+    Args:
+        model (Model): The model of the rows.
+        rows (iterable): (instance, links) pairs of unsaved rows.
+        seen_ids (set): SWAPI ids of the rows, filled while `rows` is consumed.
+    Returns:
+        dict: Number of rows inserted, updated, unchanged and deleted.
+    """
+    counts = dict.fromkeys(("inserted", "updated", "unchanged", "deleted"), 0)
+    update_fields = [
+        field.name for field in model._meta.concrete_fields if field.name not in ("id", "swapi_id", "created_at")
+    ]
+    timings = {}
+
+    for chunk in chunked(rows, settings.SWAPI_BATCH_SIZE):
+        hashes = dict(
+            model.objects.filter(swapi_id__in=[instance.swapi_id for instance, _ in chunk])
+            .values_list("swapi_id", "content_hash")
+        )
+        changed = [row for row in chunk if hashes.get(row[0].swapi_id) != row[0].content_hash]
+        counts["unchanged"] += len(chunk) - len(changed)
+        if not changed:
             continue
 
-        new_movies.append(
-            Movie(
-                swapi_id=swapi_id,
-                title=film["title"],
-                episode_id=film["episode_id"],
-                opening_crawl=film["opening_crawl"],
-                director=film["director"],
-                producers=film["producer"],
-                release_date=film["release_date"],
-            )
+        model.objects.bulk_create(
+            [instance for instance, _ in changed],
+            update_conflicts=True,
+            unique_fields=["swapi_id"],
+            update_fields=update_fields,
+        )
+        pks = dict(
+            model.objects.filter(swapi_id__in=[instance.swapi_id for instance, _ in changed])
+            .values_list("swapi_id", "pk")
         )
+        inserted, updated = [], []
+        for instance, _ in changed:
+            instance.pk = pks[instance.swapi_id]
+            (updated if instance.swapi_id in hashes else inserted).append(instance)
+
+        model.history.bulk_history_create(inserted, batch_size=settings.SWAPI_BATCH_SIZE)
+        model.history.bulk_history_create(updated, batch_size=settings.SWAPI_BATCH_SIZE, update=True)
+        sync_links(model, changed, timings)
+        counts["inserted"] += len(inserted)
+        counts["updated"] += len(updated)
+
+    # Rows missing from the source, only looked up when the counts do not match
+    existing = model.objects.exclude(swapi_id=None)
+    if existing.count() > len(seen_ids):
+        stale_ids = [swapi_id for swapi_id in existing.values_list("swapi_id", flat=True) if swapi_id not in seen_ids]
+        for chunk in chunked(stale_ids, settings.SWAPI_BATCH_SIZE):
+            counts["deleted"] += model.objects.filter(swapi_id__in=chunk).delete()[1].get(model._meta.label, 0)
+
+    log_links(timings)
+    return counts
+
+def get_items(data, resource, strict=False):
+    return data if data is not None else iter_items(f"{settings.SWAPI_URL}{resource}/", strict=strict)
+
+def populate_planets(planets_data=None, checkpoint=None):
+    """
+    Populate the Planet model with data from the SWAPI, streamed and written in chunks
+    of `SWAPI_BATCH_SIZE` planets. Planets already loaded are skipped.
 
-    created_movies = Movie.objects.bulk_create(new_movies)
-    logger.info(f"{len(created_movies)} movies created.")
+    Args:
+        planets_data (iterable, optional): Planets from the SWAPI, streamed from it if not given.
+        checkpoint (callable, optional): Called in the transaction of each chunk (see `insert_rows`).
+    Returns:
+        int: Number of planets created.
+    """
+    logger.info("Populating planets...")
 
-    # Add planets
-    for movie in created_movies:
-        film = films_map.get(movie.swapi_id)
-        if not film:
-            continue
+    existing_ids = set(Planet.objects.values_list('swapi_id', flat=True))
+    rows = build_rows(get_items(planets_data, "planets"), build_planet, existing_ids)
+    created = insert_rows(Planet, rows, checkpoint)
 
-        for planet_url in film.get("planets", []):
-            planet_id = get_swapi_id_from_url(planet_url)
-            planet = planets_map.get(planet_id)
-            if planet:
-                movie.planets.add(planet)
+    logger.info(f"{created} planets created.")
+    return created
 
-    logger.info("Movies populated with planets.")
-    return created_movies
+def populate_movies(films=None, checkpoint=None):
+    """
+    Populate the Movie model with data from the SWAPI, streamed and written in chunks
+    of `SWAPI_BATCH_SIZE` movies along with their planets. Movies already loaded are skipped.
 
-def populate_characters():
+    Args:
+        films (iterable, optional): Films from the SWAPI, streamed from it if not given.
+        checkpoint (callable, optional): Called in the transaction of each chunk (see `insert_rows`).
+    Returns:
+        int: Number of movies created.
     """
-    Populate the Character model with data from the SWAPI.
+    logger.info("Populating movies...")
+
+    existing_ids = set(Movie.objects.values_list('swapi_id', flat=True))
+    rows = build_rows(get_items(films, "films"), build_movie, existing_ids, planet_ids=get_swapi_ids(Planet))
+    created = insert_rows(Movie, rows, checkpoint)
+
+    logger.info(f"{created} movies created.")
+    return created
+
+def populate_characters(characters_data=None, checkpoint=None):
+    """
+    Populate the Character model with data from the SWAPI, streamed and written in chunks
+    of `SWAPI_BATCH_SIZE` characters along with their movies. Characters already loaded are skipped.
+
+    Args:
+        characters_data (iterable, optional): People from the SWAPI, streamed from it if not given.
+        checkpoint (callable, optional): Called in the transaction of each chunk (see `insert_rows`).
+    Returns:
+        int: Number of characters created.
     """
     logger.info("Populating characters...")
 
-    # Initialize variables
     existing_ids = set(Character.objects.values_list('swapi_id', flat=True))
-    characters_data = fetch_all(f"{STAR_WARS_API}people/")
-    planets_map = {p.swapi_id: p for p in Planet.objects.all()}
-    movies_map = {m.swapi_id: m for m in Movie.objects.all()}
-    new_characters = []
-    characters_map = {}
-
-    for character in characters_data:
-        # Skip existing character
-        swapi_id = get_swapi_id_from_url(character["url"])
-        characters_map[swapi_id] = character
-
-        if swapi_id in existing_ids:
-            continue
+    rows = build_rows(
+        get_items(characters_data, "people"), build_character, existing_ids,
+        planet_ids=get_swapi_ids(Planet), movie_ids=get_swapi_ids(Movie),
+    )
+    created = insert_rows(Character, rows, checkpoint)
 
-        # Get homeworld
-        homeworld_id = get_swapi_id_from_url(character["homeworld"]) if character.get("homeworld") else None
-        homeworld = planets_map.get(homeworld_id) if homeworld_id else None
-
-        new_characters.append(
-            Character(
-                swapi_id=swapi_id,
-                name=character.get("name", ""),
-                birth_year=character.get("birth_year", ""),
-                species=", ".join(character.get("species", [])),
-                height=character.get("height", ""),
-                mass=character.get("mass", ""),
-                hair_color=character.get("hair_color", ""),
-                skin_color=character.get("skin_color", ""),
-                eye_color=character.get("eye_color", ""),
-                gender=character.get("gender", ""),
-                homeworld=homeworld,
-            )
-        )
+    logger.info(f"{created} characters created.")
+    return created
 
-    created_characters = Character.objects.bulk_create(new_characters)
-    logger.info(f"{len(created_characters)} characters created.")
+def sync_planets(planets_data=None):
+    """
+    Synchronize the Planet model with the SWAPI (see `sync_rows`).
 
-    # Add movies
-    for charecter in created_characters:
-        character_data = characters_map.get(charecter.swapi_id)
-        if not character_data:
-            continue
+    Args:
+        planets_data (iterable, optional): Planets from the SWAPI, streamed from it if not given.
+            The data must be complete: planets missing from it are deleted.
+    Returns:
+        dict: Number of planets inserted, updated, unchanged and deleted.
+    """
+    logger.info("Synchronizing planets...")
+
+    seen_ids = set()
+    rows = build_rows(get_items(planets_data, "planets", strict=True), build_planet, seen_ids)
+    counts = sync_rows(Planet, rows, seen_ids)
+
+    logger.info(f"Planets synchronized: {counts}.")
+    return counts
+
+def sync_movies(films=None):
+    """
+    Synchronize the Movie model and its planets with the SWAPI (see `sync_rows`).
+
+    Args:
+        films (iterable, optional): Films from the SWAPI, streamed from it if not given.
+            The data must be complete: movies missing from it are deleted.
+    Returns:
+        dict: Number of movies inserted, updated, unchanged and deleted.
+    """
+    logger.info("Synchronizing movies...")
+
+    seen_ids = set()
+    rows = build_rows(
+        get_items(films, "films", strict=True), build_movie, seen_ids, planet_ids=get_swapi_ids(Planet)
+    )
+    counts = sync_rows(Movie, rows, seen_ids)
+
+    logger.info(f"Movies synchronized: {counts}.")
+    return counts
+
+def sync_characters(characters_data=None):
+    """
+    Synchronize the Character model and its movies with the SWAPI (see `sync_rows`).
+
+    Args:
+        characters_data (iterable, optional): People from the SWAPI, streamed from it if not given.
+            The data must be complete: characters missing from it are deleted.
+    Returns:
+        dict: Number of characters inserted, updated, unchanged and deleted.
+    """
+    logger.info("Synchronizing characters...")
 
-        for film_url in character_data.get("films", []):
-            film_id = get_swapi_id_from_url(film_url)
-            movie = movies_map.get(film_id)
-            if movie:
-                charecter.movies.add(movie)
+    seen_ids = set()
+    rows = build_rows(
+        get_items(characters_data, "people", strict=True), build_character, seen_ids,
+        planet_ids=get_swapi_ids(Planet), movie_ids=get_swapi_ids(Movie),
+    )
+    counts = sync_rows(Character, rows, seen_ids)
 
-    logger.info("Characters populated with movies.")
-    return created_characters
+    logger.info(f"Characters synchronized: {counts}.")
+    return counts
@@ -0,0 +1,212 @@
+# Django
+from django.conf import settings
+from django.db import connections
+
+# Utils
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from functools import partial
+from queue import Empty, Full, Queue
+import time
+from utils.logger import logger
+
+
+# Write stages of the populate DAG and the write stages they wait for:
+# movies link planets, characters reference their homeworld and link movies
+WRITE_DEPENDENCIES = {"planets": (), "films": ("planets",), "people": ("planets", "films")}
+
+
+class StageError(Exception):
+    """
+    Error raised when stages do not form a DAG.
+    """
+
+
+class Stage:
+    """
+    Step of a DAG run by `run_stages`.
+
+    - `name`: unique name, used by the `depends` of other stages and in the timings.
+    - `func`: callable run without arguments.
+    - `depends`: names of the stages that must be done before this one starts.
+    - `local`: run on the calling thread instead of the worker pool (database stages, which
+      must share the connection and transaction of the caller).
+    """
+
+    def __init__(self, name, func, depends=(), local=False):
+        self.name = name
+        self.func = func
+        self.depends = tuple(depends)
+        self.local = local
+
+
+def check_stages(stages):
+    """
+    Raises:
+        - StageError: If a name is repeated, a dependency is unknown or there is a cycle.
+    """
+    names = [stage.name for stage in stages]
+    if len(set(names)) != len(names):
+        raise StageError("Stage names must be unique")
+    for stage in stages:
+        unknown = set(stage.depends) - set(names)
+        if unknown:
+            raise StageError(f"{stage.name} depends on unknown stages: {', '.join(sorted(unknown))}")
+
+    done, remaining = set(), list(stages)
+    while remaining:
+        ready = [stage for stage in remaining if set(stage.depends) <= done]
+        if not ready:
+            raise StageError(f"Cycle between: {', '.join(stage.name for stage in remaining)}")
+        done.update(stage.name for stage in ready)
+        remaining = [stage for stage in remaining if stage.name not in done]
+
+def run_timed(stage, origin):
+    start = time.perf_counter()
+    try:
+        stage.func()
+    finally:
+        if not stage.local:
+            # Worker threads keep their own database connections
+            connections.close_all()
+    return start - origin, time.perf_counter() - origin
+
+def run_stages(stages, max_workers):
+    """
+    Run a DAG of stages as soon as their dependencies are done: pool stages on at most
+    `max_workers` threads, in the order of `stages` when more are ready, and local stages
+    on the calling thread, one at a time.
+
+    Args:
+        stages (list): The stages.
+        max_workers (int): Size of the worker pool.
+    Returns:
+        dict: (start, end) of each stage, in seconds since the start of the run, in completion order.
+    Raises:
+        - StageError: If the stages do not form a DAG.
+        - The first error raised by a stage; the stages not started yet are cancelled.
+    """
+    check_stages(stages)
+    origin = time.perf_counter()
+    remaining, done, futures, timings = list(stages), set(), {}, {}
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    try:
+        while remaining or futures:
+            ready = [stage for stage in remaining if set(stage.depends) <= done]
+            for stage in ready:
+                if not stage.local:
+                    remaining.remove(stage)
+                    futures[executor.submit(run_timed, stage, origin)] = stage.name
+
+            local = next((stage for stage in ready if stage.local), None)
+            if local:
+                remaining.remove(local)
+                timings[local.name] = run_timed(local, origin)
+                done.add(local.name)
+            else:
+                finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = futures.pop(future)
+                    timings[name] = future.result()
+                    done.add(name)
+
+            # Collect the pool stages done meanwhile
+            for future in [future for future in futures if future.done()]:
+                name = futures.pop(future)
+                timings[name] = future.result()
+                done.add(name)
+    except BaseException:
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+    executor.shutdown()
+    return timings
+
+
+class PageBuffer:
+    """
+    Queue of pages between a fetch stage, which drains a page stream into it, and the write stage
+    of the same resource, which iterates over it. Holds at most `maxsize` pages; `close` makes a
+    blocked producer give up (when the load fails).
+
+    An error of the page stream is queued after the pages fetched before it and raised by the
+    iterator, so that the write stage writes (and checkpoints) those pages before failing.
+    """
+
+    END = object()
+
+    def __init__(self, maxsize=0):
+        self.queue = Queue(maxsize)
+        self.closed = False
+
+    def put(self, item):
+        while not self.closed:
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except Full:
+                continue
+
+    def fill(self, pages):
+        try:
+            for page in pages:
+                if self.closed:
+                    return
+                self.put(page)
+        except Exception as e:
+            self.put(e)
+        finally:
+            self.put(self.END)
+
+    def __iter__(self):
+        while True:
+            item = self.queue.get()
+            if item is self.END:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    def close(self):
+        self.closed = True
+        try:
+            while True:
+                self.queue.get_nowait()
+        except Empty:
+            pass
+
+
+def run_populate_stages(pages, write, fetch=True):
+    """
+    Load resources as a DAG: one fetch stage per resource, all started at once on the worker pool,
+    drains its page stream into a `PageBuffer`; the write stage of each resource consumes its buffer
+    on the calling thread once the write stages it depends on (`WRITE_DEPENDENCIES`) are done.
+    Fetching never waits for the writes, so the load takes about as long as the slowest fetch.
+
+    Args:
+        pages (dict): The page stream of each resource to load.
+        write (callable): Called with the resource and its pages to write it.
+        fetch (bool, optional): Run fetch stages; without them (e.g. dump files, which cannot be
+            read from several threads), the write stages read the streams directly.
+    Returns:
+        dict: (start, end) of each stage, in seconds since the start of the load.
+    """
+    stages, buffers = [], {}
+    if fetch:
+        for resource, stream in pages.items():
+            buffers[resource] = PageBuffer(settings.SWAPI_BUFFERED_PAGES)
+            stages.append(Stage(f"fetch {resource}", partial(buffers[resource].fill, stream)))
+        pages = buffers
+
+    for resource, stream in pages.items():
+        depends = [f"write {dependency}" for dependency in WRITE_DEPENDENCIES[resource] if dependency in pages]
+        stages.append(Stage(f"write {resource}", partial(write, resource, stream), depends, local=True))
+
+    try:
+        timings = run_stages(stages, settings.SWAPI_STAGE_WORKERS)
+    finally:
+        for buffer in buffers.values():
+            buffer.close()
+
+    for name, (start, end) in timings.items():
+        logger.info(f"Stage {name}: started at {start:.3f}s, took {end - start:.3f}s.")
+    return timings
@@ -0,0 +1,188 @@
+# Services
+from services.dumps import RESOURCES, open_dump
+from services.populate import get_swapi_id_from_url
+
+# Utils
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock, Thread
+from urllib.parse import parse_qsl, urlsplit
+import json
+import random
+import time
+
+
+class SwapiData:
+    """
+    SWAPI-shaped items served by `SwapiServer`, keyed by resource and SWAPI id.
+    """
+
+    def __init__(self, items):
+        self.items = {
+            resource: {get_swapi_id_from_url(item["url"]): item for item in items.get(resource, ())}
+            for resource in RESOURCES
+        }
+
+    @classmethod
+    def from_dump(cls, source):
+        """
+        Read the items of a dump directory or archive (see `services.dumps.open_dump`).
+        """
+        with open_dump(source) as streams:
+            return cls({resource: list(items) for resource, items in streams.items()})
+
+    @classmethod
+    def generate(cls, planets=60, films=6, people=82, seed=0):
+        """
+        Generate items with SWAPI fields and random relations (reproducible for a seed).
+
+        Args:
+            planets (int, optional): Number of planets.
+            films (int, optional): Number of films.
+            people (int, optional): Number of people.
+            seed (int, optional): Seed of the relations.
+        Returns:
+            SwapiData: The data.
+        """
+        rng = random.Random(seed)
+        url = "https://swapi.dev/api/{}/{}/".format
+
+        def sample(resource, count, size):
+            return [url(resource, i) for i in sorted(rng.sample(range(1, count + 1), min(size, count)))]
+
+        return cls({
+            "planets": [
+                {
+                    "url": url("planets", i), "name": f"Planet {i}", "climate": "temperate", "terrain": "grasslands",
+                    "rotation_period": "24", "orbital_period": "364", "diameter": "12500", "gravity": "1 standard",
+                    "surface_water": "40", "population": str(rng.randint(0, 10 ** 9)),
+                }
+                for i in range(1, planets + 1)
+            ],
+            "films": [
+                {
+                    "url": url("films", i), "title": f"Film {i}", "episode_id": i,
+                    "opening_crawl": "A long time ago...", "director": "George Lucas", "producer": "Gary Kurtz",
+                    "release_date": "1977-05-25",
+                    "planets": sample("planets", planets, rng.randint(1, 10)),
+                }
+                for i in range(1, films + 1)
+            ],
+            "people": [
+                {
+                    "url": url("people", i), "name": f"Character {i}", "birth_year": "19BBY", "species": [],
+                    "height": "172", "mass": "77", "hair_color": "blond", "skin_color": "fair", "eye_color": "blue",
+                    "gender": "male", "homeworld": url("planets", rng.randint(1, planets)) if planets else None,
+                    "films": sample("films", films, rng.randint(1, 3)),
+                }
+                for i in range(1, people + 1)
+            ],
+        })
+
+
+class SwapiRequestHandler(BaseHTTPRequestHandler):
+    """
+    Serve `/api/<resource>/?page=N` pages and `/api/<resource>/<id>/` items of the server data,
+    after the server latency and failing with a 500 at the server error rate.
+    """
+
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+
+        if server.error_rate and server.random() < server.error_rate:
+            return self.send_json(500, {"detail": "Injected error"})
+
+        url = urlsplit(self.path)
+        parts = [part for part in url.path.split("/") if part]
+        if len(parts) < 2 or parts[0] != "api" or parts[1] not in server.data.items:
+            return self.send_json(404, {"detail": "Not found"})
+
+        items = server.data.items[parts[1]]
+        if len(parts) == 3:
+            item = items.get(int(parts[2])) if parts[2].isdigit() else None
+            return self.send_json(200, item) if item else self.send_json(404, {"detail": "Not found"})
+
+        page = dict(parse_qsl(url.query)).get("page", "1")
+        page = int(page) if page.isdigit() else 0
+        ordered = [items[swapi_id] for swapi_id in sorted(items)]
+        start = (page - 1) * server.page_size
+        if page < 1 or (start >= len(ordered) and page > 1):
+            return self.send_json(404, {"detail": "Not found"})
+
+        base = f"http://{self.headers.get('Host')}/api/{parts[1]}/"
+        self.send_json(200, {
+            "count": len(ordered),
+            "next": f"{base}?page={page + 1}" if start + server.page_size < len(ordered) else None,
+            "previous": f"{base}?page={page - 1}" if page > 1 else None,
+            "results": ordered[start:start + server.page_size],
+        })
+
+    def send_json(self, status, data):
+        body = json.dumps(data).encode("utf-8")
+        self.server.count(status)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class SwapiServer(ThreadingHTTPServer):
+    """
+    Local stand-in of the SWAPI for benchmarks and offline development.
+
+    - `latency`: seconds slept before answering each request.
+    - `error_rate`: share of requests answered with a 500 (retried by the loader).
+    - `page_size`: items per page of the list endpoints.
+    - `requests`: count of the answered requests by status code.
+
+    Example:
+        with SwapiServer(SwapiData.generate(), latency=0.05) as server:
+            server.start()
+            settings.SWAPI_URL = server.url
+    """
+
+    daemon_threads = True
+
+    def __init__(self, data, host="127.0.0.1", port=0, latency=0.0, error_rate=0.0, page_size=10, seed=0):
+        super().__init__((host, port), SwapiRequestHandler)
+        self.data = data
+        self.latency = latency
+        self.error_rate = error_rate
+        self.page_size = page_size
+        self.requests = Counter()
+        self.lock = Lock()
+        self.rng = random.Random(seed)
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/"
+
+    def random(self):
+        with self.lock:
+            return self.rng.random()
+
+    def count(self, status):
+        with self.lock:
+            self.requests[status] += 1
+
+    def start(self):
+        """
+        Serve in a background thread, until `shutdown`.
+        """
+        self.thread = Thread(target=self.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        if self.thread:
+            self.shutdown()
+            self.thread.join()
+        super().__exit__(*args)
@@ -0,0 +1,137 @@
+# Django
+from django.apps import apps
+from django.core.management.color import no_style
+from django.db import connections, transaction
+
+# Models
+from starwars.models import Planet, Movie, Character
+
+# Services
+from services.bulk import copy_from_file, copy_to_file, deferred_indexes
+
+# Utils
+from pathlib import Path
+import json
+import time
+from utils.logger import logger
+
+
+MANIFEST = "manifest.json"
+COPY_FORMATS = ("binary", "csv")
+FILE_SUFFIXES = {"binary": ".copy", "csv": ".csv"}
+
+
+class TransferError(Exception):
+    """
+    Error raised when an export cannot be imported.
+    """
+
+
+def get_transfer_models(history=False):
+    """
+    Return the models of the transferred tables, each one after the tables it references.
+
+    Args:
+        history (bool, optional): Include the `Historical*` tables.
+    Returns:
+        list: The models.
+    """
+    models = [Planet, Movie, Character, Movie.planets.through, Character.movies.through]
+    if history:
+        models += [Planet.history.model, Movie.history.model, Character.history.model]
+    return models
+
+def export_tables(target, copy_format="binary", history=False, using="default"):
+    """
+    Export the Star Wars tables to a directory, one `COPY` file per table and a manifest
+    listing their models, columns and row counts. The tables are read in one `REPEATABLE READ`
+    transaction, hence from the same snapshot: rows written during the export cannot reference
+    rows missing from the tables exported before them.
+
+    Args:
+        target (str): The directory, created if needed.
+        copy_format (str, optional): `binary` (fastest, same PostgreSQL major version) or `csv`.
+        history (bool, optional): Include the `Historical*` tables.
+        using (str, optional): The database alias.
+    Returns:
+        dict: The manifest.
+    """
+    path = Path(target)
+    path.mkdir(parents=True, exist_ok=True)
+    manifest = {"format": copy_format, "tables": []}
+    connection = connections[using]
+    outermost = not connection.in_atomic_block
+
+    with transaction.atomic(using=using):
+        if outermost:
+            # Must be the first statement of the transaction
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+
+        for model in get_transfer_models(history):
+            start = time.perf_counter()
+            columns = [field.column for field in model._meta.concrete_fields]
+            file_name = f"{model._meta.db_table}{FILE_SUFFIXES[copy_format]}"
+            with open(path / file_name, "wb") as file:
+                rows = copy_to_file(model, columns, file, copy_format, using)
+
+            manifest["tables"].append({
+                "model": model._meta.label, "table": model._meta.db_table, "columns": columns,
+                "file": file_name, "rows": rows,
+            })
+            logger.info(f"{rows} rows exported from {model._meta.db_table} in {time.perf_counter() - start:.3f}s.")
+
+    with open(path / MANIFEST, "w") as file:
+        json.dump(manifest, file, indent=2)
+    return manifest
+
+def import_tables(source, truncate=False, using="default"):
+    """
+    Import an export of `export_tables`. The secondary indexes and unique constraints are dropped
+    during the load and rebuilt afterwards, the sequences are reset past the imported primary keys
+    and the tables are analyzed. Must run in a transaction (see `deferred_indexes`).
+
+    Args:
+        source (str): The export directory.
+        truncate (bool, optional): Empty the tables first; otherwise they must be empty.
+        using (str, optional): The database alias.
+    Returns:
+        dict: Number of rows imported per table.
+    Raises:
+        - TransferError: If the manifest is missing or the tables are not empty.
+    """
+    path = Path(source)
+    if not (path / MANIFEST).is_file():
+        raise TransferError(f"No {MANIFEST} in {source}")
+    with open(path / MANIFEST) as file:
+        manifest = json.load(file)
+
+    tables = manifest["tables"]
+    models = [apps.get_model(table["model"]) for table in tables]
+    connection = connections[using]
+    quote = connection.ops.quote_name
+
+    if truncate:
+        with connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {', '.join(quote(model._meta.db_table) for model in models)}")
+    else:
+        not_empty = [model._meta.db_table for model in models if model._default_manager.using(using).exists()]
+        if not_empty:
+            raise TransferError(f"Tables not empty (use truncate): {', '.join(not_empty)}")
+
+    counts = {}
+    with deferred_indexes(models, using):
+        for model, table in zip(models, tables):
+            start = time.perf_counter()
+            with open(path / table["file"], "rb") as file:
+                counts[table["table"]] = copy_from_file(model, table["columns"], file, manifest["format"], using)
+            logger.info(
+                f"{counts[table['table']]} rows imported into {table['table']} in {time.perf_counter() - start:.3f}s."
+            )
+
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), models):
+            cursor.execute(sql)
+        for model in models:
+            cursor.execute(f"ANALYZE {quote(model._meta.db_table)}")
+    return counts
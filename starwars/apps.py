@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class StarwarsConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "starwars"
+
+    def ready(self):
+        from starwars.signals import connect_signals
+
+        connect_signals()
@@ -0,0 +1,143 @@
+# GraphQL
+from graphql import (
+    FieldNode, FragmentDefinitionNode, FragmentSpreadNode, GraphQLError, OperationType, get_named_type, is_leaf_type
+)
+from graphql.execution.values import get_argument_values
+
+
+QUERY_TOO_COMPLEX = "QUERY_TOO_COMPLEX"
+
+
+class QueryComplexityError(GraphQLError):
+    """
+    Error raised when a query exceeds the depth or cost budget.
+    """
+
+    def __init__(self, message):
+        super().__init__(message, extensions={"code": QUERY_TOO_COMPLEX})
+
+
+def is_connection_type(graphql_type):
+    return "edges" in graphql_type.fields and "pageInfo" in graphql_type.fields
+
+
+def is_edge_type(graphql_type):
+    return "node" in graphql_type.fields and "cursor" in graphql_type.fields
+
+
+class QueryCostAnalyzer:
+    """
+    Static cost and depth analysis of a validated document.
+
+    - Scalar fields cost `SCALAR_COST` and object fields `OBJECT_COST` plus their selection.
+    - Connections cost `OBJECT_COST` plus their selection multiplied by `first`/`last`,
+      or by `default_list_size` when neither is given: the most a page may hold. Negative
+      sizes count as 0 (they are rejected by the connections).
+    - Mutation fields cost `MUTATION_COST` plus their payload selection.
+    - Depth counts the levels of object fields, ignoring the `edges`/`node` plumbing
+      of connections: `allCharacters { edges { node { homeworld { name } } } }` has depth 2.
+    - Introspection fields are free.
+
+    Args:
+        - schema (GraphQLSchema): The schema the document was validated against.
+        - document (DocumentNode): The document.
+        - variables (dict, optional): Variables of the request.
+        - default_list_size (int, optional): Multiplier of connections without `first`/`last`.
+    """
+    SCALAR_COST = 1
+    OBJECT_COST = 1
+    MUTATION_COST = 10
+
+    def __init__(self, schema, document, variables=None, default_list_size=100):
+        self.schema = schema
+        self.variables = variables or {}
+        self.default_list_size = default_list_size
+        self.fragments = {
+            definition.name.value: definition
+            for definition in document.definitions
+            if isinstance(definition, FragmentDefinitionNode)
+        }
+
+    def analyze(self, operation):
+        """
+        Compute the cost and depth of an operation.
+
+        Args:
+            operation (OperationDefinitionNode): The operation to analyze.
+        Returns:
+            tuple: (cost, depth).
+        """
+        root_type = self.schema.get_root_type(operation.operation)
+        field_cost = self.MUTATION_COST if operation.operation == OperationType.MUTATION else None
+        return self._selection_cost(root_type, operation.selection_set, field_cost)
+
+    def _fields(self, parent_type, selection_set):
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                yield parent_type, selection
+            else:
+                if isinstance(selection, FragmentSpreadNode):
+                    selection = self.fragments[selection.name.value]
+                fragment_type = parent_type
+                if selection.type_condition is not None:
+                    fragment_type = self.schema.get_type(selection.type_condition.name.value)
+                yield from self._fields(fragment_type, selection.selection_set)
+
+    def _multiplier(self, field_def, field_node):
+        try:
+            args = get_argument_values(field_def, field_node, self.variables)
+        except GraphQLError:
+            args = {}
+        sizes = [max(args[name], 0) for name in ("first", "last") if args.get(name) is not None]
+        return min(sizes) if sizes else self.default_list_size
+
+    def _selection_cost(self, parent_type, selection_set, field_cost=None):
+        cost, depth = 0, 0
+        plumbing = is_connection_type(parent_type) or is_edge_type(parent_type)
+
+        for field_type, field_node in self._fields(parent_type, selection_set):
+            name = field_node.name.value
+            if name.startswith("__") or not hasattr(field_type, "fields"):
+                continue
+
+            field_def = field_type.fields[name]
+            named_type = get_named_type(field_def.type)
+            if is_leaf_type(named_type):
+                cost += self.SCALAR_COST if field_cost is None else field_cost
+                continue
+
+            sub_cost, sub_depth = self._selection_cost(named_type, field_node.selection_set)
+            if is_connection_type(named_type):
+                sub_cost = self.OBJECT_COST + self._multiplier(field_def, field_node) * sub_cost
+            elif not plumbing:
+                sub_cost += self.OBJECT_COST
+
+            cost += sub_cost if field_cost is None else field_cost + sub_cost
+            depth = max(depth, sub_depth if plumbing else sub_depth + 1)
+
+        return cost, depth
+
+
+def check_query_complexity(schema, document, operation, variables, max_depth, max_cost, default_list_size):
+    """
+    Analyze an operation and check it against the depth and cost budgets.
+
+    Args:
+        schema (GraphQLSchema): The schema.
+        document (DocumentNode): The validated document.
+        operation (OperationDefinitionNode): The operation to execute.
+        variables (dict): Variables of the request.
+        max_depth (int): Maximum depth.
+        max_cost (int): Maximum cost.
+        default_list_size (int): Multiplier of connections without `first`/`last`.
+    Returns:
+        tuple: (report for the response `extensions`, QueryComplexityError or None).
+    """
+    cost, depth = QueryCostAnalyzer(schema, document, variables, default_list_size).analyze(operation)
+    report = {"requested": cost, "maximum": max_cost, "depth": depth, "maximumDepth": max_depth}
+
+    if depth > max_depth:
+        return report, QueryComplexityError(f"Query depth {depth} exceeds the maximum depth of {max_depth}")
+    if cost > max_cost:
+        return report, QueryComplexityError(f"Query cost {cost} exceeds the maximum cost of {max_cost}")
+    return report, None
@@ -0,0 +1,70 @@
+# Django
+from django.conf import settings
+from django.http import HttpResponseNotModified
+from django.utils.http import parse_etags
+
+# Utils
+import hashlib
+import json
+
+
+class NotModified(Exception):
+    """
+    Raised when the client already has the current response of a GET query (`If-None-Match`),
+    to answer it with a 304 without executing the query.
+
+    Args:
+        - headers (dict): The `ETag` and `Cache-Control` headers of the response.
+    """
+
+    def __init__(self, headers):
+        super().__init__("Not modified")
+        self.headers = headers
+
+    @property
+    def response(self):
+        response = HttpResponseNotModified()
+        for name, value in self.headers.items():
+            response[name] = value
+        return response
+
+
+def get_etag(key, versions):
+    """
+    Build the ETag of a query response: the response cache key (schema, normalized document,
+    operation name and variables) and the versions of the models it reads, bumped by every
+    write to them (see `starwars.signals`). Weak, since the `extensions` may differ.
+
+    Args:
+        key (str): The response cache key of the query.
+        versions (dict): The tag versions of the models read by the query.
+    Returns:
+        str: The ETag.
+    """
+    payload = json.dumps([key, versions], sort_keys=True)
+    return f'W/"{hashlib.sha256(payload.encode("utf-8")).hexdigest()[:40]}"'
+
+def etag_matches(request, etag):
+    """
+    Return whether the `If-None-Match` header of a request matches an ETag (weak comparison).
+    """
+    header = request.headers.get("If-None-Match")
+    if not header:
+        return False
+    etags = parse_etags(header)
+    return "*" in etags or etag.removeprefix("W/") in {value.removeprefix("W/") for value in etags}
+
+def get_cache_control(models):
+    """
+    Compute the `Cache-Control` header of a query from the models it reads: its `max-age` is the
+    lowest `GRAPHQL_CACHE_CONTROL_MAX_AGE` of them (0 for models without one). Responses without
+    a `max-age` are `no-cache`: clients revalidate them every time with their ETag.
+
+    Args:
+        models (set): The models read by the query.
+    Returns:
+        str: The header value.
+    """
+    max_ages = settings.GRAPHQL_CACHE_CONTROL_MAX_AGE
+    max_age = min((max_ages.get(model._meta.model_name, 0) for model in models), default=0)
+    return f"public, max-age={max_age}" if max_age > 0 else "no-cache"
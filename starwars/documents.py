@@ -0,0 +1,143 @@
+# GraphQL
+from graphql import parse, print_schema
+from graphql.validation import validate
+
+# Utils
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+import hashlib
+
+
+class DocumentCache:
+    """
+    Bounded LRU cache of parsed and validated GraphQL documents.
+
+    A single instance is shared by every request of a worker process, so the parse
+    and validation cost of a query shape is only paid on its first request.
+
+    Args:
+        - maxsize (int): Maximum number of documents kept; 0 disables the cache.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._documents = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            document = self._documents.get(key)
+            if document is None:
+                self.misses += 1
+                return None
+
+            self._documents.move_to_end(key)
+            self.hits += 1
+            return document
+
+    def set(self, key, document):
+        if self.maxsize <= 0:
+            return
+
+        with self._lock:
+            self._documents[key] = document
+            self._documents.move_to_end(key)
+            while len(self._documents) > self.maxsize:
+                self._documents.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def info(self):
+        """
+        Get the counters of the cache.
+
+        Returns:
+            dict: hits, misses, evictions, current size and maxsize.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._documents),
+                "maxsize": self.maxsize,
+            }
+
+
+@lru_cache(maxsize=None)
+def get_schema_version(graphql_schema):
+    """
+    Get a short fingerprint of a schema, computed from its SDL.
+
+    Args:
+        graphql_schema (GraphQLSchema): The schema.
+    Returns:
+        str: The schema version.
+    """
+    return hashlib.sha256(print_schema(graphql_schema).encode("utf-8")).hexdigest()[:16]
+
+
+def hash_query(query):
+    """
+    SHA-256 of a query text, as used by persisted queries.
+    """
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+def get_document_key(graphql_schema, query_hash):
+    """
+    Cache key of a query: the schema version plus the SHA-256 of the query text.
+    """
+    return f"{get_schema_version(graphql_schema)}:{query_hash}"
+
+
+def parse_and_validate(graphql_schema, query, validation_rules=None, max_errors=None):
+    """
+    Parse and validate a query, without going through the cache.
+
+    Returns:
+        tuple: (DocumentNode or None, list of errors).
+    """
+    try:
+        document = parse(query)
+    except Exception as e:
+        return None, [e]
+
+    errors = validate(graphql_schema, document, validation_rules, max_errors)
+    if errors:
+        return None, errors
+    return document, []
+
+
+def get_validated_document(cache, graphql_schema, query, validation_rules=None, max_errors=None):
+    """
+    Parse and validate a query, going through the document cache.
+
+    Only valid documents are cached, so a cached document never needs validating again.
+
+    Args:
+        cache (DocumentCache): The document cache.
+        graphql_schema (GraphQLSchema): The schema to validate against.
+        query (str): The query text.
+        validation_rules (list, optional): Extra validation rules.
+        max_errors (int, optional): Maximum number of validation errors to report.
+    Returns:
+        tuple: (DocumentNode or None, list of errors).
+    """
+    key = get_document_key(graphql_schema, hash_query(query))
+    document = cache.get(key)
+    if document is not None:
+        return document, []
+
+    document, errors = parse_and_validate(graphql_schema, query, validation_rules, max_errors)
+    if document is not None:
+        cache.set(key, document)
+    return document, errors
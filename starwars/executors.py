@@ -0,0 +1,114 @@
+# Django
+from django.conf import settings
+from django.db import connections
+
+# GraphQL
+from graphql import get_named_type, is_leaf_type
+
+# Pool
+from api.db_pool.pool import release_connections
+
+# Utils
+from asgiref.sync import sync_to_async
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+from threading import Lock
+
+
+executor_lock = Lock()
+orm_executor = None
+
+
+def get_orm_executor():
+    """
+    Get the thread pool running the database work of the async GraphQL view, created on first use.
+
+    The pool bounds the threads, hence the database connections, a worker process uses for async
+    requests, whatever the number of requests in flight: `GRAPHQL_ASYNC_ORM_WORKERS`.
+
+    Returns:
+        ThreadPoolExecutor: The pool, or None when `GRAPHQL_ASYNC_ORM_WORKERS` is 0.
+    """
+    global orm_executor
+    if orm_executor is None and settings.GRAPHQL_ASYNC_ORM_WORKERS > 0:
+        with executor_lock:
+            if orm_executor is None:
+                orm_executor = ThreadPoolExecutor(
+                    max_workers=settings.GRAPHQL_ASYNC_ORM_WORKERS, thread_name_prefix="orm"
+                )
+    return orm_executor
+
+def refresh_connections():
+    """
+    Replace the broken or obsolete database connections of the current thread, as
+    `close_old_connections` at the start of a request.
+
+    A `CONN_MAX_AGE` of 0 closes the connections of the request threads when their request ends
+    (the default of `api.asgi`), but the threads of the ORM pool outlive the requests: their
+    connections are kept open and only replaced when they are broken, instead of opening one
+    per resolver. Connections of the connection pool (`api.db_pool`) keep their max age.
+    """
+    for connection in connections.all(initialized_only=True):
+        if connection.settings_dict["CONN_MAX_AGE"] == 0 and not connection.settings_dict.get("POOL"):
+            connection.close_at = None
+        connection.close_if_unusable_or_obsolete()
+
+def with_connection(func):
+    """
+    Wrap a function run on the ORM pool: pool threads keep their own database connection, which
+    is replaced when it is broken or obsolete (see `refresh_connections`), as at the start of a request.
+    Connections of the connection pool (`api.db_pool`) are given back to it after each call.
+    """
+    @wraps(func)
+    def run(*args, **kwargs):
+        refresh_connections()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            release_connections()
+
+    return run
+
+def orm_to_async(func):
+    """
+    Make an awaitable of a function that queries the database, run on the ORM pool
+    (or in the sync thread of the request when the pool is disabled).
+
+    Args:
+        func (callable): The sync function.
+    Returns:
+        callable: The async function.
+    """
+    executor = get_orm_executor()
+    if executor is None:
+        return sync_to_async(func)
+    return sync_to_async(with_connection(func), thread_sensitive=False, executor=executor)
+
+def is_orm_field(info):
+    """
+    Return whether the resolver of a field may query the database: root fields, relations of
+    the Django node types and `totalCount`. Scalars of the nodes are read from the fetched rows,
+    and edges and page infos from the resolved connections, so they are resolved inline.
+    """
+    schema = info.schema
+    if info.parent_type in (schema.query_type, schema.mutation_type):
+        return True
+    if info.field_name == "totalCount":
+        return True
+
+    meta = getattr(getattr(info.parent_type, "graphene_type", None), "_meta", None)
+    return getattr(meta, "model", None) is not None and not is_leaf_type(get_named_type(info.return_type))
+
+
+class OrmExecutorMiddleware:
+    """
+    GraphQL middleware of the async view running the resolvers that may query the database
+    (`is_orm_field`) on the ORM pool. graphql-core awaits the sibling fields of an object and the
+    items of a list together, so they are resolved concurrently, and their DataLoader batches are
+    shared (see `starwars.schema.loaders.DataLoader`).
+    """
+
+    def resolve(self, next, root, info, **args):
+        if not is_orm_field(info):
+            return next(root, info, **args)
+        return orm_to_async(next)(root, info, **args)
@@ -0,0 +1,63 @@
+# Django
+from django.db import connections
+from django.db.models import F, Value
+from django.utils import timezone
+
+# Externals
+from simple_history.utils import get_history_model_for_model
+
+
+def get_value_field(field):
+    return field.target_field if field.is_relation else field
+
+
+def bulk_history_from_queryset(queryset, history_type, values=None):
+    """
+    Write the history rows of every row of a queryset with one `INSERT ... SELECT` statement,
+    without loading the rows in Python.
+
+    Args:
+        queryset (QuerySet): The rows to record.
+        history_type (str): "+" (created), "~" (changed) or "-" (deleted).
+        values (dict, optional): Field values recorded instead of the current ones, used to record
+            the state written by an `UPDATE` before running it.
+    Returns:
+        int: Number of history rows written.
+    """
+    model = queryset.model
+    history_model = get_history_model_for_model(model)
+    model_fields = {field.name: field for field in model._meta.concrete_fields}
+    values = values or {}
+    now = timezone.now()
+
+    columns, expressions = [], {}
+    for history_field in history_model._meta.concrete_fields:
+        name = history_field.name
+        if name == "history_id":
+            continue
+
+        if name == "history_date":
+            expression = Value(now, output_field=history_field)
+        elif name == "history_type":
+            expression = Value(history_type, output_field=history_field)
+        elif name in values:
+            value = getattr(values[name], "pk", values[name])
+            expression = Value(value, output_field=get_value_field(model_fields[name]))
+        elif name in model_fields:
+            expression = F(model_fields[name].attname)
+        else:
+            # history_user, history_change_reason
+            expression = Value(None, output_field=get_value_field(history_field))
+
+        columns.append(history_field.column)
+        expressions[f"history_{len(expressions)}"] = expression
+
+    select = queryset.order_by().values(**expressions)
+    connection = connections[queryset.db]
+    sql, params = select.query.get_compiler(queryset.db).as_sql()
+    table = connection.ops.quote_name(history_model._meta.db_table)
+    column_list = ", ".join(connection.ops.quote_name(column) for column in columns)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"INSERT INTO {table} ({column_list}) {sql}", params)
+        return cursor.rowcount
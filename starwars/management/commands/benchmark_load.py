@@ -0,0 +1,70 @@
+# Django
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+
+# Starwars
+from starwars.management.commands.swapi_server import add_server_arguments, get_server
+
+# Utils
+from io import StringIO
+import statistics
+import time
+
+
+class QueryCounter:
+    """
+    Database execute wrapper counting the queries, without recording them like `DEBUG` does.
+    """
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    """
+    Custom management command to benchmark `load_starwars_data` against the local SWAPI stand-in.
+
+    Each run loads the served data into the database and measures the wall time, the number of
+    HTTP requests answered by the server (by status) and the number of database queries. Runs are
+    rolled back unless `--keep` is given, so that every run starts from the same database.
+    """
+    help = "Measure the wall time, HTTP requests and DB queries of load_starwars_data on local data"
+
+    def add_arguments(self, parser):
+        add_server_arguments(parser)
+        parser.add_argument("--runs", type=int, default=3, help="Number of measured loads")
+        parser.add_argument("--sync", action="store_true", help="Benchmark `load_starwars_data --sync`")
+        parser.add_argument("--keep", action="store_true", help="Keep the data of the last run")
+
+    def handle(self, *args, **options):
+        with get_server(options).start() as server, override_settings(SWAPI_URL=server.url):
+            self.stdout.write(
+                f"SWAPI stand-in at {server.url}: latency={options['latency']}s "
+                f"error_rate={options['error_rate']} page_size={options['page_size']}"
+            )
+            times = []
+            for run in range(1, options["runs"] + 1):
+                server.requests.clear()
+                counter = QueryCounter()
+                with transaction.atomic(), connection.execute_wrapper(counter):
+                    start = time.perf_counter()
+                    call_command("load_starwars_data", sync=options["sync"], stdout=StringIO())
+                    times.append(time.perf_counter() - start)
+                    if not (options["keep"] and run == options["runs"]):
+                        transaction.set_rollback(True)
+
+                requests = " ".join(f"{status}={count}" for status, count in sorted(server.requests.items()))
+                self.stdout.write(
+                    f"run {run}: {times[-1]:.3f}s requests={sum(server.requests.values())} ({requests}) "
+                    f"queries={counter.count}"
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"median={statistics.median(times):.3f}s min={min(times):.3f}s max={max(times):.3f}s"
+        ))
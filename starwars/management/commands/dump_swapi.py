@@ -0,0 +1,26 @@
+# Django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+# Services
+from services.dumps import DUMP_FORMATS, write_dump
+
+
+class Command(BaseCommand):
+    """
+    Custom management command to write the Star Wars data of the database as SWAPI dumps.
+
+    The planets, films and people loaded from the SWAPI are written in its format, one
+    `<resource>.<format>` file each, to a directory or to a zip or tar archive depending on
+    the target name. The dump can be loaded back with `load_starwars_data --source`.
+    """
+    help = "Write the SWAPI data of the database as JSON or NDJSON dumps"
+
+    def add_arguments(self, parser):
+        parser.add_argument("target", help="Directory, or archive ending with .zip, .tar, .tar.gz...")
+        parser.add_argument("--format", choices=DUMP_FORMATS, default="ndjson", help="Format of the dump files")
+
+    def handle(self, *args, **options):
+        counts = write_dump(options["target"], options["format"], settings.SWAPI_BATCH_SIZE)
+        self.stdout.write(" ".join(f"{resource}={count}" for resource, count in counts.items()))
+        self.stdout.write(self.style.SUCCESS(f"Dump written to {options['target']}."))
@@ -0,0 +1,34 @@
+# Django
+from django.core.management.base import BaseCommand, CommandError
+
+# Services
+from services.bulk import can_copy
+from services.transfer import COPY_FORMATS, export_tables
+
+
+class Command(BaseCommand):
+    """
+    Custom management command to export the Star Wars tables with PostgreSQL `COPY`.
+
+    Planets, movies, characters and both through tables (and the `Historical*` tables with
+    `--history`) are streamed to one file per table, without building model instances, along
+    with a manifest read by `import_starwars`. All the tables are read from one snapshot.
+    """
+    help = "Export the Star Wars tables with COPY (PostgreSQL)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("target", help="Directory of the export")
+        parser.add_argument(
+            "--format", choices=COPY_FORMATS, default="binary",
+            help="COPY format: binary (fastest, same PostgreSQL major version) or csv (portable)",
+        )
+        parser.add_argument("--history", action="store_true", help="Also export the Historical* tables")
+
+    def handle(self, *args, **options):
+        if not can_copy():
+            raise CommandError("COPY is only available on PostgreSQL")
+
+        manifest = export_tables(options["target"], options["format"], options["history"])
+        for table in manifest["tables"]:
+            self.stdout.write(f"{table['table']}: {table['rows']} rows")
+        self.stdout.write(self.style.SUCCESS(f"Export written to {options['target']}."))
@@ -0,0 +1,59 @@
+# Django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+# Models
+from starwars.models import Planet, Movie, Character
+
+# Services
+from services.bulk import can_copy
+from services.generate import generate_starwars_data
+
+# Starwars
+from starwars.response_cache import response_cache
+
+# Utils
+import time
+
+
+class Command(BaseCommand):
+    """
+    Custom management command to generate a synthetic Star Wars dataset at production volume.
+
+    Rows are generated lazily and written in chunks of `--batch-size` rows, with `COPY` on
+    PostgreSQL (or `bulk_create` with `--method bulk` and on other databases), together with
+    their movie-planet and character-movie links. Generated rows have no SWAPI id, so they are
+    left alone by `load_starwars_data --sync`.
+    """
+    help = "Generate synthetic planets, movies and characters for load tests"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--planets", type=int, default=0, help="Number of planets to create")
+        parser.add_argument("--movies", type=int, default=0, help="Number of movies to create")
+        parser.add_argument("--characters", type=int, default=0, help="Number of characters to create")
+        parser.add_argument("--batch-size", type=int, default=10000, help="Rows per chunk")
+        parser.add_argument(
+            "--method", choices=("auto", "copy", "bulk"), default="auto",
+            help="Write with COPY (PostgreSQL) or bulk_create; auto uses COPY when available",
+        )
+        parser.add_argument("--seed", type=int, help="Seed of the generator, for reproducible datasets")
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        if options["method"] == "copy" and not can_copy():
+            raise CommandError("COPY is only available on PostgreSQL")
+        if options["characters"] and not (options["planets"] or Planet.objects.exists()):
+            self.stderr.write(self.style.WARNING("No planets: the characters will have no homeworld."))
+
+        use_copy = options["method"] == "copy" or (options["method"] == "auto" and can_copy())
+        start = time.perf_counter()
+        counts = generate_starwars_data(
+            options["planets"], options["movies"], options["characters"],
+            batch_size=options["batch_size"], use_copy=use_copy, seed=options["seed"],
+        )
+        response_cache.invalidate(Planet, Movie, Character)
+
+        self.stdout.write(" ".join(f"{name}={count}" for name, count in counts.items()))
+        self.stdout.write(self.style.SUCCESS(
+            f"Data generated with {'COPY' if use_copy else 'bulk_create'} in {time.perf_counter() - start:.1f}s."
+        ))
@@ -0,0 +1,43 @@
+# Django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+# Models
+from starwars.models import Planet, Movie, Character
+
+# Services
+from services.bulk import can_copy
+from services.transfer import TransferError, import_tables
+
+# Starwars
+from starwars.response_cache import response_cache
+
+
+class Command(BaseCommand):
+    """
+    Custom management command to import an export of `export_starwars` with PostgreSQL `COPY`.
+
+    The import runs in one transaction: secondary indexes and unique constraints are dropped
+    while the files are streamed in and rebuilt afterwards, foreign keys are checked at commit,
+    and the sequences are reset past the imported primary keys.
+    """
+    help = "Import an export of export_starwars with COPY (PostgreSQL)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("source", help="Directory of the export")
+        parser.add_argument("--truncate", action="store_true", help="Empty the tables before importing")
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        if not can_copy():
+            raise CommandError("COPY is only available on PostgreSQL")
+
+        try:
+            counts = import_tables(options["source"], options["truncate"])
+        except TransferError as e:
+            raise CommandError(e)
+        response_cache.invalidate(Planet, Movie, Character)
+
+        for table, rows in counts.items():
+            self.stdout.write(f"{table}: {rows} rows")
+        self.stdout.write(self.style.SUCCESS("Import done."))
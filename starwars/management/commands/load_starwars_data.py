@@ -1,52 +1,127 @@
 # Django
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
 from django.db import transaction
 
+# Models
+from starwars.models import Planet, Movie, Character
+
 # Services
-from services.populate import populate_planets, populate_movies, populate_characters
+from services.checkpoints import LoadProgress, get_load_states
+from services.dumps import RESOURCES, open_dump
+from services.populate import (
+    open_swapi, populate_planets, populate_movies, populate_characters,
+    sync_planets, sync_movies, sync_characters,
+)
+from services.scheduler import run_populate_stages
+
+# Starwars
+from starwars.response_cache import response_cache
 
 # Utils
+from contextlib import contextmanager
+from itertools import chain, islice
 from utils.logger import logger
 
 
+POPULATE = {"planets": populate_planets, "films": populate_movies, "people": populate_characters}
+SYNC = {"planets": sync_planets, "films": sync_movies, "people": sync_characters}
+
+
+@contextmanager
+def open_dump_pages(source, skip):
+    """
+    Open the dump files of `source` as streams of one-item pages, skipping the items already loaded.
+
+    Args:
+        source (str): The dump directory or archive.
+        skip (dict): Number of items to skip of each resource to read.
+    """
+    with open_dump(source) as streams:
+        yield {
+            resource: ([item] for item in islice(streams[resource], count, None)) for resource, count in skip.items()
+        }
+
+
 class Command(BaseCommand):
     """
     Custom management command to load Star Wars data into the database.
     
     This command performs the following operations in sequence:
-    1. Populates planets data
-    2. Populates movies data (including their relationships with planets)
-    3. Populates characters data (including their relationships with movies)
+    1. Opens concurrent streams over the planets, films and people of the SWAPI
+       (or over the dump files of `--source`)
+    2. Populates planets data
+    3. Populates movies data (including their relationships with planets)
+    4. Populates characters data (including their relationships with movies)
+
+    The load runs as a DAG of stages (see `services.scheduler`): the planets, films and people
+    are fetched at once by a worker pool, while each resource is written in chunks as its pages
+    arrive, once the resources it references are written. The timing of every stage is reported.
     
-    All operations are wrapped in a database transaction to ensure data consistency.
-    If any operation fails, all changes will be rolled back.
+    Every chunk is committed on its own, together with the progress of its resource in the
+    `LoadState` table, so that no transaction stays open for the whole crawl. A failed page
+    stops the load; `--resume` then continues each resource after its last committed page
+    and skips the resources already loaded.
+
+    Bulk inserts do not send model signals, so the cached GraphQL responses are
+    invalidated explicitly once the data is loaded.
+
+    With `--sync`, the database is synchronized with the SWAPI instead: new rows are inserted,
+    rows whose content hash changed are updated (with their history and links), unchanged rows
+    are left untouched and rows missing from the SWAPI are deleted. A sync runs in a single
+    transaction, as it needs every item to find the deleted rows: a page that cannot be
+    fetched aborts and rolls it back, so that no row is deleted because of partial data.
+
+    With `--source`, the data is read from a directory or archive of SWAPI dumps (as written
+    by `dump_swapi`) instead of the SWAPI, for environments without access to it.
     """
     help = "Load data from Star Wars API (SWAPI) into the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sync",
+            action="store_true",
+            help="Upsert changed rows and delete rows missing from the SWAPI instead of only adding new rows",
+        )
+        parser.add_argument(
+            "--source",
+            help="Directory or archive (zip, tar) of planets, films and people JSON or NDJSON dumps to load instead",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Continue an interrupted load after its last committed page",
+        )
     
-    @transaction.atomic
     def handle(self, *args, **options):
         """
         Execute the command to load Star Wars data.
         
         The method performs the following steps:
-        1. Logs the start of the data loading process
+        1. Logs the start of the data loading process and opens the SWAPI streams or the dump files
         2. Populates planets data
         3. Populates movies data (with relationships)
         4. Populates characters data (with relationships)
-        5. Logs successful completion
+           (or synchronizes the three models with `--sync`, reporting their counts)
+        5. Invalidates the cached GraphQL responses
+        6. Logs successful completion
         
         In case of any exception during the process:
         - Logs the error with full traceback
         - Outputs the error to stderr
-        - Re-raises the exception to trigger transaction rollback
+        - Re-raises the exception (the committed chunks are kept for `--resume`,
+          a sync is rolled back)
         """
+        if options["sync"] and options["resume"]:
+            raise CommandError("--resume cannot be combined with --sync, which runs in a single transaction")
+
         try:
             logger.info("Starting Star Wars data load...")
-            
 
-            populate_planets()
-            populate_movies()
-            populate_characters()
+            if options["sync"]:
+                self.sync(options["source"])
+            else:
+                self.load(options["source"], options["resume"])
             
             logger.info("Star Wars data loaded successfully.")
             self.stdout.write(self.style.SUCCESS("Data loaded successfully."))
@@ -54,3 +129,46 @@ class Command(BaseCommand):
             logger.error(f"Error loading data: {e}", exc_info=True)
             self.stderr.write(self.style.ERROR(f"Error loading data: {e}"))
             raise
+        finally:
+            response_cache.invalidate(Planet, Movie, Character)
+
+    def load(self, source, resume):
+        """
+        Load the resources not loaded yet, chunk by chunk, with a checkpoint per committed chunk.
+        """
+        states = get_load_states(RESOURCES, source or settings.SWAPI_URL, resume)
+        pending = {resource: state for resource, state in states.items() if not state.completed}
+
+        def write(resource, pages):
+            progress = LoadProgress(pending[resource], pages)
+            POPULATE[resource](iter(progress), checkpoint=progress.save)
+            progress.complete()
+
+        if source:
+            streams = open_dump_pages(source, {resource: state.pages for resource, state in pending.items()})
+        else:
+            start_pages = {resource: (state.pages + 1, state.page_size) for resource, state in pending.items()}
+            streams = open_swapi(tuple(pending), strict=True, start_pages=start_pages)
+
+        with streams as pages:
+            self.report(run_populate_stages(pages, write, fetch=not source))
+
+    @transaction.atomic
+    def sync(self, source):
+        counts = {}
+
+        def write(resource, pages):
+            counts[resource] = SYNC[resource](chain.from_iterable(pages))
+
+        streams = open_dump_pages(source, dict.fromkeys(RESOURCES, 0)) if source else open_swapi(strict=True)
+        with streams as pages:
+            timings = run_populate_stages(pages, write, fetch=not source)
+
+        for resource in RESOURCES:
+            self.stdout.write(f"{resource}: " + " ".join(f"{key}={value}" for key, value in counts[resource].items()))
+        self.report(timings)
+
+    def report(self, timings):
+        for name, (start, end) in timings.items():
+            self.stdout.write(f"{name:<16} start={start:8.3f}s duration={end - start:8.3f}s")
+        self.stdout.write(f"{'total':<16} {max((end for _, end in timings.values()), default=0):.3f}s")
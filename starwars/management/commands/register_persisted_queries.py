@@ -0,0 +1,42 @@
+# Django
+from django.core.management.base import BaseCommand, CommandError
+
+# Starwars
+from starwars.documents import hash_query, parse_and_validate
+from starwars.persisted_queries import get_query_store
+from starwars.schema import schema
+
+# Utils
+from utils.logger import logger
+
+
+class Command(BaseCommand):
+    """
+    Custom management command to register GraphQL documents as persisted queries.
+
+    Each file holds one document. Documents are validated against the schema before being
+    added to the registry configured by `GRAPHQL_PERSISTED_QUERIES_STORE`, which is how
+    operations are allowed when `GRAPHQL_PERSISTED_QUERIES_ALLOWLIST` is enabled.
+    """
+    help = "Register GraphQL documents (.graphql files) as persisted queries"
+
+    def add_arguments(self, parser):
+        parser.add_argument("files", nargs="+", help="Paths of .graphql files, one document per file")
+
+    def handle(self, *args, **options):
+        store = get_query_store()
+
+        for path in options["files"]:
+            with open(path) as file:
+                query = file.read()
+
+            document, errors = parse_and_validate(schema.graphql_schema, query)
+            if errors:
+                raise CommandError(f"{path}: {'; '.join(str(error) for error in errors)}")
+
+            query_hash = hash_query(query)
+            store.add(query_hash, query)
+            logger.info(f"Persisted query {query_hash} registered from {path}.")
+            self.stdout.write(f"{query_hash}  {path}")
+
+        self.stdout.write(self.style.SUCCESS(f"{len(options['files'])} persisted queries registered."))
@@ -0,0 +1,35 @@
+# Django
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError
+
+# Routers
+from api.routers import measure_lag
+
+
+class Command(BaseCommand):
+    """
+    Custom management command to measure the replication lag of the read replicas.
+
+    Replicas lagging more than `DATABASE_REPLICA_MAX_LAG` seconds, or unreachable, are
+    skipped by the router until they catch up.
+    """
+    help = "Show the replication lag of the read replicas"
+
+    def handle(self, *args, **options):
+        if not settings.DATABASE_REPLICAS:
+            self.stdout.write("No read replicas configured (POSTGRES_REPLICA_URLS).")
+            return
+
+        for alias in settings.DATABASE_REPLICAS:
+            try:
+                lag = measure_lag(alias)
+            except DatabaseError as e:
+                self.stdout.write(self.style.ERROR(f"{alias}: unreachable ({e})"))
+                continue
+
+            line = f"{alias}: lag={lag:.3f}s"
+            if lag > settings.DATABASE_REPLICA_MAX_LAG:
+                self.stdout.write(self.style.WARNING(f"{line} (skipped, over {settings.DATABASE_REPLICA_MAX_LAG}s)"))
+            else:
+                self.stdout.write(self.style.SUCCESS(line))
@@ -0,0 +1,38 @@
+# Django
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management.base import BaseCommand
+
+# Models
+from starwars.models import Planet, Movie, Character
+
+# Starwars
+from starwars.response_cache import response_cache
+
+
+class Command(BaseCommand):
+    """
+    Custom management command to report the counters of the GraphQL response cache.
+
+    Hits and misses are counted in the Django cache, so they cover every worker sharing it
+    (only this process with the local-memory cache); invalidations are the tag versions kept in
+    the database. With `--invalidate`, every cached response is invalidated (e.g. after editing
+    rows outside the ORM).
+    """
+    help = "Show the hit rate and invalidation count of the GraphQL response cache"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--invalidate", action="store_true", help="Invalidate every cached response")
+
+    def handle(self, *args, **options):
+        if options["invalidate"]:
+            response_cache.invalidate(Planet, Movie, Character)
+            self.stdout.write(self.style.SUCCESS("Cached responses invalidated."))
+
+        if isinstance(response_cache.cache, LocMemCache):
+            self.stderr.write(self.style.WARNING("The local-memory cache is per process: server hits are not counted."))
+
+        stats = response_cache.stats()
+        self.stdout.write(
+            f"hits={stats['hits']} misses={stats['misses']} hit_rate={stats['hit_rate']:.2%} "
+            f"invalidations={stats['invalidations']}"
+        )
@@ -0,0 +1,52 @@
+# Django
+from django.core.management.base import BaseCommand
+
+# Services
+from services.swapi_server import SwapiData, SwapiServer
+
+
+def add_server_arguments(parser):
+    parser.add_argument("--source", help="Directory or archive of SWAPI dumps to serve instead of generated data")
+    parser.add_argument("--planets", type=int, default=60, help="Number of generated planets")
+    parser.add_argument("--films", type=int, default=6, help="Number of generated films")
+    parser.add_argument("--people", type=int, default=82, help="Number of generated people")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds slept before answering each request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 500")
+    parser.add_argument("--page-size", type=int, default=10, help="Items per page")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated data and injected errors")
+
+
+def get_server(options, host="127.0.0.1", port=0):
+    if options["source"]:
+        data = SwapiData.from_dump(options["source"])
+    else:
+        data = SwapiData.generate(options["planets"], options["films"], options["people"], options["seed"])
+    return SwapiServer(
+        data, host, port, latency=options["latency"], error_rate=options["error_rate"],
+        page_size=options["page_size"], seed=options["seed"],
+    )
+
+
+class Command(BaseCommand):
+    """
+    Custom management command to run a local stand-in of the SWAPI.
+
+    The `planets/`, `films/` and `people/` endpoints are served paginated like the SWAPI,
+    from dump files or generated data, with configurable latency, error rate and page size.
+    Point the loader at it with `SWAPI_URL=http://127.0.0.1:8001/api/`.
+    """
+    help = "Serve SWAPI-shaped endpoints locally, with latency and fault injection"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on")
+        parser.add_argument("--port", type=int, default=8001, help="Port to listen on")
+        add_server_arguments(parser)
+
+    def handle(self, *args, **options):
+        with get_server(options, options["host"], options["port"]) as server:
+            self.stdout.write(f"Serving the SWAPI stand-in at {server.url} (Ctrl+C to stop)")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            self.stdout.write(" ".join(f"{status}={count}" for status, count in sorted(server.requests.items())))
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.23 on 2026-10-17 22:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("starwars", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="movie",
+            index=models.Index(
+                fields=["episode_id", "id"], name="movie_episode_id_keyset_idx"
+            ),
+        ),
+    ]
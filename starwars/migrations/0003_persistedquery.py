@@ -0,0 +1,34 @@
+# Generated by Django 4.2.23 on 2026-10-17 22:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("starwars", "0002_movie_episode_id_keyset_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="PersistedQuery",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("sha256_hash", models.CharField(max_length=64, unique=True)),
+                ("query", models.TextField()),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.2.23 on 2026-10-17 23:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("starwars", "0003_persistedquery"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="character",
+            name="unique_swapi_id_not_null_in_character",
+        ),
+        migrations.RemoveConstraint(
+            model_name="movie",
+            name="unique_swapi_id_not_null_in_movie",
+        ),
+        migrations.RemoveConstraint(
+            model_name="planet",
+            name="unique_swapi_id_not_null_in_planet",
+        ),
+        migrations.AddField(
+            model_name="character",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="historicalcharacter",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="historicalmovie",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="historicalplanet",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="movie",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name="planet",
+            name="content_hash",
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddConstraint(
+            model_name="character",
+            constraint=models.UniqueConstraint(
+                fields=("swapi_id",), name="unique_swapi_id_in_character"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="movie",
+            constraint=models.UniqueConstraint(
+                fields=("swapi_id",), name="unique_swapi_id_in_movie"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="planet",
+            constraint=models.UniqueConstraint(
+                fields=("swapi_id",), name="unique_swapi_id_in_planet"
+            ),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.23 on 2026-10-17 23:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("starwars", "0004_swapi_content_hash"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LoadState",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("resource", models.CharField(max_length=20, unique=True)),
+                ("source", models.CharField(max_length=255)),
+                ("pages", models.IntegerField(default=0)),
+                ("page_size", models.IntegerField(null=True)),
+                ("items", models.IntegerField(default=0)),
+                ("completed", models.BooleanField(default=False)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+    ]
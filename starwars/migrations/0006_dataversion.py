@@ -0,0 +1,42 @@
+# Generated by Django 4.2.23 on 2026-10-17 23:46
+
+from django.db import migrations, models
+
+
+def create_versions(apps, schema_editor):
+    # One row per model tagged by the response cache, so that bumping a version is a single UPDATE
+    DataVersion = apps.get_model("starwars", "DataVersion")
+    for model in ("starwars.planet", "starwars.movie", "starwars.character"):
+        DataVersion.objects.get_or_create(model=model)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("starwars", "0005_loadstate"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DataVersion",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("model", models.CharField(max_length=100, unique=True)),
+                ("version", models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                "abstract": False,
+            },
+        ),
+        migrations.RunPython(create_versions, migrations.RunPython.noop),
+    ]
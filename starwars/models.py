@@ -16,6 +16,7 @@ class BaseModel(models.Model):
 class Planet(BaseModel):
     # Fields
     swapi_id = models.IntegerField(null=True)
+    content_hash = models.CharField(max_length=64, blank=True)
     name = models.CharField(max_length=100)
     climate = models.CharField(max_length=100, blank=True)
     terrain = models.CharField(max_length=100, blank=True)
@@ -30,11 +31,8 @@ class Planet(BaseModel):
 
     class Meta:
         constraints = [
-            models.UniqueConstraint(
-                fields=['swapi_id'],
-                name='unique_swapi_id_not_null_in_planet',
-                condition=~models.Q(swapi_id=None),
-            ),
+            # Not partial so it can be the conflict target of upserts (NULLs never conflict)
+            models.UniqueConstraint(fields=['swapi_id'], name='unique_swapi_id_in_planet'),
         ]
     def __str__(self):
         return self.name
@@ -43,6 +41,7 @@ class Planet(BaseModel):
 class Movie(BaseModel):
     # Fields
     swapi_id = models.IntegerField(null=True)
+    content_hash = models.CharField(max_length=64, blank=True)
     title = models.CharField(max_length=100)
     episode_id = models.IntegerField()
     opening_crawl = models.TextField()
@@ -59,11 +58,12 @@ class Movie(BaseModel):
 
     class Meta:
         constraints = [
-            models.UniqueConstraint(
-                fields=['swapi_id'],
-                name='unique_swapi_id_not_null_in_movie',
-                condition=~models.Q(swapi_id=None),
-            ),
+            # Not partial so it can be the conflict target of upserts (NULLs never conflict)
+            models.UniqueConstraint(fields=['swapi_id'], name='unique_swapi_id_in_movie'),
+        ]
+        indexes = [
+            # Keyset pagination of `allMovies`
+            models.Index(fields=['episode_id', 'id'], name='movie_episode_id_keyset_idx'),
         ]
 
     def __str__(self):
@@ -73,6 +73,7 @@ class Movie(BaseModel):
 class Character(BaseModel):
     # Fields
     swapi_id = models.IntegerField(null=True)
+    content_hash = models.CharField(max_length=64, blank=True)
     name = models.CharField(max_length=100)
     birth_year = models.CharField(max_length=10, blank=True)
     species = models.CharField(max_length=50, blank=True)
@@ -93,12 +94,48 @@ class Character(BaseModel):
 
     class Meta:
         constraints = [
-            models.UniqueConstraint(
-                fields=['swapi_id'],
-                name='unique_swapi_id_not_null_in_character',
-                condition=~models.Q(swapi_id=None),
-            ),
+            # Not partial so it can be the conflict target of upserts (NULLs never conflict)
+            models.UniqueConstraint(fields=['swapi_id'], name='unique_swapi_id_in_character'),
         ]
 
     def __str__(self):
         return self.name
+
+
+class PersistedQuery(BaseModel):
+    # Fields
+    sha256_hash = models.CharField(max_length=64, unique=True)
+    query = models.TextField()
+
+    def __str__(self):
+        return self.sha256_hash
+
+
+class LoadState(BaseModel):
+    """
+    Progress of `load_starwars_data` on a resource, saved with every committed chunk
+    so that an interrupted load can be resumed with `--resume`.
+    """
+    # Fields
+    resource = models.CharField(max_length=20, unique=True)
+    source = models.CharField(max_length=255)
+    pages = models.IntegerField(default=0)
+    page_size = models.IntegerField(null=True)
+    items = models.IntegerField(default=0)
+    completed = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.resource}: {self.pages} pages"
+
+
+class DataVersion(BaseModel):
+    """
+    Version of the rows of a model, bumped on every write to them (see `starwars.response_cache`).
+    Kept in the database so that every process, the management commands included, shares it.
+    """
+    # Fields
+    model = models.CharField(max_length=100, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.model}: {self.version}"
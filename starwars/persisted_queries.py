@@ -0,0 +1,152 @@
+# Django
+from django.conf import settings
+
+# GraphQL
+from graphql import GraphQLError
+
+# Models
+from starwars.models import PersistedQuery
+
+# Utils
+from pathlib import Path
+from threading import Lock
+import fcntl
+import json
+import os
+import re
+
+
+PERSISTED_QUERY_NOT_FOUND = "PERSISTED_QUERY_NOT_FOUND"
+PERSISTED_QUERY_NOT_SUPPORTED = "PERSISTED_QUERY_NOT_SUPPORTED"
+PERSISTED_QUERY_NOT_ALLOWED = "PERSISTED_QUERY_NOT_ALLOWED"
+PERSISTED_QUERY_HASH_MISMATCH = "PERSISTED_QUERY_HASH_MISMATCH"
+
+SHA256_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+class PersistedQueryError(GraphQLError):
+    """
+    Error of the persisted queries protocol, reported with its `code` in the error extensions.
+    """
+
+    def __init__(self, message, code):
+        super().__init__(message, extensions={"code": code})
+
+
+class DatabaseQueryStore:
+    """
+    Registry of persisted queries stored in the `PersistedQuery` table.
+    """
+
+    def get(self, query_hash):
+        return PersistedQuery.objects.filter(sha256_hash=query_hash).values_list("query", flat=True).first()
+
+    def add(self, query_hash, query):
+        PersistedQuery.objects.get_or_create(sha256_hash=query_hash, defaults={"query": query})
+
+
+class FileQueryStore:
+    """
+    Registry of persisted queries stored in a local JSON file mapping hashes to query texts,
+    shared by the worker processes and the `register_persisted_queries` command.
+
+    - The file is cached, and read again only when it changed on disk (its mtime or size).
+    - Registrations merge into the current file under an exclusive lock (`<file>.lock`)
+      and replace it atomically, so concurrent writers do not drop each other's hashes.
+
+    Args:
+        - path (str): Path of the JSON file.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(f"{self.path.name}.lock")
+        self._queries = {}
+        self._version = None
+        self._lock = Lock()
+
+    def _stat(self):
+        try:
+            stat = self.path.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read(self):
+        version = self._stat()
+        queries = json.loads(self.path.read_text()) if version is not None else {}
+        with self._lock:
+            self._queries, self._version = queries, version
+        return queries
+
+    def get(self, query_hash):
+        queries = self._queries
+        if self._stat() != self._version:
+            queries = self._read()
+        return queries.get(query_hash)
+
+    def add(self, query_hash, query):
+        with open(self.lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            queries = self._read()
+            if query_hash in queries:
+                return
+
+            queries = {**queries, query_hash: query}
+            tmp_path = self.path.with_name(f"{self.path.name}.{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(queries, indent=2, sort_keys=True))
+            os.replace(tmp_path, self.path)
+            self._read()
+
+
+_file_stores = {}
+
+
+def get_query_store():
+    """
+    Get the registry configured by `GRAPHQL_PERSISTED_QUERIES_STORE` ("database" or "file").
+
+    Returns:
+        DatabaseQueryStore or FileQueryStore: The registry.
+    """
+    if settings.GRAPHQL_PERSISTED_QUERIES_STORE == "file":
+        path = str(settings.GRAPHQL_PERSISTED_QUERIES_FILE)
+        if path not in _file_stores:
+            _file_stores[path] = FileQueryStore(path)
+        return _file_stores[path]
+    return DatabaseQueryStore()
+
+
+def get_persisted_query_hash(request, data):
+    """
+    Get the `sha256Hash` of the `persistedQuery` extension of a request, if any.
+
+    Args:
+        request (HttpRequest): The request (the extensions may come from its query string).
+        data (dict): The parsed body of the request.
+    Returns:
+        str: The hash, or None if the request does not use persisted queries.
+    Raises:
+        - PersistedQueryError: If the extension is malformed or of an unsupported version.
+    """
+    extensions = data.get("extensions") or request.GET.get("extensions")
+    if not extensions:
+        return None
+
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except ValueError:
+            raise PersistedQueryError("Extensions must be a JSON object", PERSISTED_QUERY_NOT_SUPPORTED)
+
+    persisted_query = extensions.get("persistedQuery") if isinstance(extensions, dict) else None
+    if not persisted_query:
+        return None
+
+    if persisted_query.get("version") != 1:
+        raise PersistedQueryError("Unsupported persisted query version", PERSISTED_QUERY_NOT_SUPPORTED)
+
+    query_hash = str(persisted_query.get("sha256Hash", "")).lower()
+    if not SHA256_PATTERN.match(query_hash):
+        raise PersistedQueryError("Invalid persisted query hash", PERSISTED_QUERY_NOT_SUPPORTED)
+    return query_hash
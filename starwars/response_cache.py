@@ -0,0 +1,213 @@
+# Django
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+# GraphQL
+from graphql import FieldNode, FragmentDefinitionNode, FragmentSpreadNode, get_named_type, print_ast
+
+# Models
+from starwars.models import DataVersion
+
+# Starwars
+from starwars.documents import get_schema_version
+
+# Utils
+import hashlib
+import json
+
+
+KEY_PREFIX = "graphql:response"
+STATS = ("hits", "misses")
+
+
+def get_model_tag(model):
+    return f"{KEY_PREFIX}:tag:{model._meta.label_lower}"
+
+
+def get_graphene_model(graphene_type):
+    """
+    Get the model of a Django object type, or of the nodes of a connection
+    (so `planets { totalCount }` is tagged with `Planet`).
+    """
+    meta = getattr(graphene_type, "_meta", None)
+    node = getattr(meta, "node", None)
+    if node is not None:
+        meta = getattr(node, "_meta", None)
+    return getattr(meta, "model", None)
+
+
+def get_document_models(schema, document, operation):
+    """
+    Collect the Django models whose rows an operation may read.
+
+    Args:
+        schema (GraphQLSchema): The schema.
+        document (DocumentNode): The document.
+        operation (OperationDefinitionNode): The operation.
+    Returns:
+        set: Model classes backing the object types selected by the operation.
+    """
+    fragments = {
+        definition.name.value: definition
+        for definition in document.definitions
+        if isinstance(definition, FragmentDefinitionNode)
+    }
+    models = set()
+
+    def walk(parent_type, selection_set):
+        for selection in selection_set.selections:
+            if not isinstance(selection, FieldNode):
+                fragment = fragments[selection.name.value] if isinstance(selection, FragmentSpreadNode) else selection
+                fragment_type = parent_type
+                if fragment.type_condition is not None:
+                    fragment_type = schema.get_type(fragment.type_condition.name.value)
+                walk(fragment_type, fragment.selection_set)
+                continue
+
+            name = selection.name.value
+            if name.startswith("__") or selection.selection_set is None:
+                continue
+
+            field_type = get_named_type(parent_type.fields[name].type)
+            model = get_graphene_model(getattr(field_type, "graphene_type", None))
+            if model is not None:
+                models.add(model)
+            if hasattr(field_type, "fields"):
+                walk(field_type, selection.selection_set)
+
+    walk(schema.get_root_type(operation.operation), operation.selection_set)
+    return models
+
+
+class ResponseCache:
+    """
+    Cache of full GraphQL responses, stored in the Django cache `GRAPHQL_RESPONSE_CACHE_ALIAS`.
+
+    Responses are keyed by the normalized document, the variables and the operation name, and
+    tagged with the models they read. Every tag holds a version number that is bumped when a row
+    of its model changes (see `starwars.signals`), and a cached response is only served while the
+    versions it was stored with are current.
+
+    - The versions are rows of `DataVersion`, so the writes of every process (other workers,
+      management commands) invalidate the responses of every worker, whatever the cache backend.
+    - Hits and misses are counted in the cache: per process with the local-memory cache.
+    """
+
+    @property
+    def cache(self):
+        return caches[settings.GRAPHQL_RESPONSE_CACHE_ALIAS]
+
+    @property
+    def enabled(self):
+        return settings.GRAPHQL_RESPONSE_CACHE_TIMEOUT > 0
+
+    def get_key(self, schema, document, operation_name, variables):
+        """
+        Build the cache key of a response.
+
+        Args:
+            schema (GraphQLSchema): The schema.
+            document (DocumentNode): The document, normalized by printing it.
+            operation_name (str): The operation name.
+            variables (dict): The variables.
+        Returns:
+            str: The key.
+        """
+        payload = json.dumps(
+            [get_schema_version(schema), print_ast(document), operation_name, variables or {}],
+            sort_keys=True,
+            default=str,
+        )
+        return f"{KEY_PREFIX}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+    def read_versions(self, models):
+        """
+        Get the current versions of the tags of some models, and when they were last bumped.
+
+        Args:
+            models (set): The models.
+        Returns:
+            tuple: (version of the tag of each model, 0 for a model never written;
+            time of the last write to one of the models, or None).
+        """
+        if not models:
+            return {}, None
+        labels = {model._meta.label_lower: get_model_tag(model) for model in models}
+        rows = DataVersion.objects.filter(model__in=labels).values_list("model", "version", "updated_at")
+        versions = {label: version for label, version, _ in rows}
+        changed_at = max((updated_at for _, version, updated_at in rows if version), default=None)
+        return {tag: versions.get(label, 0) for label, tag in labels.items()}, changed_at
+
+    def get_versions(self, models):
+        return self.read_versions(models)[0]
+
+    def get(self, key, versions):
+        """
+        Get a cached response, if it was stored with the current versions of its models.
+
+        Args:
+            key (str): The cache key of the response.
+            versions (dict): The current tag versions of the models read by the response.
+        Returns:
+            The response data, or None.
+        """
+        entry = self.cache.get(key)
+        if entry is None or entry["versions"] != versions:
+            self._count("misses")
+            return None
+
+        self._count("hits")
+        return entry["data"]
+
+    def set(self, key, versions, data):
+        """
+        Store a response with the tag versions read before it was executed, so a write
+        that happens during the execution invalidates it.
+        """
+        self.cache.set(key, {"versions": versions, "data": data}, settings.GRAPHQL_RESPONSE_CACHE_TIMEOUT)
+
+    def invalidate(self, *models):
+        """
+        Invalidate every cached response that read one of the given models, once the current
+        transaction commits: a response executed before the commit reads the former rows,
+        so it must not be stored under the new versions.
+        """
+        labels = [model._meta.label_lower for model in models]
+        transaction.on_commit(lambda: [self._bump(label) for label in labels])
+
+    def stats(self):
+        """
+        Get the counters of the cache.
+
+        Returns:
+            dict: hits, misses, hit rate and invalidations (the sum of the tag versions).
+        """
+        counters = self.cache.get_many([f"{KEY_PREFIX}:stats:{name}" for name in STATS])
+        stats = {name: counters.get(f"{KEY_PREFIX}:stats:{name}", 0) for name in STATS}
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["invalidations"] = DataVersion.objects.aggregate(total=Sum("version"))["total"] or 0
+        return stats
+
+    def _bump(self, label):
+        versions = DataVersion.objects.filter(model=label)
+        if not versions.update(version=F("version") + 1, updated_at=timezone.now()):
+            DataVersion.objects.get_or_create(model=label)
+            versions.update(version=F("version") + 1, updated_at=timezone.now())
+
+    def _count(self, name):
+        self._incr(f"{KEY_PREFIX}:stats:{name}")
+
+    def _incr(self, key):
+        # Counters never expire
+        if not self.cache.add(key, 1, timeout=None):
+            try:
+                self.cache.incr(key)
+            except ValueError:
+                self.cache.set(key, 1, timeout=None)
+
+
+response_cache = ResponseCache()
@@ -0,0 +1,159 @@
+# Django
+from django.db.models.query import QuerySet
+
+# Graphene
+from graphene.relay import PageInfo
+from graphene_django.filter import DjangoFilterConnectionField
+
+# GraphQL
+from graphql import GraphQLError
+
+# Schema
+from starwars.schema.loaders import get_loaders
+from starwars.schema.optimizer import optimize_queryset, prefetch_attr
+from starwars.schema.pagination import decode_keyset_cursor, is_offset_cursor, keyset_cursor, keyset_filter
+
+# Utils
+from functools import partial
+
+
+class BatchedConnectionField(DjangoFilterConnectionField):
+    """
+    DjangoFilterConnectionField that cooperates with the query optimizer and the request DataLoaders.
+
+    - Querysets are optimized after the selection set (`select_related`, `prefetch_related`, `only`).
+    - Rows prefetched by the optimizer for this field are paginated as they are.
+    - Lists already resolved by a DataLoader are paginated as they are, unless
+      filter arguments are given, in which case they are filtered in the database.
+    - Every page of nodes is primed on the loaders so that the relations of all
+      the nodes in the page are fetched with one query per relation.
+
+    Args:
+        - ordering (tuple, optional): Fields to order the queryset by (`-field` for descending),
+          `pk` being added as tie-breaker.
+    """
+
+    def __init__(self, *args, ordering=None, **kwargs):
+        self.ordering = ordering
+        super().__init__(*args, **kwargs)
+
+    def filter_queryset(self, queryset, info, args):
+        """
+        Apply the filter arguments of this field to a queryset.
+
+        Args:
+            queryset (QuerySet): The queryset to filter.
+            info (ResolveInfo): GraphQL resolve info.
+            args (dict): Arguments of the field.
+        Returns:
+            QuerySet: The filtered queryset.
+        """
+        return DjangoFilterConnectionField.resolve_queryset(
+            self.connection_type, queryset, info, args,
+            filtering_args=self.filtering_args, filterset_class=self.filterset_class
+        )
+
+    def get_queryset_resolver(self):
+        return partial(super().get_queryset_resolver(), ordering=self.ordering)
+
+    @classmethod
+    def resolve_queryset(cls, connection, iterable, info, args, filtering_args, filterset_class, ordering=None):
+        if isinstance(iterable, list):
+            if not any(args.get(name) is not None for name in filtering_args):
+                return iterable
+
+            model = connection._meta.node._meta.model
+            iterable = model.objects.filter(pk__in=[instance.pk for instance in iterable])
+
+        queryset = super().resolve_queryset(
+            connection, iterable, info, args, filtering_args=filtering_args, filterset_class=filterset_class
+        )
+        if ordering is not None:
+            queryset = queryset.order_by(*ordering, "pk")
+        return optimize_queryset(queryset, info, required=[key.lstrip("-") for key in ordering or ()])
+
+    @classmethod
+    def connection_resolver(cls, resolver, connection, default_manager, queryset_resolver, max_limit,
+                            enforce_first_or_last, root, info, **args):
+        # Rows prefetched by the optimizer are already filtered
+        prefetched = getattr(root, prefetch_attr(info.path.key), None)
+        if prefetched is not None:
+            resolver = lambda root, info, **args: prefetched  # noqa: E731
+            queryset_resolver = lambda connection, iterable, info, args: iterable  # noqa: E731
+
+        resolved = super().connection_resolver(
+            resolver, connection, default_manager, queryset_resolver, max_limit, enforce_first_or_last,
+            root, info, **args
+        )
+
+        get_loaders(info).prime(edge.node for edge in resolved.edges)
+        return resolved
+
+
+class KeysetConnectionField(BatchedConnectionField):
+    """
+    BatchedConnectionField paginated by keyset instead of offset.
+
+    Cursors encode the values of the ordering keys of the row (`ordering` plus `pk`),
+    and `after`/`before` become range predicates on those keys, so every page costs
+    one indexed query whatever its depth and no `COUNT(*)` is run unless `totalCount`
+    is selected. The `offset` argument and cursors issued by the offset pagination
+    keep working through the offset pagination.
+    """
+
+    def __init__(self, *args, ordering=(), **kwargs):
+        super().__init__(*args, ordering=ordering, **kwargs)
+
+    @classmethod
+    def resolve_connection(cls, connection, args, iterable, max_limit=None):
+        for name in ("first", "last"):
+            if args.get(name) is not None and args[name] < 0:
+                raise GraphQLError(f"Argument '{name}' must be a non-negative integer.")
+
+        if (
+            not isinstance(iterable, QuerySet)
+            or args.get("offset") is not None
+            or is_offset_cursor(args.get("after"))
+            or is_offset_cursor(args.get("before"))
+        ):
+            return super().resolve_connection(connection, args, iterable, max_limit=max_limit)
+
+        keys = tuple(iterable.query.order_by)
+        first, last = args.get("first"), args.get("last")
+        after, before = args.get("after"), args.get("before")
+        if max_limit is not None and first is None and last is None:
+            first = max_limit
+
+        queryset = iterable
+        if after:
+            queryset = queryset.filter(keyset_filter(keys, decode_keyset_cursor(after, keys)))
+        if before:
+            queryset = queryset.filter(keyset_filter(keys, decode_keyset_cursor(before, keys), forward=False))
+
+        if first is None and last is not None:
+            # Walk backwards from `before` (or the end) and restore the order
+            rows = list(queryset.reverse()[:last + 1])
+            has_previous_page = len(rows) > last
+            rows = rows[:last][::-1]
+            has_next_page = bool(before)
+        else:
+            rows = list(queryset[:first + 1]) if first is not None else list(queryset)
+            has_next_page = first is not None and len(rows) > first
+            rows = rows[:first] if first is not None else rows
+            has_previous_page = bool(after)
+            if last is not None and len(rows) > last:
+                rows = rows[-last:]
+                has_previous_page = True
+
+        edges = [connection.Edge(node=row, cursor=keyset_cursor(row, keys)) for row in rows]
+        resolved = connection(
+            edges=edges,
+            page_info=PageInfo(
+                start_cursor=edges[0].cursor if edges else None,
+                end_cursor=edges[-1].cursor if edges else None,
+                has_previous_page=has_previous_page,
+                has_next_page=has_next_page,
+            ),
+        )
+        resolved.iterable = iterable
+        return resolved
@@ -0,0 +1,134 @@
+# Django
+from django.core.exceptions import ValidationError
+from django.db.models.signals import m2m_changed
+
+# GraphQL
+from graphql import GraphQLError
+from graphql_relay import from_global_id
+
+
+INVALID_ID = "INVALID_ID"
+
+
+class InvalidGlobalIdError(GraphQLError):
+    """
+    Error raised when global IDs do not decode to an existing node of the expected type.
+    Every invalid ID of the request is listed in the `invalidIds` extension.
+    """
+
+    def __init__(self, invalid_ids):
+        super().__init__(
+            f"Invalid IDs: {', '.join(invalid_ids)}",
+            extensions={"code": INVALID_ID, "invalidIds": list(invalid_ids)},
+        )
+
+
+class GlobalIdResolver:
+    """
+    Resolve the Relay global IDs of a mutation with one `in_bulk` query per node type.
+
+    IDs are registered with `add` and fetched together by `resolve`, which raises a single
+    error listing every invalid ID. The instances are then read back with `get`.
+
+    Example:
+        resolver = GlobalIdResolver()
+        resolver.add(PlanetNode, homeworld)
+        resolver.add(MovieNode, *movies)
+        resolver.resolve()
+        planet = resolver.get(PlanetNode, homeworld)
+    """
+
+    def __init__(self):
+        self.requested = {}
+        self.nodes = {}
+        self.invalid_ids = set()
+
+    def add(self, node_type, *global_ids):
+        self.requested.setdefault(node_type, []).extend(global_ids)
+        return self
+
+    def resolve(self, strict=True):
+        """
+        Fetch the instances of every registered ID.
+
+        Args:
+            strict (bool, optional): Raise on invalid IDs. Otherwise they are kept in `invalid_ids`
+                and callers check their own IDs with `get_invalid`.
+        Raises:
+            - InvalidGlobalIdError: If `strict` and any ID is malformed, of another type or does not exist.
+        """
+        invalid_ids = []
+
+        for node_type, global_ids in self.requested.items():
+            model = node_type._meta.model
+            pks = {}
+            for global_id in global_ids:
+                if global_id in pks or (node_type, global_id) in self.invalid_ids:
+                    continue
+                _type, _id = from_global_id(global_id)
+                try:
+                    pk = model._meta.pk.to_python(_id) if _type == node_type._meta.name else None
+                except ValidationError:
+                    pk = None
+                if pk is None:
+                    invalid_ids.append(global_id)
+                    self.invalid_ids.add((node_type, global_id))
+                else:
+                    pks[global_id] = pk
+
+            instances = model._default_manager.in_bulk(set(pks.values())) if pks else {}
+            for global_id, pk in pks.items():
+                if pk in instances:
+                    self.nodes[(node_type, global_id)] = instances[pk]
+                else:
+                    invalid_ids.append(global_id)
+                    self.invalid_ids.add((node_type, global_id))
+
+        if strict and invalid_ids:
+            raise InvalidGlobalIdError(invalid_ids)
+        return self
+
+    def get(self, node_type, global_id):
+        return self.nodes[(node_type, global_id)]
+
+    def get_many(self, node_type, global_ids):
+        return [self.get(node_type, global_id) for global_id in dict.fromkeys(global_ids)]
+
+    def get_invalid(self, node_type, global_ids):
+        return [global_id for global_id in global_ids if (node_type, global_id) in self.invalid_ids]
+
+
+def add_relations(instance, field_name, targets):
+    """
+    Link a newly created instance to many-to-many targets with a single INSERT.
+
+    `RelatedManager.add` selects the existing links first whenever `m2m_changed` has
+    receivers; a new instance has none, so the rows are inserted directly and the
+    `pre_add`/`post_add` signals are sent by hand.
+
+    Args:
+        instance (Model): The newly created instance.
+        field_name (str): Name of the many-to-many field of the instance.
+        targets (list): Instances to link.
+    """
+    targets = list({related.pk: related for related in targets}.values())
+    if not targets:
+        return
+
+    field = instance._meta.get_field(field_name)
+    through = field.remote_field.through
+    source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+    signal_kwargs = {
+        "sender": through,
+        "instance": instance,
+        "reverse": False,
+        "model": field.related_model,
+        "pk_set": {related.pk for related in targets},
+        "using": instance._state.db,
+    }
+
+    m2m_changed.send(action="pre_add", **signal_kwargs)
+    through.objects.bulk_create([
+        through(**{f"{source}_id": instance.pk, f"{target}_id": related.pk}) for related in targets
+    ])
+    m2m_changed.send(action="post_add", **signal_kwargs)
@@ -0,0 +1,214 @@
+# Models
+from starwars.models import Planet, Movie, Character
+
+# Utils
+from collections import defaultdict
+from functools import partial
+from threading import Event, Lock
+
+
+loaders_lock = Lock()
+
+
+class DataLoader:
+    """
+    Per-request batching loader, safe to share between the threads resolving a request.
+
+    Keys are queued as soon as the rows that reference them are fetched (see
+    `Loaders.prime`), and the whole queue is resolved with a single call to
+    `batch_load_fn` the first time any queued key is requested. Resolved values
+    are cached for the rest of the request.
+
+    When resolvers run concurrently (see `starwars.executors`), a key requested while
+    the batch loading it is in flight waits for that batch instead of querying it again.
+    The batch itself runs outside of the lock, so it may prime other loaders.
+
+    Args:
+        - batch_load_fn (callable): Receives a list of keys and returns a dict of key -> value.
+        - default (callable, optional): Factory for the value of keys missing from the batch result.
+    """
+
+    def __init__(self, batch_load_fn, default=None):
+        self.batch_load_fn = batch_load_fn
+        self.default = default or (lambda: None)
+        self._cache = {}
+        self._queue = {}
+        self._pending = {}
+        self._lock = Lock()
+
+    def queue(self, keys):
+        with self._lock:
+            for key in keys:
+                if key is not None and key not in self._cache and key not in self._pending:
+                    self._queue[key] = None
+
+    def prime(self, key, value):
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = value
+                self._queue.pop(key, None)
+
+    def load(self, key):
+        return self.load_many([key])[0]
+
+    def load_many(self, keys):
+        keys = list(keys)
+        missing = [key for key in keys if key is not None and key not in self._cache]
+        while missing:
+            self.queue(missing)
+            self.dispatch()
+            self.wait(missing)
+            # Keys of a batch that failed in another thread are loaded again
+            missing = [key for key in missing if key not in self._cache]
+        return [self._cache[key] if key is not None else self.default() for key in keys]
+
+    def dispatch(self):
+        with self._lock:
+            keys, self._queue = list(self._queue), {}
+            if not keys:
+                return
+            done = Event()
+            for key in keys:
+                self._pending[key] = done
+
+        try:
+            results = self.batch_load_fn(keys)
+            with self._lock:
+                for key in keys:
+                    self._cache[key] = results.get(key, self.default())
+        finally:
+            with self._lock:
+                for key in keys:
+                    del self._pending[key]
+            done.set()
+
+    def wait(self, keys):
+        """
+        Wait for the batches loading some of the given keys in other threads.
+        """
+        with self._lock:
+            events = {self._pending[key] for key in keys if key in self._pending}
+        for event in events:
+            event.wait()
+
+
+class Loaders:
+    """
+    Per-request registry with one DataLoader for every relation exposed on the nodes.
+
+    Every instance fetched through a loader or a connection page is passed to `prime`,
+    which queues its keys on the loaders of its own relations. This way the next
+    relation level is resolved with one query for all siblings, whatever the page size.
+    Fully loaded instances are also cached by primary key for the node lookups.
+    """
+
+    def __init__(self):
+        # FK and node lookups
+        self.planet = DataLoader(partial(self._load_nodes, Planet))
+        self.movie = DataLoader(partial(self._load_nodes, Movie))
+        self.character = DataLoader(partial(self._load_nodes, Character))
+
+        # Reverse FK
+        self.residents_by_planet = DataLoader(self._load_residents, list)
+
+        # M2M (keyed through the through-tables)
+        self.movies_by_planet = DataLoader(self._load_movies_by_planet, list)
+        self.planets_by_movie = DataLoader(self._load_planets_by_movie, list)
+        self.characters_by_movie = DataLoader(self._load_characters_by_movie, list)
+        self.movies_by_character = DataLoader(self._load_movies_by_character, list)
+
+    def prime(self, instances):
+        """
+        Queue the relation keys of the given instances on their loaders.
+        Instances with deferred columns are not cached, and deferred keys are not queued.
+
+        Args:
+            instances (iterable): Planet, Movie or Character instances.
+        """
+        for instance in instances:
+            if isinstance(instance, Planet):
+                if not instance.get_deferred_fields():
+                    self.planet.prime(instance.pk, instance)
+                self.residents_by_planet.queue([instance.pk])
+                self.movies_by_planet.queue([instance.pk])
+            elif isinstance(instance, Movie):
+                if not instance.get_deferred_fields():
+                    self.movie.prime(instance.pk, instance)
+                self.planets_by_movie.queue([instance.pk])
+                self.characters_by_movie.queue([instance.pk])
+            elif isinstance(instance, Character):
+                if not instance.get_deferred_fields():
+                    self.character.prime(instance.pk, instance)
+                if "homeworld_id" not in instance.get_deferred_fields():
+                    self.planet.queue([instance.homeworld_id])
+                self.movies_by_character.queue([instance.pk])
+
+    def _load_nodes(self, model, ids):
+        instances = model.objects.in_bulk(ids)
+        self.prime(instances.values())
+        return instances
+
+    def _load_residents(self, ids):
+        characters = Character.objects.filter(homeworld_id__in=ids).order_by("pk")
+        return self._group(characters, lambda character: character.homeworld_id)
+
+    def _load_movies_by_planet(self, ids):
+        return self._load_through(Movie.planets.through, "planet_id", "movie", ids)
+
+    def _load_planets_by_movie(self, ids):
+        return self._load_through(Movie.planets.through, "movie_id", "planet", ids)
+
+    def _load_characters_by_movie(self, ids):
+        return self._load_through(Character.movies.through, "movie_id", "character", ids)
+
+    def _load_movies_by_character(self, ids):
+        return self._load_through(Character.movies.through, "character_id", "movie", ids)
+
+    def _load_through(self, through, source, target, ids):
+        rows = (
+            through.objects
+            .filter(**{f"{source}__in": ids})
+            .select_related(target)
+            .order_by(f"{target}_id")
+        )
+        return self._group(rows, lambda row: getattr(row, source), lambda row: getattr(row, target))
+
+    def _group(self, rows, key, value=lambda row: row):
+        grouped = defaultdict(list)
+        for row in rows:
+            grouped[key(row)].append(value(row))
+
+        self.prime(instance for instances in grouped.values() for instance in instances)
+        return grouped
+
+
+def get_loaders(info):
+    """
+    Get the loaders of the current request, creating them on first use.
+
+    Args:
+        info (ResolveInfo): GraphQL resolve info.
+    Returns:
+        Loaders: The loaders bound to `info.context`, or a fresh set when there is no context.
+    """
+    context = info.context
+    if context is None:
+        return Loaders()
+
+    loaders = getattr(context, "dataloaders", None)
+    if loaders is None:
+        # Resolvers of the same request may run in several threads
+        with loaders_lock:
+            loaders = getattr(context, "dataloaders", None)
+            if loaders is None:
+                loaders = Loaders()
+                context.dataloaders = loaders
+    return loaders
+
+def reset_loaders(context):
+    """
+    Drop the loaders of a request, whose values may be stale after a mutation
+    (a batch of operations shares the loaders of its request).
+    """
+    if context is not None and getattr(context, "dataloaders", None) is not None:
+        context.dataloaders = None
@@ -1,13 +1,34 @@
+# Django
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import connections, transaction
+from django.db.models import SET_NULL, DO_NOTHING
+from django.utils import timezone
+
 # Graphene
-from graphene import String, List, Field, relay, Date
+from graphene import String, List, Field, Date, NonNull
+from graphene.types.unmountedtype import UnmountedType
+from graphene.utils.str_converters import to_camel_case
 import graphene
 
+# GraphQL
+from graphql import GraphQLError
+
+# Externals
+from simple_history.utils import bulk_create_with_history
+
 # Models
 from starwars.models import Planet, Movie, Character
 
 # Schema
+from starwars.schema.fields import BatchedConnectionField
+from starwars.schema.global_ids import GlobalIdResolver, add_relations
 from starwars.schema.types import CharacterNode, PlanetNode, MovieNode
 
+# Starwars
+from starwars.history import bulk_history_from_queryset
+from starwars.response_cache import response_cache
+
 # Utils
 from datetime import datetime
 
@@ -81,7 +102,7 @@ class CreateMovie(graphene.Mutation):
        - movie (MovieNode): The created movie object.
 
     Raises:
-        - Exception: If one or more Planet IDs are invalid.
+        - InvalidGlobalIdError: If one or more Planet IDs are invalid, all of them listed.
     """
     class Arguments:
         title = String(required=True)
@@ -94,6 +115,7 @@ class CreateMovie(graphene.Mutation):
 
     movie = Field(MovieNode)
 
+    @transaction.atomic
     def mutate(self, info, title, episode_id, opening_crawl=None, director=None, producers=None,
                planets=None, release_date=None):
 
@@ -105,19 +127,14 @@ class CreateMovie(graphene.Mutation):
             "producers": producers,
             "release_date": release_date
         }
-        movie = Movie.objects.create(**movie)
 
-        # Add Planets
-        if planets:
-            planet_instances = [
-                relay.Node.get_node_from_global_id(info, pid, only_type=PlanetNode)
-                for pid in planets
-            ]
+        # Resolve Planets before writing anything
+        resolver = GlobalIdResolver().add(PlanetNode, *(planets or [])).resolve()
 
-            if None in planet_instances:
-                raise Exception("One or more Planet IDs are invalid")
+        movie = Movie.objects.create(**movie)
 
-            movie.planets.set(planet_instances)
+        # Add Planets
+        add_relations(movie, "planets", resolver.get_many(PlanetNode, planets or []))
 
         return CreateMovie(movie=movie)
 
@@ -143,8 +160,7 @@ class CreateCharacter(graphene.Mutation):
        character (CharacterNode): The created character object.
 
     Raises:
-        - Exception: If one or more Movie IDs are invalid.
-        - Exception: If one Planet ID is invalid.
+        - InvalidGlobalIdError: If the Planet ID or one or more Movie IDs are invalid, all of them listed.
     """
     class Arguments:
         name = String(required=True)
@@ -161,6 +177,7 @@ class CreateCharacter(graphene.Mutation):
 
     character = Field(CharacterNode)
 
+    @transaction.atomic
     def mutate(self, info, name, species=None, birth_year=None, height=None, mass=None, hair_color=None,
                skin_color=None, eye_color=None, gender=None, homeworld=None, movies=None):
 
@@ -175,33 +192,610 @@ class CreateCharacter(graphene.Mutation):
             "eye_color": eye_color or "",
             "gender": gender or ""
         }
+        # Resolve homeworld and Movies together, one query per type
+        resolver = GlobalIdResolver()
+        if homeworld:
+            resolver.add(PlanetNode, homeworld)
+        resolver.add(MovieNode, *(movies or [])).resolve()
+
         # Add homeworld
         if homeworld:
-            planet_instance = relay.Node.get_node_from_global_id(info, homeworld, only_type=PlanetNode)
-            if planet_instance is None:
-                raise Exception(f"Planet with id {homeworld} does not exist")
-            fields["homeworld"] = planet_instance
+            fields["homeworld"] = resolver.get(PlanetNode, homeworld)
 
         # Create Character
         character = Character.objects.create(**fields)
 
         # Add Movies
-        if movies:
-            movie_instances = [
-                relay.Node.get_node_from_global_id(info, movie_id, only_type=MovieNode)
-                for movie_id in movies
-            ]
+        add_relations(character, "movies", resolver.get_many(MovieNode, movies or []))
+
+        return CreateCharacter(character=character)
 
-            # Check if any of the IDs are invalid
-            if None in movie_instances:
-                raise Exception("One or more Movie IDs are invalid")
 
-            character.movies.set(movie_instances)
+def input_type_from_arguments(name, mutation):
+    """
+    Build an input object type with the arguments of a mutation.
 
-        return CreateCharacter(character=character)
+    Args:
+        name (str): Name of the input type.
+        mutation (Mutation): Mutation whose `Arguments` are reused.
+    Returns:
+        InputObjectType: The input type.
+    """
+    fields = {key: value for key, value in vars(mutation.Arguments).items() if isinstance(value, UnmountedType)}
+    return type(name, (graphene.InputObjectType,), fields)
+
+
+def set_input_type_from_arguments(name, mutation):
+    """
+    Build an input object type with the single-valued arguments of a mutation, all optional.
+
+    Args:
+        name (str): Name of the input type.
+        mutation (Mutation): Mutation whose `Arguments` are reused.
+    Returns:
+        InputObjectType: The input type.
+    """
+    fields = {
+        key: graphene.InputField(value.get_type())
+        for key, value in vars(mutation.Arguments).items()
+        if isinstance(value, UnmountedType) and not isinstance(value, List)
+    }
+    return type(name, (graphene.InputObjectType,), fields)
+
+
+def filter_input_type(name, node_type):
+    """
+    Build an input object type with the filters of the connections of a node type,
+    generated by django-filter from its `filter_fields`.
+
+    Args:
+        name (str): Name of the input type.
+        node_type (DjangoObjectType): The node type.
+    Returns:
+        tuple: (InputObjectType, BatchedConnectionField applying the filters).
+    """
+    field = BatchedConnectionField(node_type)
+    fields = {key: graphene.InputField(argument.type) for key, argument in field.filtering_args.items()}
+    return type(name, (graphene.InputObjectType,), fields), field
+
+
+PlanetInput = input_type_from_arguments("PlanetInput", CreatePlanet)
+MovieInput = input_type_from_arguments("MovieInput", CreateMovie)
+CharacterInput = input_type_from_arguments("CharacterInput", CreateCharacter)
+
+PlanetSetInput = set_input_type_from_arguments("PlanetSetInput", CreatePlanet)
+MovieSetInput = set_input_type_from_arguments("MovieSetInput", CreateMovie)
+CharacterSetInput = set_input_type_from_arguments("CharacterSetInput", CreateCharacter)
+
+PlanetFilterInput, planet_filter = filter_input_type("PlanetFilterInput", PlanetNode)
+MovieFilterInput, movie_filter = filter_input_type("MovieFilterInput", MovieNode)
+CharacterFilterInput, character_filter = filter_input_type("CharacterFilterInput", CharacterNode)
+
+
+def clean_input_fields(model, values):
+    """
+    Clean input values with their model fields. Optional text fields given as null
+    are stored as "", like the single mutations do.
+
+    Args:
+        model (Model): The model of the fields.
+        values (dict): Input values by field name.
+    Returns:
+        tuple: (dict of cleaned values, dict of field name to error messages).
+    """
+    fields, errors = {}, {}
+    instance = model()
+
+    for name, value in values.items():
+        model_field = model._meta.get_field(name)
+        if value is None and not model_field.empty_strings_allowed and not model_field.null:
+            errors[name] = [model_field.error_messages["null"]]
+        elif value is None or value == "":
+            fields[name] = "" if value is None and model_field.empty_strings_allowed else value
+        else:
+            try:
+                fields[name] = model_field.clean(value, instance)
+            except ValidationError as e:
+                errors[name] = e.messages
+
+    return fields, errors
+
+
+class BulkItemError(graphene.ObjectType):
+    """
+    Error of one item of a bulk mutation.
+
+    - index (int): Position of the item in the input list.
+    - field (str): Input field of the error, null for errors of the whole item.
+    - messages (list of str): Error messages.
+    """
+    index = graphene.Int(required=True)
+    field = String()
+    messages = List(NonNull(String), required=True)
+
+
+class BulkCreateMutation(graphene.Mutation):
+    """
+    Base mutation creating a list of objects.
+
+    - The whole batch is validated up front: global IDs are resolved with one query
+      per node type and the fields of every item are cleaned by their model field.
+    - Valid items are inserted with `bulk_create`, along with their history rows and
+      their through-table rows. Invalid items are skipped and reported in `errors`.
+    - The output list is aligned with the input, with null for skipped items.
+
+    Subclasses set:
+        - field_name (str): Name of the input argument and of the output list.
+        - model (Model): The model to create.
+        - foreign_keys (dict): Input fields holding a global ID, mapped to their node type.
+        - many_to_many (dict): Input fields holding a list of global IDs, mapped to their node type.
+    """
+    class Meta:
+        abstract = True
+
+    batch_size = 500
+    field_name = None
+    model = None
+    foreign_keys = {}
+    many_to_many = {}
+
+    created = graphene.Int(required=True)
+    errors = List(NonNull(BulkItemError), required=True)
+
+    @classmethod
+    def get_global_ids(cls, item, name):
+        value = item.get(name)
+        if name in cls.many_to_many:
+            return [global_id for global_id in value or [] if global_id]
+        return [value] if value else []
+
+    @classmethod
+    def build(cls, index, item, resolver):
+        """
+        Build the unsaved instance of an item.
+
+        Returns:
+            tuple: (instance, dict of many-to-many field to targets, list of BulkItemError).
+        """
+        errors, fields, links = [], {}, {}
+
+        for name, node_type in {**cls.foreign_keys, **cls.many_to_many}.items():
+            global_ids = cls.get_global_ids(item, name)
+            invalid_ids = resolver.get_invalid(node_type, global_ids)
+            if invalid_ids:
+                messages = [f"Invalid ID: {global_id}" for global_id in invalid_ids]
+                errors.append(BulkItemError(index=index, field=to_camel_case(name), messages=messages))
+            elif name in cls.many_to_many:
+                links[name] = resolver.get_many(node_type, global_ids)
+            elif global_ids:
+                fields[name] = resolver.get(node_type, global_ids[0])
+
+        values = {
+            name: value for name, value in item.items() if name not in cls.foreign_keys and name not in cls.many_to_many
+        }
+        cleaned, field_errors = clean_input_fields(cls.model, values)
+        fields.update(cleaned)
+        for name, messages in field_errors.items():
+            errors.append(BulkItemError(index=index, field=to_camel_case(name), messages=messages))
+
+        instance = cls.model(**fields)
+        return instance, links, errors
+
+    @classmethod
+    def create_links(cls, created):
+        """
+        Insert the through-table rows of the created instances, one bulk INSERT per relation.
+        """
+        for name in cls.many_to_many:
+            field = cls.model._meta.get_field(name)
+            through = field.remote_field.through
+            source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+            through.objects.bulk_create(
+                [
+                    through(**{f"{source}_id": instance.pk, f"{target}_id": related.pk})
+                    for instance, links in created
+                    for related in links.get(name, [])
+                ],
+                batch_size=cls.batch_size,
+            )
+
+    @classmethod
+    @transaction.atomic
+    def mutate(cls, root, info, **kwargs):
+        items = kwargs[cls.field_name]
+        if len(items) > settings.GRAPHQL_BULK_MUTATION_MAX_SIZE:
+            raise GraphQLError(
+                f"Cannot create more than {settings.GRAPHQL_BULK_MUTATION_MAX_SIZE} {cls.field_name} at once"
+            )
+
+        # Resolve the global IDs of the whole batch, one query per node type
+        resolver = GlobalIdResolver()
+        for item in items:
+            for name, node_type in {**cls.foreign_keys, **cls.many_to_many}.items():
+                resolver.add(node_type, *cls.get_global_ids(item, name))
+        resolver.resolve(strict=False)
+
+        results, created, errors = [], [], []
+        for index, item in enumerate(items):
+            instance, links, item_errors = cls.build(index, item, resolver)
+            if item_errors:
+                errors.extend(item_errors)
+                results.append(None)
+            else:
+                created.append((instance, links))
+                results.append(instance)
+
+        if created:
+            bulk_create_with_history(
+                [instance for instance, _ in created], cls.model, batch_size=cls.batch_size
+            )
+            cls.create_links(created)
+            # Bulk inserts do not send model signals
+            response_cache.invalidate(cls.model)
+
+        return cls(**{cls.field_name: results, "created": len(created), "errors": errors})
+
+
+class CreatePlanets(BulkCreateMutation):
+    """
+    Mutation to create a list of planets, see `CreatePlanet` for the fields of each item.
+
+    Args:
+        - planets (list of PlanetInput): The planets to create.
+
+    Returns:
+        - planets (list of PlanetNode): The created planets, null for the invalid items.
+        - created (int): Number of created planets.
+        - errors (list of BulkItemError): Errors of the invalid items.
+    """
+    class Arguments:
+        planets = List(NonNull(PlanetInput), required=True)
+
+    field_name = "planets"
+    model = Planet
+
+    planets = List(PlanetNode)
+
+
+class CreateMovies(BulkCreateMutation):
+    """
+    Mutation to create a list of movies, see `CreateMovie` for the fields of each item.
+
+    Args:
+        - movies (list of MovieInput): The movies to create.
+
+    Returns:
+        - movies (list of MovieNode): The created movies, null for the invalid items.
+        - created (int): Number of created movies.
+        - errors (list of BulkItemError): Errors of the invalid items.
+    """
+    class Arguments:
+        movies = List(NonNull(MovieInput), required=True)
+
+    field_name = "movies"
+    model = Movie
+    many_to_many = {"planets": PlanetNode}
+
+    movies = List(MovieNode)
+
+
+class CreateCharacters(BulkCreateMutation):
+    """
+    Mutation to create a list of characters, see `CreateCharacter` for the fields of each item.
+
+    Args:
+        - characters (list of CharacterInput): The characters to create.
+
+    Returns:
+        - characters (list of CharacterNode): The created characters, null for the invalid items.
+        - created (int): Number of created characters.
+        - errors (list of BulkItemError): Errors of the invalid items.
+    """
+    class Arguments:
+        characters = List(NonNull(CharacterInput), required=True)
+
+    field_name = "characters"
+    model = Character
+    foreign_keys = {"homeworld": PlanetNode}
+    many_to_many = {"movies": MovieNode}
+
+    characters = List(CharacterNode)
+
+
+class FilteredMutation(graphene.Mutation):
+    """
+    Base mutation writing the rows selected by a `filter` argument, with set-based statements.
+
+    Subclasses set:
+        - model (Model): The model to write.
+        - filter_field (BatchedConnectionField): Field applying the filterset of the node type.
+    """
+    class Meta:
+        abstract = True
+
+    model = None
+    filter_field = None
+
+    @classmethod
+    def get_queryset(cls, info, filters):
+        """
+        Get the rows selected by the filter, requiring at least one filter value
+        so a missing filter never writes the whole table.
+
+        Raises:
+            - GraphQLError: If the filter is empty.
+        """
+        filters = {name: value for name, value in filters.items() if value is not None}
+        if not filters:
+            raise GraphQLError("At least one filter is required")
+        return cls.filter_field.filter_queryset(cls.model.objects.all(), info, filters).order_by()
+
+
+class BulkUpdateMutation(FilteredMutation):
+    """
+    Base mutation updating the rows selected by `filter` with the values of `set`.
+
+    The values are cleaned by their model fields, then the history rows are written with
+    one `INSERT ... SELECT` and the rows with one `UPDATE ... WHERE`: no row is loaded in Python.
+
+    Subclasses set:
+        - foreign_keys (dict): Input fields holding a global ID, mapped to their node type.
+    """
+    class Meta:
+        abstract = True
+
+    foreign_keys = {}
+
+    updated = graphene.Int(required=True)
+
+    @classmethod
+    @transaction.atomic
+    def mutate(cls, root, info, **kwargs):
+        queryset = cls.get_queryset(info, kwargs["filter"])
+        values = dict(kwargs["set"])
+
+        resolver = GlobalIdResolver()
+        for name, node_type in cls.foreign_keys.items():
+            if values.get(name):
+                resolver.add(node_type, values[name])
+        resolver.resolve()
+
+        fields, errors = clean_input_fields(
+            cls.model, {name: value for name, value in values.items() if name not in cls.foreign_keys}
+        )
+        if errors:
+            raise GraphQLError(
+                "Invalid values",
+                extensions={"fields": {to_camel_case(name): messages for name, messages in errors.items()}},
+            )
+        for name, node_type in cls.foreign_keys.items():
+            if name in values:
+                fields[name] = resolver.get(node_type, values[name]) if values[name] else None
+        fields["updated_at"] = timezone.now()
+
+        bulk_history_from_queryset(queryset, "~", fields)
+        updated = queryset.update(**fields)
+        response_cache.invalidate(cls.model)
+
+        return cls(updated=updated)
+
+
+def delete_queryset(queryset):
+    """
+    Delete the rows of a queryset with one `DELETE ... WHERE pk IN (SELECT ...)` statement,
+    without loading them nor sending the signals of `QuerySet.delete()`.
+
+    Args:
+        queryset (QuerySet): The rows to delete.
+    Returns:
+        int: Number of deleted rows.
+    """
+    opts = queryset.model._meta
+    connection = connections[queryset.db]
+    sql, params = queryset.order_by().values("pk").query.get_compiler(queryset.db).as_sql()
+    table = connection.ops.quote_name(opts.db_table)
+    column = connection.ops.quote_name(opts.pk.column)
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {table} WHERE {column} IN ({sql})", params)
+        return cursor.rowcount
+
+
+class BulkDeleteMutation(FilteredMutation):
+    """
+    Base mutation deleting the rows selected by `filter`.
+
+    The history rows are written with one `INSERT ... SELECT`, then the relations and the rows
+    are deleted with one statement each instead of Django's collector, which loads every row
+    and sends one signal per object:
+
+    - Through-table rows of many-to-many relations are deleted.
+    - Foreign keys declared `SET_NULL` are set to null with one `UPDATE`, recorded as changes
+      in the history of their rows.
+
+    Other `on_delete` behaviours are rejected when the mutation class is defined.
+    """
+    class Meta:
+        abstract = True
+
+    deleted = graphene.Int(required=True)
+
+    @classmethod
+    def __init_subclass_with_meta__(cls, **options):
+        for relation in cls.model._meta.related_objects:
+            if not relation.many_to_many and relation.on_delete not in (SET_NULL, DO_NOTHING):
+                raise ImproperlyConfigured(
+                    f"{cls.__name__} cannot delete {cls.model.__name__} rows: "
+                    f"on_delete of {relation} is not supported"
+                )
+        super().__init_subclass_with_meta__(**options)
+
+    @classmethod
+    def delete_relations(cls, queryset):
+        """
+        Delete or null the rows referencing the deleted rows.
+
+        Returns:
+            set: The related models whose rows were changed.
+        """
+        models = set()
+        pks = queryset.values("pk")
+
+        for field in cls.model._meta.many_to_many:
+            through = field.remote_field.through
+            through.objects.filter(**{f"{field.m2m_field_name()}__in": pks}).delete()
+            models.add(field.related_model)
+
+        for relation in cls.model._meta.related_objects:
+            if relation.many_to_many:
+                through = relation.field.remote_field.through
+                through.objects.filter(**{f"{relation.field.m2m_reverse_field_name()}__in": pks}).delete()
+            elif relation.on_delete is SET_NULL:
+                related = relation.related_model.objects.filter(**{f"{relation.field.name}__in": pks})
+                fields = {relation.field.name: None, "updated_at": timezone.now()}
+                bulk_history_from_queryset(related, "~", fields)
+                related.update(**fields)
+            else:
+                continue
+            models.add(relation.related_model)
+
+        return models
+
+    @classmethod
+    @transaction.atomic
+    def mutate(cls, root, info, **kwargs):
+        queryset = cls.get_queryset(info, kwargs["filter"])
+
+        bulk_history_from_queryset(queryset, "-")
+        models = cls.delete_relations(queryset)
+        deleted = delete_queryset(queryset)
+        response_cache.invalidate(cls.model, *models)
+
+        return cls(deleted=deleted)
+
+
+class UpdatePlanets(BulkUpdateMutation):
+    """
+    Mutation to update the planets selected by a filter.
+
+    Args:
+        - filter (PlanetFilterInput): Filters of `allPlanets` selecting the planets.
+        - set (PlanetSetInput): The values to write, see `CreatePlanet`.
+
+    Returns:
+        - updated (int): Number of updated planets.
+    """
+    class Arguments:
+        filter = PlanetFilterInput(required=True)
+        set = PlanetSetInput(required=True)
+
+    model = Planet
+    filter_field = planet_filter
+
+
+class UpdateMovies(BulkUpdateMutation):
+    """
+    Mutation to update the movies selected by a filter.
+
+    Args:
+        - filter (MovieFilterInput): Filters of `allMovies` selecting the movies.
+        - set (MovieSetInput): The values to write, see `CreateMovie`.
+
+    Returns:
+        - updated (int): Number of updated movies.
+    """
+    class Arguments:
+        filter = MovieFilterInput(required=True)
+        set = MovieSetInput(required=True)
+
+    model = Movie
+    filter_field = movie_filter
+
+
+class UpdateCharacters(BulkUpdateMutation):
+    """
+    Mutation to update the characters selected by a filter.
+
+    Args:
+        - filter (CharacterFilterInput): Filters of `allCharacters` selecting the characters.
+        - set (CharacterSetInput): The values to write, see `CreateCharacter`.
+
+    Returns:
+        - updated (int): Number of updated characters.
+
+    Raises:
+        - InvalidGlobalIdError: If the Planet ID of `homeworld` is invalid.
+    """
+    class Arguments:
+        filter = CharacterFilterInput(required=True)
+        set = CharacterSetInput(required=True)
+
+    model = Character
+    filter_field = character_filter
+    foreign_keys = {"homeworld": PlanetNode}
+
+
+class DeletePlanets(BulkDeleteMutation):
+    """
+    Mutation to delete the planets selected by a filter. Their residents lose their homeworld.
+
+    Args:
+        - filter (PlanetFilterInput): Filters of `allPlanets` selecting the planets.
+
+    Returns:
+        - deleted (int): Number of deleted planets.
+    """
+    class Arguments:
+        filter = PlanetFilterInput(required=True)
+
+    model = Planet
+    filter_field = planet_filter
+
+
+class DeleteMovies(BulkDeleteMutation):
+    """
+    Mutation to delete the movies selected by a filter.
+
+    Args:
+        - filter (MovieFilterInput): Filters of `allMovies` selecting the movies.
+
+    Returns:
+        - deleted (int): Number of deleted movies.
+    """
+    class Arguments:
+        filter = MovieFilterInput(required=True)
+
+    model = Movie
+    filter_field = movie_filter
+
+
+class DeleteCharacters(BulkDeleteMutation):
+    """
+    Mutation to delete the characters selected by a filter.
+
+    Args:
+        - filter (CharacterFilterInput): Filters of `allCharacters` selecting the characters.
+
+    Returns:
+        - deleted (int): Number of deleted characters.
+    """
+    class Arguments:
+        filter = CharacterFilterInput(required=True)
+
+    model = Character
+    filter_field = character_filter
 
 
 class Mutation(graphene.ObjectType):
     create_planet = CreatePlanet.Field()
     create_movie = CreateMovie.Field()
     create_character = CreateCharacter.Field()
+    create_planets = CreatePlanets.Field()
+    create_movies = CreateMovies.Field()
+    create_characters = CreateCharacters.Field()
+    update_planets = UpdatePlanets.Field()
+    update_movies = UpdateMovies.Field()
+    update_characters = UpdateCharacters.Field()
+    delete_planets = DeletePlanets.Field()
+    delete_movies = DeleteMovies.Field()
+    delete_characters = DeleteCharacters.Field()
@@ -0,0 +1,236 @@
+# Django
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+
+# GraphQL
+from graphql import FieldNode, FragmentSpreadNode, InlineFragmentNode, get_named_type
+from graphql.execution.values import get_argument_values
+from graphql_relay import get_offset_with_default
+from graphene.utils.str_converters import to_snake_case
+
+
+def prefetch_attr(response_key):
+    """
+    Name of the attribute holding the rows prefetched for a connection field.
+
+    Args:
+        response_key (str): Alias of the field in the response (or its name).
+    Returns:
+        str: The attribute name used as `to_attr` of the Prefetch.
+    """
+    return f"_prefetched_{response_key}"
+
+
+def get_prefetch_limit(args, max_limit=None):
+    """
+    Number of rows per parent a nested connection reads from its prefetched list: the end of
+    its page, plus one row telling whether there is a next page.
+
+    The offset pagination of `BatchedConnectionField` slices the list from `after` (and `offset`)
+    to `first` rows, `max_limit` rows when neither `first` nor `last` is given, or `before`.
+
+    Args:
+        args (dict): Arguments of the connection field.
+        max_limit (int, optional): Page size of the connection without `first` and `last`.
+    Returns:
+        int: The limit, or None when the page is counted from the end of the list (`last`
+            without `before`).
+    """
+    first, last = args.get("first"), args.get("last")
+    start = get_offset_with_default(args.get("after"), -1) + 1 + (args.get("offset") or 0)
+    before = get_offset_with_default(args.get("before"), None)
+    if first is None and last is None:
+        first = max_limit
+
+    if first is not None and first >= 0:
+        end = start + first + 1
+        return min(end, before) if before is not None else end
+    return before
+
+
+def get_response_key(field_node):
+    """
+    Key of a field in the response: its alias, or its name.
+    """
+    return field_node.alias.value if field_node.alias else field_node.name.value
+
+
+def group_by_response_key(fields):
+    """
+    Group field nodes by response key, the way GraphQL merges them in the response.
+
+    Args:
+        fields (list): FieldNode instances.
+    Returns:
+        dict: Response key -> list of FieldNode instances, in selection order.
+    """
+    grouped = {}
+    for field_node in fields:
+        grouped.setdefault(get_response_key(field_node), []).append(field_node)
+    return grouped
+
+
+def get_selected_fields(selection_set, info):
+    """
+    Flatten a selection set into its field nodes, expanding fragments.
+
+    Args:
+        selection_set (SelectionSetNode): The selection set to walk.
+        info (ResolveInfo): GraphQL resolve info, used to look up named fragments.
+    Returns:
+        list: FieldNode instances selected on the type.
+    """
+    fields = []
+    if selection_set is None:
+        return fields
+
+    for selection in selection_set.selections:
+        if isinstance(selection, FieldNode):
+            fields.append(selection)
+        elif isinstance(selection, FragmentSpreadNode):
+            fields.extend(get_selected_fields(info.fragments[selection.name.value].selection_set, info))
+        elif isinstance(selection, InlineFragmentNode):
+            fields.extend(get_selected_fields(selection.selection_set, info))
+    return fields
+
+
+def get_node_fields(connection_nodes, info):
+    """
+    Collect the fields selected on `edges { node { ... } }` of a connection.
+
+    Args:
+        connection_nodes (list): FieldNode instances of the connection field.
+        info (ResolveInfo): GraphQL resolve info.
+    Returns:
+        list: FieldNode instances selected on the node type.
+    """
+    fields = []
+    for connection_node in connection_nodes:
+        for edges in get_selected_fields(connection_node.selection_set, info):
+            if edges.name.value != "edges":
+                continue
+            for node in get_selected_fields(edges.selection_set, info):
+                if node.name.value == "node":
+                    fields.extend(get_selected_fields(node.selection_set, info))
+    return fields
+
+
+def get_node_type(connection_type):
+    """
+    Get the GraphQL node type of a connection type.
+    """
+    edge_type = get_named_type(get_named_type(connection_type).fields["edges"].type)
+    return get_named_type(edge_type.fields["node"].type)
+
+
+class QueryOptimizer:
+    """
+    Rewrite a queryset after the GraphQL selection set that will read it.
+
+    - Scalar fields are loaded with `only()`, so unselected columns are never read.
+    - Forward foreign keys are joined with `select_related()`.
+    - Reverse foreign keys and many-to-many connections are prefetched with their own
+      filtered and optimized sub-queryset, stored under `prefetch_attr(response_key)`,
+      and limited to the rows of their page for each parent (see `get_prefetch_limit`).
+    """
+
+    def __init__(self, info):
+        self.info = info
+
+    def optimize(self, queryset, node_type, fields, required=()):
+        """
+        Optimize `queryset` for the fields selected on `node_type`.
+
+        Args:
+            queryset (QuerySet): The queryset to optimize.
+            node_type (GraphQLObjectType): GraphQL type of the rows.
+            fields (list): FieldNode instances selected on the type.
+            required (iterable, optional): Model fields to load even if they are not selected.
+        Returns:
+            QuerySet: The optimized queryset.
+        """
+        only, select_related, prefetches = set(required), set(), []
+        self._collect(queryset.model, node_type, fields, "", only, select_related, prefetches)
+
+        if select_related:
+            queryset = queryset.select_related(*select_related)
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+        return queryset.only(*only)
+
+    def _collect(self, model, node_type, fields, prefix, only, select_related, prefetches):
+        only.add(f"{prefix}{model._meta.pk.name}")
+
+        for field_nodes in group_by_response_key(fields).values():
+            name = to_snake_case(field_nodes[0].name.value)
+            try:
+                model_field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+
+            if not model_field.is_relation:
+                only.add(f"{prefix}{model_field.name}")
+            elif model_field.many_to_one or (model_field.one_to_one and model_field.concrete):
+                only.add(f"{prefix}{model_field.name}")
+                select_related.add(f"{prefix}{model_field.name}")
+                self._collect(
+                    model_field.related_model,
+                    get_named_type(node_type.fields[field_nodes[0].name.value].type),
+                    [
+                        selected
+                        for field_node in field_nodes
+                        for selected in get_selected_fields(field_node.selection_set, self.info)
+                    ],
+                    f"{prefix}{model_field.name}__",
+                    only,
+                    select_related,
+                    prefetches,
+                )
+            else:
+                prefetches.append(self._prefetch(model_field, node_type, field_nodes, prefix))
+
+    def _prefetch(self, model_field, node_type, field_nodes, prefix):
+        field_node = field_nodes[0]
+        field_def = node_type.fields[field_node.name.value]
+        graphene_field = node_type.graphene_type._meta.fields[to_snake_case(field_node.name.value)]
+        sub_node_type = get_node_type(field_def.type)
+
+        queryset = model_field.related_model._default_manager.all()
+        args = get_argument_values(field_def, field_node, self.info.variable_values)
+        if hasattr(graphene_field, "filter_queryset"):
+            queryset = graphene_field.filter_queryset(queryset, self.info, args)
+
+        # Reverse FK: the prefetch matches the rows on their foreign key column
+        required = (model_field.field.name,) if model_field.one_to_many else ()
+        queryset = self.optimize(queryset, sub_node_type, get_node_fields(field_nodes, self.info), required)
+
+        # Only the rows of the pages are prefetched, with a window function partitioned by parent,
+        # unless `totalCount` needs them all
+        queryset = queryset.order_by("pk")
+        limit = get_prefetch_limit(args, getattr(graphene_field, "max_limit", None))
+        selected = [
+            field.name.value for node in field_nodes for field in get_selected_fields(node.selection_set, self.info)
+        ]
+        if limit is not None and "totalCount" not in selected:
+            queryset = queryset[:max(limit, 0)]
+
+        return Prefetch(
+            f"{prefix}{model_field.name}",
+            queryset=queryset,
+            to_attr=prefetch_attr(get_response_key(field_node)),
+        )
+
+
+def optimize_queryset(queryset, info, required=()):
+    """
+    Optimize the queryset of a connection field for the current selection set.
+
+    Args:
+        queryset (QuerySet): The filtered queryset of the connection.
+        info (ResolveInfo): GraphQL resolve info of the connection field.
+        required (iterable, optional): Model fields to load even if they are not selected.
+    Returns:
+        QuerySet: The optimized queryset.
+    """
+    node_type = get_node_type(info.return_type)
+    return QueryOptimizer(info).optimize(queryset, node_type, get_node_fields(info.field_nodes, info), required)
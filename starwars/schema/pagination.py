@@ -0,0 +1,84 @@
+# Django
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+
+# GraphQL
+from graphql import GraphQLError
+from graphql_relay.utils import base64, unbase64
+
+# Utils
+import json
+
+
+KEYSET_PREFIX = "keyset:"
+OFFSET_PREFIX = "arrayconnection:"
+
+
+def is_offset_cursor(cursor):
+    """
+    Check whether a cursor was issued by the offset pagination.
+    """
+    return bool(cursor) and unbase64(cursor).startswith(OFFSET_PREFIX)
+
+
+def keyset_cursor(instance, keys):
+    """
+    Build the opaque cursor of a row from the values of its ordering keys.
+
+    Args:
+        instance (Model): The row.
+        keys (tuple): Ordering keys, the last one being the primary key.
+    Returns:
+        str: The cursor.
+    """
+    values = [getattr(instance, key.lstrip("-")) for key in keys]
+    return base64(KEYSET_PREFIX + json.dumps(values, cls=DjangoJSONEncoder))
+
+
+def decode_keyset_cursor(cursor, keys):
+    """
+    Decode a keyset cursor into the values of its ordering keys.
+
+    Args:
+        cursor (str): The cursor.
+        keys (tuple): Ordering keys the cursor is expected to hold.
+    Returns:
+        list: The values of the ordering keys.
+    Raises:
+        - GraphQLError: If the cursor is not a keyset cursor for these keys.
+    """
+    decoded = unbase64(cursor)
+    if decoded.startswith(KEYSET_PREFIX):
+        try:
+            values = json.loads(decoded[len(KEYSET_PREFIX):])
+        except ValueError:
+            values = None
+        if isinstance(values, list) and len(values) == len(keys):
+            return values
+    raise GraphQLError(f"Invalid cursor: {cursor}")
+
+
+def keyset_filter(keys, values, forward=True):
+    """
+    Range predicate selecting the rows after (or before) the given key values.
+
+    `(a, pk) > (x, y)` is written as `a >= x AND (a > x OR (a = x AND pk > y))`,
+    so the leading column can use the (a, pk) index as a range scan.
+
+    Args:
+        keys (tuple): Ordering keys (`-key` if descending), the last one being the primary key.
+        values (list): Values of the keys at the cursor.
+        forward (bool, optional): Rows after the cursor if True, before it otherwise.
+    Returns:
+        Q: The predicate.
+    """
+    key, value = keys[0], values[0]
+    ascending = forward != key.startswith("-")
+    key = key.lstrip("-")
+
+    strict = Q(**{f"{key}__{'gt' if ascending else 'lt'}": value})
+    if len(keys) == 1:
+        return strict
+
+    bound = Q(**{f"{key}__{'gte' if ascending else 'lte'}": value})
+    return bound & (strict | (Q(**{key: value}) & keyset_filter(keys[1:], values[1:], forward)))
@@ -1,15 +1,15 @@
 import graphene
-from graphene_django.filter import DjangoFilterConnectionField
 from graphene import relay
+from .fields import KeysetConnectionField
 from .types import CharacterNode, MovieNode, PlanetNode
 
 
 class Query(graphene.ObjectType):
     character = relay.Node.Field(CharacterNode)
-    all_characters = DjangoFilterConnectionField(CharacterNode)
+    all_characters = KeysetConnectionField(CharacterNode)
 
     movie = relay.Node.Field(MovieNode)
-    all_movies = DjangoFilterConnectionField(MovieNode)
+    all_movies = KeysetConnectionField(MovieNode, ordering=("episode_id",))
 
     planet = relay.Node.Field(PlanetNode)
-    all_planets = DjangoFilterConnectionField(PlanetNode)
+    all_planets = KeysetConnectionField(PlanetNode)
@@ -1,27 +1,113 @@
+# Django
+from django.db.models.query import QuerySet
+
 # Graphene
 from graphene_django import DjangoObjectType
 from graphene import relay
+import graphene
 
 # Models
 from starwars.models import Planet, Movie, Character
 
+# Schema
+from starwars.schema.fields import BatchedConnectionField
+from starwars.schema.loaders import get_loaders
+
+
+class CountableConnection(relay.Connection):
+    """
+    Connection exposing an opt-in `totalCount`, only counted when it is selected.
+    """
+    class Meta:
+        abstract = True
+
+    total_count = graphene.Int(description="Total number of nodes matching the filters.")
+
+    def resolve_total_count(self, info):
+        length = getattr(self, "length", None)
+        if length is not None:
+            return length
+        if isinstance(self.iterable, QuerySet):
+            return self.iterable.count()
+        return len(self.iterable)
+
+
+def load_node(loader, id):
+    """
+    Resolve a node lookup through the request loaders, so a node requested by several
+    fields or operations of a request is fetched once.
+
+    Returns:
+        Model or None: The instance, None when the id is not a primary key or is unknown.
+    """
+    try:
+        pk = int(id)
+    except (TypeError, ValueError):
+        return None
+    return loader.load(pk)
+
 
 class PlanetNode(DjangoObjectType):
+    residents = BatchedConnectionField("starwars.schema.types.CharacterNode", required=True)
+    movies = BatchedConnectionField("starwars.schema.types.MovieNode", required=True)
+
     class Meta:
         model = Planet
         interfaces = (relay.Node,)
+        connection_class = CountableConnection
         filter_fields = ['name']
 
+    @classmethod
+    def get_node(cls, info, id):
+        return load_node(get_loaders(info).planet, id)
+
+    def resolve_residents(self, info, **kwargs):
+        return get_loaders(info).residents_by_planet.load(self.pk)
+
+    def resolve_movies(self, info, **kwargs):
+        return get_loaders(info).movies_by_planet.load(self.pk)
+
 
 class MovieNode(DjangoObjectType):
+    planets = BatchedConnectionField(PlanetNode, required=True)
+    characters = BatchedConnectionField("starwars.schema.types.CharacterNode", required=True)
+
     class Meta:
         model = Movie
         interfaces = (relay.Node,)
+        connection_class = CountableConnection
         filter_fields = ['title', 'director']
 
+    @classmethod
+    def get_node(cls, info, id):
+        return load_node(get_loaders(info).movie, id)
+
+    def resolve_planets(self, info, **kwargs):
+        return get_loaders(info).planets_by_movie.load(self.pk)
+
+    def resolve_characters(self, info, **kwargs):
+        return get_loaders(info).characters_by_movie.load(self.pk)
+
 
 class CharacterNode(DjangoObjectType):
+    movies = BatchedConnectionField(MovieNode, required=True)
+
     class Meta:
         model = Character
         interfaces = (relay.Node,)
+        connection_class = CountableConnection
         filter_fields = ['name']
+
+    @classmethod
+    def get_node(cls, info, id):
+        return load_node(get_loaders(info).character, id)
+
+    def resolve_homeworld(self, info):
+        if self.homeworld_id is None:
+            return None
+        if Character.homeworld.is_cached(self):
+            return self.homeworld
+        return get_loaders(info).planet.load(self.homeworld_id)
+
+    def resolve_movies(self, info, **kwargs):
+        return get_loaders(info).movies_by_character.load(self.pk)
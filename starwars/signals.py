@@ -0,0 +1,35 @@
+# Django
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+# Models
+from starwars.models import Character, Movie, Planet
+
+# Starwars
+from starwars.response_cache import response_cache
+
+
+CACHED_MODELS = (Planet, Movie, Character)
+
+
+def invalidate_model(sender, **kwargs):
+    """
+    Invalidate the cached responses that read the saved or deleted model.
+    """
+    response_cache.invalidate(sender)
+
+
+def invalidate_relation(sender, action, **kwargs):
+    """
+    Invalidate the cached responses that read either side of a changed many-to-many relation.
+    """
+    if action.startswith("post_"):
+        response_cache.invalidate(kwargs["instance"].__class__, kwargs["model"])
+
+
+def connect_signals():
+    for model in CACHED_MODELS:
+        post_save.connect(invalidate_model, sender=model, dispatch_uid=f"response_cache_save_{model.__name__}")
+        post_delete.connect(invalidate_model, sender=model, dispatch_uid=f"response_cache_delete_{model.__name__}")
+
+    for through in (Movie.planets.through, Character.movies.through):
+        m2m_changed.connect(invalidate_relation, sender=through, dispatch_uid=f"response_cache_{through.__name__}")
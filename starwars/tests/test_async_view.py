@@ -0,0 +1,184 @@
+# Django
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test import AsyncRequestFactory
+
+# Models
+from starwars.models import Character, Movie, Planet
+
+# Starwars
+from starwars import executors
+from starwars.schema import schema
+from starwars.views import AsyncStarWarsGraphQLView
+
+# Utils
+from asgiref.sync import async_to_sync
+import datetime
+import json
+import threading
+
+# Pytest
+import pytest
+
+
+QUERY = '''
+{
+  allMovies {
+    edges {
+      node {
+        title
+        planets { totalCount edges { node { name } } }
+        characters { edges { node { name homeworld { name } } } }
+      }
+    }
+  }
+}
+'''
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("graphql_url")
+class TestAsyncGraphQLView:
+    """
+    Test class for the async GraphQL view; the resolvers run on the ORM pool, whose threads
+    have their own connections, hence the committed test data.
+    """
+
+    @pytest.fixture
+    def movies(self):
+        planets = [Planet.objects.create(name=f"Planet {i}") for i in range(3)]
+        movies = []
+        for i in range(3):
+            movie = Movie.objects.create(
+                title=f"Movie {i}", episode_id=i, director="Lucas", producers="Kurtz",
+                release_date=datetime.date(1977, 5, 25),
+            )
+            movie.planets.set(planets[:i + 1])
+            Character.objects.create(name=f"Character {i}", homeworld=planets[i]).movies.add(movie)
+            movies.append(movie)
+        return movies
+
+    @staticmethod
+    def post(data):
+        view = AsyncStarWarsGraphQLView.as_view(schema=schema)
+        request = AsyncRequestFactory().post("/graphql/", data=json.dumps(data), content_type="application/json")
+        return async_to_sync(view)(request)
+
+    def test_query_matches_sync_view(self, client, graphql_url, movies):
+        """
+        Test that the async view resolves nested relations like the sync view.
+
+        Asserts:
+            - The response has no errors.
+            - The data is the data of the sync view.
+        """
+        response = self.post({"query": QUERY})
+        data = json.loads(response.content)
+
+        assert response.status_code == 200
+        assert "errors" not in data
+        expected = client.post(graphql_url, data={"query": QUERY}, content_type="application/json").json()
+        assert data["data"] == expected["data"]
+        assert [edge["node"]["planets"]["totalCount"] for edge in data["data"]["allMovies"]["edges"]] == [1, 2, 3]
+
+    def test_root_fields_resolve_concurrently(self, monkeypatch, movies):
+        """
+        Test that sibling root fields are resolved at the same time on the ORM pool.
+
+        Asserts:
+            - Both root resolvers pass a barrier of two threads, which they could not do one after the other.
+            - Both fields are resolved.
+        """
+        barrier = threading.Barrier(2, timeout=5)
+        with_connection = executors.with_connection
+
+        def with_barrier(func):
+            run = with_connection(func)
+
+            def wait_and_run(root, info, **args):
+                if info.parent_type is info.schema.query_type:
+                    barrier.wait()
+                return run(root, info, **args)
+
+            return wait_and_run
+
+        monkeypatch.setattr(executors, "with_connection", with_barrier)
+        response = self.post({"query": "{ allMovies { totalCount } allPlanets { totalCount } }"})
+        data = json.loads(response.content)
+
+        assert "errors" not in data
+        assert data["data"] == {"allMovies": {"totalCount": 3}, "allPlanets": {"totalCount": 3}}
+
+    def test_mutation(self):
+        """
+        Test that mutations are executed by the async view.
+
+        Asserts:
+            - The planet is created and returned.
+        """
+        response = self.post({"query": 'mutation { createPlanet(name: "Mustafar") { planet { name } } }'})
+        data = json.loads(response.content)
+
+        assert "errors" not in data
+        assert data["data"]["createPlanet"]["planet"]["name"] == "Mustafar"
+        assert Planet.objects.filter(name="Mustafar").exists()
+
+    def test_batch(self, movies):
+        """
+        Test that the async view executes batches of operations.
+
+        Asserts:
+            - The results are returned in the order of the operations.
+        """
+        response = self.post([
+            {"query": "{ allPlanets { totalCount } }"},
+            {"query": 'mutation { createPlanet(name: "Mustafar") { planet { name } } }'},
+            {"query": "{ allPlanets { totalCount } }"},
+        ])
+        results = json.loads(response.content)
+
+        assert [result["data"] for result in results] == [
+            {"allPlanets": {"totalCount": 3}},
+            {"createPlanet": {"planet": {"name": "Mustafar"}}},
+            {"allPlanets": {"totalCount": 4}},
+        ]
+
+    def test_get_mutation_is_rejected(self):
+        """
+        Test that the checks of the sync view apply to the async view.
+
+        Asserts:
+            - A mutation sent with GET is answered with a 405.
+        """
+        view = AsyncStarWarsGraphQLView.as_view(schema=schema)
+        request = AsyncRequestFactory().get(
+            "/graphql/", {"query": 'mutation { createPlanet(name: "Mustafar") { planet { name } } }'}
+        )
+        response = async_to_sync(view)(request)
+
+        assert response.status_code == 405
+
+    @pytest.mark.skipif(connection.vendor != "postgresql", reason="Counts PostgreSQL connections")
+    def test_orm_pool_reuses_connections(self, monkeypatch, settings, movies):
+        """
+        Test the connections of the ORM pool with the `CONN_MAX_AGE` of 0 set by `api.asgi`.
+
+        Asserts:
+            - Several queries, each running many resolvers, open at most one connection per
+              thread of the pool instead of one per resolver.
+        """
+        monkeypatch.setitem(connection.settings_dict, "CONN_MAX_AGE", 0)
+        created = []
+
+        def count(sender, connection, **kwargs):
+            created.append(connection)
+
+        connection_created.connect(count)
+        try:
+            for _ in range(3):
+                data = json.loads(self.post({"query": QUERY}).content)
+                assert "errors" not in data
+        finally:
+            connection_created.disconnect(count)
+
+        assert len(created) <= settings.GRAPHQL_ASYNC_ORM_WORKERS
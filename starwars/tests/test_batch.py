@@ -0,0 +1,103 @@
+# Graphene
+from graphene.relay import Node
+
+# Models
+from starwars.models import Planet
+
+# Pytest
+import pytest
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("graphql_url")
+class TestBatchedOperations:
+    """
+    Test class for batches of operations sent as a JSON array.
+    """
+
+    @pytest.fixture
+    def planet_id(self):
+        return Node.to_global_id("PlanetNode", Planet.objects.create(name="Hoth", climate="frozen").pk)
+
+    @staticmethod
+    def post(client, graphql_url, operations):
+        return client.post(graphql_url, data=operations, content_type="application/json")
+
+    def test_operations_share_the_loaders(self, client, graphql_url, planet_id, django_assert_num_queries):
+        """
+        Test that the operations of a batch are answered in order and share the request DataLoaders.
+
+        Asserts:
+            - The response is an array with the result of each operation, in order.
+            - The planet requested by both operations is fetched with one query
+              (plus one lookup of the response cache versions per operation).
+        """
+        operations = [
+            {"query": "query Name($id: ID!) { planet(id: $id) { name } }", "variables": {"id": planet_id}},
+            {"query": "query Climate($id: ID!) { planet(id: $id) { climate } }", "variables": {"id": planet_id}},
+        ]
+        with django_assert_num_queries(3):
+            response = self.post(client, graphql_url, operations)
+
+        assert response.status_code == 200
+        assert [result["data"] for result in response.json()] == [
+            {"planet": {"name": "Hoth"}},
+            {"planet": {"climate": "frozen"}},
+        ]
+
+    def test_mutation_resets_the_loaders(self, client, graphql_url, planet_id):
+        """
+        Test that operations following a mutation in a batch read the rows it changed.
+
+        Asserts:
+            - The last query returns the climate set by the mutation.
+        """
+        operations = [
+            {"query": f'{{ planet(id: "{planet_id}") {{ climate }} }}'},
+            {"query": 'mutation { updatePlanets(filter: {name: "Hoth"}, set: {climate: "temperate"}) { updated } }'},
+            {"query": f'{{ planet(id: "{planet_id}") {{ name climate }} }}'},
+        ]
+        results = self.post(client, graphql_url, operations).json()
+
+        assert results[0]["data"]["planet"]["climate"] == "frozen"
+        assert results[1]["data"]["updatePlanets"]["updated"] == 1
+        assert results[2]["data"]["planet"]["climate"] == "temperate"
+
+    def test_failed_operation_does_not_fail_the_batch(self, client, graphql_url, planet_id):
+        """
+        Test that an invalid operation only fails its own entry.
+
+        Asserts:
+            - The invalid entries get their errors.
+            - The valid entry gets its data.
+        """
+        operations = [
+            {"variables": {}},
+            {"query": "{ planet(id: \"%s\") { name } }" % planet_id},
+            {"query": "{ unknownField }"},
+        ]
+        response = self.post(client, graphql_url, operations)
+        results = response.json()
+
+        assert response.status_code == 200
+        assert results[0]["errors"][0]["message"] == "Must provide query string."
+        assert results[1]["data"] == {"planet": {"name": "Hoth"}}
+        assert "unknownField" in results[2]["errors"][0]["message"]
+
+    @pytest.mark.parametrize("operations, message", [
+        ([], "Received an empty list of operations."),
+        ([{"query": "{ allPlanets { totalCount } }"}] * 3, "Batches are limited to 2 operations, received 3."),
+        (["{ allPlanets { totalCount } }"], "Every entry of a batch must be a JSON query."),
+    ])
+    def test_invalid_batches_are_rejected(self, client, graphql_url, settings, operations, message):
+        """
+        Test the limits of the batches.
+
+        Asserts:
+            - Empty, too large and malformed batches are answered with a 400 and the reason.
+        """
+        settings.GRAPHQL_BATCH_MAX_SIZE = 2
+        response = self.post(client, graphql_url, operations)
+
+        assert response.status_code == 400
+        assert response.json()["errors"][0]["message"] == message
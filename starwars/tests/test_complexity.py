@@ -0,0 +1,143 @@
+# Pytest
+import pytest
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("graphql_url")
+class TestQueryComplexity:
+    """
+    Test class for the static cost and depth analysis of the GraphQL view.
+    """
+
+    def test_cost_is_reported(self, client, graphql_url):
+        """
+        Test that the computed cost is reported in the response extensions.
+
+        Asserts:
+            - The cost multiplies nested selections by `first`, including through
+              fragments and variables.
+            - The depth ignores the connection plumbing.
+        """
+        query = '''
+        query ($planets: Int) {
+          allMovies(first: 5) { edges { node { ...MovieFields } } }
+        }
+        fragment MovieFields on MovieNode {
+          title
+          planets(first: $planets) { edges { node { name } } }
+        }
+        '''
+        response = client.post(
+            graphql_url, data={'query': query, 'variables': {'planets': 2}}, content_type='application/json'
+        )
+
+        data = response.json()
+        assert "errors" not in data
+        # allMovies: 1 + 5 * (title: 1 + planets: 1 + 2 * name: 1)
+        assert data["extensions"]["cost"]["requested"] == 21
+        assert data["extensions"]["cost"]["depth"] == 2
+
+    def test_deep_query_is_rejected_before_execution(self, client, graphql_url, django_assert_num_queries):
+        """
+        Test a query nesting relations deeper than the maximum depth.
+
+        Asserts:
+            - The query is rejected with QUERY_TOO_COMPLEX.
+            - No SQL query is run.
+        """
+        query = '''
+        {
+          allCharacters { edges { node {
+            movies { edges { node {
+              characters { edges { node {
+                homeworld {
+                  residents { edges { node {
+                    movies { edges { node { title } } }
+                  } } }
+                }
+              } } }
+            } } }
+          } } }
+        }
+        '''
+        with django_assert_num_queries(0):
+            response = client.post(graphql_url, data={'query': query}, content_type='application/json')
+
+        data = response.json()
+        assert response.status_code == 400
+        assert data["errors"][0]["extensions"]["code"] == "QUERY_TOO_COMPLEX"
+        assert data["extensions"]["cost"]["depth"] == 6
+
+    def test_costly_query_is_rejected(self, client, graphql_url, settings):
+        """
+        Test a query over the cost budget.
+
+        Asserts:
+            - The query is rejected with QUERY_TOO_COMPLEX.
+            - The same query with a smaller `first` is accepted.
+        """
+        settings.GRAPHQL_QUERY_MAX_COST = 100
+        query = '{ allCharacters(first: %d) { edges { node { movies(first: 10) { edges { node { title } } } } } } }'
+
+        response = client.post(graphql_url, data={'query': query % 100}, content_type='application/json')
+        assert response.json()["errors"][0]["extensions"]["code"] == "QUERY_TOO_COMPLEX"
+
+        response = client.post(graphql_url, data={'query': query % 4}, content_type='application/json')
+        assert "errors" not in response.json()
+
+    def test_introspection_is_free(self, client, graphql_url):
+        """
+        Test that introspection queries are not limited.
+
+        Asserts:
+            - A deep introspection query is executed.
+        """
+        query = '''
+        {
+          __schema { types { name fields { name type { name ofType { name ofType { name ofType { name } } } } } } }
+        }
+        '''
+        response = client.post(graphql_url, data={'query': query}, content_type='application/json')
+        assert "errors" not in response.json()
+
+    def test_page_sizes_bound_the_cost(self, client, graphql_url, settings):
+        """
+        Test that the cost follows the number of nodes a query may return.
+
+        Asserts:
+            - Scalar fields of the nodes are counted for every node of the page.
+            - Connections without `first`/`last` are counted at RELAY_CONNECTION_MAX_LIMIT.
+        """
+        query = '{ allCharacters%s { edges { node { name } } } }'
+
+        costs = [
+            client.post(graphql_url, data={'query': query % args}, content_type='application/json')
+            .json()["extensions"]["cost"]["requested"]
+            for args in ("(first: 1)", "(first: 100)", "")
+        ]
+        assert costs == [2, 101, 101]
+
+    def test_negative_page_size_does_not_lower_the_cost(self, client, graphql_url, django_assert_num_queries):
+        """
+        Test that a negative `first` does not offset the cost of the rest of the query.
+
+        Asserts:
+            - The costly part of the query is still rejected, before execution.
+        """
+        query = '''
+        {
+          a: allPlanets(first: -1000000000) { edges { node { name } } }
+          b: allCharacters(first: 100) { edges { node {
+            movies(first: 100) { edges { node {
+              planets(first: 100) { edges { node { residents(first: 100) { edges { node { name } } } } } }
+            } } }
+          } } }
+        }
+        '''
+        with django_assert_num_queries(0):
+            response = client.post(graphql_url, data={'query': query}, content_type='application/json')
+
+        data = response.json()
+        assert response.status_code == 400
+        assert data["errors"][0]["extensions"]["code"] == "QUERY_TOO_COMPLEX"
+        assert data["extensions"]["cost"]["requested"] > 0
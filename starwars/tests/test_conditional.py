@@ -0,0 +1,174 @@
+# Django
+from django.core.management import call_command
+from django.test import AsyncRequestFactory
+
+# Models
+from starwars.models import Movie, Planet
+
+# Schema
+from starwars.schema import schema
+
+# Starwars
+from starwars.views import AsyncStarWarsGraphQLView
+
+# Utils
+from asgiref.sync import async_to_sync
+from io import StringIO
+import datetime
+
+# Pytest
+import pytest
+
+
+QUERY = "{ allPlanets { edges { node { name } } } }"
+MOVIES_QUERY = "{ allMovies { edges { node { title planets { edges { node { name } } } } } } }"
+PLANET_QUERY = "query Planet($name: String) { allPlanets(name: $name) { edges { node { name } } } }"
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("graphql_url")
+class TestConditionalGet:
+    """
+    Test class for the ETags and Cache-Control headers of the GET queries.
+    """
+
+    @pytest.fixture(autouse=True)
+    def planet(self, settings):
+        settings.GRAPHQL_RESPONSE_CACHE_TIMEOUT = 0
+        settings.GRAPHQL_CACHE_CONTROL_MAX_AGE = {}
+        return Planet.objects.create(name="Tatooine")
+
+    def test_matching_etag_is_not_modified(self, client, graphql_url, django_assert_num_queries):
+        """
+        Test that a client revalidating its response gets a 304 without executing the query.
+
+        Asserts:
+            - A GET query is answered with an ETag, and no-cache without a max-age for its models.
+            - The same query with the ETag in `If-None-Match` gets an empty 304 with the same headers,
+              whose only SQL query is the lookup of the tag versions.
+        """
+        response = client.get(graphql_url, {"query": QUERY})
+        etag = response["ETag"]
+
+        assert response.status_code == 200
+        assert etag.startswith('W/"')
+        assert response["Cache-Control"] == "no-cache"
+
+        with django_assert_num_queries(1):
+            response = client.get(graphql_url, {"query": QUERY}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 304
+        assert response.content == b""
+        assert (response["ETag"], response["Cache-Control"]) == (etag, "no-cache")
+
+    def test_write_changes_the_etag(self, client, graphql_url, planet, django_capture_on_commit_callbacks):
+        """
+        Test that the ETag of a query follows the data it reads.
+
+        Asserts:
+            - Saving a model read by the query changes the ETag: the former one gets a 200.
+            - Other variables of the query give another ETag.
+        """
+        etag = client.get(graphql_url, {"query": QUERY})["ETag"]
+        planet.name = "Naboo"
+        with django_capture_on_commit_callbacks(execute=True):
+            planet.save()
+        response = client.get(graphql_url, {"query": QUERY}, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+        assert response.json()["data"]["allPlanets"]["edges"] == [{"node": {"name": "Naboo"}}]
+
+        etags = {
+            client.get(graphql_url, {"query": PLANET_QUERY, "variables": f'{{"name": "{name}"}}'})["ETag"]
+            for name in ("Naboo", "Hoth")
+        }
+        assert len(etags) == 2
+
+    def test_writes_of_other_processes_change_the_etag(
+        self, client, graphql_url, settings, django_capture_on_commit_callbacks
+    ):
+        """
+        Test a client revalidating its response after a command run in another process.
+
+        Asserts:
+            - The former ETag gets a 200 with the new rows, although the command has its own
+              local-memory cache: the versions are shared through the database.
+        """
+        etag = client.get(graphql_url, {"query": QUERY})["ETag"]
+
+        caches = settings.CACHES
+        settings.CACHES = {
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "other-process"}
+        }
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command(
+                "generate_starwars_data", planets=2, method="bulk", seed=1, stdout=StringIO(), stderr=StringIO()
+            )
+        settings.CACHES = caches
+
+        response = client.get(graphql_url, {"query": QUERY}, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response["ETag"] != etag
+        assert len(response.json()["data"]["allPlanets"]["edges"]) == 3
+
+    def test_cache_control_per_operation(self, client, graphql_url, settings):
+        """
+        Test that the max-age of a query is the lowest one of the models it reads.
+
+        Asserts:
+            - A query of planets gets the max-age of planets.
+            - A query of movies and their planets gets the lowest max-age of both.
+            - A query reading a model without a max-age gets no-cache.
+        """
+        settings.GRAPHQL_CACHE_CONTROL_MAX_AGE = {"movie": 300, "planet": 60}
+
+        assert client.get(graphql_url, {"query": QUERY})["Cache-Control"] == "public, max-age=60"
+        assert client.get(graphql_url, {"query": MOVIES_QUERY})["Cache-Control"] == "public, max-age=60"
+
+        settings.GRAPHQL_CACHE_CONTROL_MAX_AGE = {"movie": 300}
+        assert client.get(graphql_url, {"query": MOVIES_QUERY})["Cache-Control"] == "no-cache"
+
+    def test_uncacheable_responses_have_no_etag(self, client, graphql_url):
+        """
+        Asserts:
+            - POST queries, mutations and responses with errors are answered without an ETag.
+        """
+        post = client.post(graphql_url, data={"query": QUERY}, content_type="application/json")
+        error = client.get(graphql_url, {"query": "{ allPlanets { edges { node { unknown } } } }"})
+
+        assert post.status_code == 200
+        assert error.status_code == 400
+        assert not post.has_header("ETag")
+        assert not error.has_header("ETag")
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.usefixtures("graphql_url")
+class TestAsyncConditionalGet:
+    """
+    Test class for the conditional GET queries of the async view.
+    """
+
+    @pytest.fixture(autouse=True)
+    def settings_(self, settings):
+        settings.GRAPHQL_RESPONSE_CACHE_TIMEOUT = 0
+
+    def test_async_view(self, graphql_url):
+        """
+        Asserts:
+            - The async view answers with the same ETag, and with a 304 when it matches.
+        """
+        Movie.objects.create(
+            title="A New Hope", episode_id=4, director="George Lucas",
+            producers="Gary Kurtz", release_date=datetime.date(1977, 5, 25),
+        )
+        view = async_to_sync(AsyncStarWarsGraphQLView.as_view(schema=schema))
+        factory = AsyncRequestFactory()
+
+        response = view(factory.get(graphql_url, {"query": MOVIES_QUERY}))
+        etag = response["ETag"]
+        assert response.status_code == 200
+
+        response = view(factory.get(graphql_url, {"query": MOVIES_QUERY}, headers={"If-None-Match": etag}))
+        assert response.status_code == 304
+        assert response["ETag"] == etag
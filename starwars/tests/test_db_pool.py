@@ -0,0 +1,157 @@
+# Django
+from django.db import OperationalError
+
+# Pool
+from api.db_pool import pool as db_pool
+from api.db_pool.pool import ConnectionPool, PoolTimeout
+
+# Externals
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_INTRANS
+
+# Utils
+import threading
+import time
+
+# Pytest
+import pytest
+
+
+class FakeConnection:
+    """
+    Stand-in of a psycopg2 connection.
+    """
+
+    def __init__(self):
+        self.closed = 0
+        self.status = TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+class TestConnectionPool:
+    """
+    Test class for the connection pool of the worker processes.
+    """
+
+    def test_connections_are_reused(self):
+        """
+        Test that released connections are handed out again.
+
+        Asserts:
+            - One connection is opened for consecutive requests.
+            - A connection left in a transaction is rolled back when released.
+        """
+        pool = ConnectionPool(max_size=2, connect=FakeConnection)
+        connection = pool.acquire()
+        connection.status = TRANSACTION_STATUS_INTRANS
+        pool.release(connection)
+
+        assert pool.acquire() is connection
+        assert connection.rollbacks == 1
+        assert pool.stats()["size"] == 1
+
+    def test_waits_are_measured(self):
+        """
+        Test that a request for a connection waits for one to be released when the pool is full.
+
+        Asserts:
+            - The waiting thread gets the released connection.
+            - The wait is counted with its duration.
+        """
+        pool = ConnectionPool(max_size=1, connect=FakeConnection)
+        connection = pool.acquire()
+        acquired = []
+        waiter = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+        waiter.start()
+        time.sleep(0.1)
+        pool.release(connection)
+        waiter.join(timeout=5)
+
+        stats = pool.stats()
+        assert acquired == [connection]
+        assert stats["waits"] == 1
+        assert 0.05 < stats["wait_time"] == stats["max_wait"] < 5
+        assert (stats["size"], stats["in_use"], stats["idle"]) == (1, 1, 0)
+
+    def test_timeout(self):
+        """
+        Test that waiting for a connection is bounded.
+
+        Asserts:
+            - PoolTimeout, a database error, is raised after the timeout, and counted.
+        """
+        pool = ConnectionPool(max_size=1, connect=FakeConnection, timeout=0.05)
+        pool.acquire()
+
+        with pytest.raises(PoolTimeout):
+            pool.acquire()
+        assert issubclass(PoolTimeout, db_pool.OperationalError)
+        assert pool.stats()["timeouts"] == 1
+
+    def test_broken_and_expired_connections_are_closed(self):
+        """
+        Test that connections which cannot be reused are replaced.
+
+        Asserts:
+            - A closed connection and a connection older than the lifetime are discarded.
+            - Their slots are freed for new connections.
+        """
+        pool = ConnectionPool(max_size=1, connect=FakeConnection)
+        broken = pool.acquire()
+        broken.closed = 1
+        pool.release(broken)
+        assert pool.acquire() is not broken
+
+        expiring = ConnectionPool(max_size=1, connect=FakeConnection, max_lifetime=0)
+        connection = expiring.acquire()
+        time.sleep(0.01)
+        expiring.release(connection)
+
+        assert connection.closed
+        assert expiring.stats()["discarded"] == 1
+        assert expiring.acquire() is not connection
+
+    def test_failed_connect_frees_the_slot(self):
+        """
+        Test that a connection error does not leak a slot of the pool.
+
+        Asserts:
+            - The error is raised, and the next connection can be opened.
+        """
+        def connect():
+            raise OperationalError("Connection refused")
+
+        pool = ConnectionPool(max_size=1, connect=connect)
+        with pytest.raises(OperationalError):
+            pool.acquire()
+        assert pool.acquire(FakeConnection).closed == 0
+
+
+@pytest.mark.django_db
+class TestPoolStats:
+    """
+    Test class for the pool stats endpoint.
+    """
+
+    def test_stats_are_reported_to_staff(self, client, admin_client, monkeypatch):
+        """
+        Asserts:
+            - Anonymous users are redirected to the admin login.
+            - Staff users get the stats of the pools of the process.
+        """
+        monkeypatch.setattr(db_pool, "pools", {})
+        db_pool.get_pool("replica", "starwars", {"MAX_SIZE": 4}).acquire(FakeConnection)
+
+        assert client.get("/db-pool/stats/").status_code == 302
+        stats = admin_client.get("/db-pool/stats/").json()
+        assert stats["replica"]["max_size"] == 4
+        assert stats["replica"]["in_use"] == 1
@@ -0,0 +1,85 @@
+# Documents
+from starwars.documents import DocumentCache
+from starwars.views import document_cache
+
+# Pytest
+import pytest
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("graphql_url")
+class TestDocumentCache:
+    """
+    Test class for the cache of parsed and validated documents of the GraphQL view.
+    """
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        document_cache.clear()
+        yield
+        document_cache.clear()
+
+    def test_repeated_query_hits_the_cache(self, client, graphql_url):
+        """
+        Test that a query is parsed and validated only on its first request.
+
+        Asserts:
+            - The first request is a miss and the following ones are hits.
+            - Cached documents are executed normally.
+        """
+        query = '{ allPlanets { edges { node { name } } } }'
+        for _ in range(3):
+            response = client.post(graphql_url, data={'query': query}, content_type='application/json')
+            assert "errors" not in response.json()
+
+        info = document_cache.info()
+        assert info["misses"] == 1
+        assert info["hits"] == 2
+        assert info["size"] == 1
+
+    def test_invalid_query_is_not_cached(self, client, graphql_url):
+        """
+        Test that documents failing validation are not cached.
+
+        Asserts:
+            - The validation error is returned on every request.
+            - The cache stays empty.
+        """
+        query = '{ allPlanets { edges { node { unknownField } } } }'
+        for _ in range(2):
+            response = client.post(graphql_url, data={'query': query}, content_type='application/json')
+            assert response.status_code == 400
+            assert "errors" in response.json()
+
+        assert document_cache.info()["size"] == 0
+
+    def test_mutation_over_get_is_still_rejected(self, client, graphql_url):
+        """
+        Test that a cached mutation document cannot be run through GET.
+
+        Asserts:
+            - The GET request is rejected with 405.
+        """
+        mutation = 'mutation { createPlanet(name: "Kamino") { planet { name } } }'
+        client.post(graphql_url, data={'query': mutation}, content_type='application/json')
+
+        response = client.get(graphql_url, {'query': mutation}, HTTP_ACCEPT='application/json')
+        assert response.status_code == 405
+
+    def test_least_recently_used_document_is_evicted(self):
+        """
+        Test the LRU eviction of the cache.
+
+        Asserts:
+            - The least recently used key is evicted once the cache is full.
+            - Evictions are counted.
+        """
+        cache = DocumentCache(maxsize=2)
+        cache.set("a", "document a")
+        cache.set("b", "document b")
+        cache.get("a")
+        cache.set("c", "document c")
+
+        assert cache.get("b") is None
+        assert cache.get("a") == "document a"
+        assert cache.info()["evictions"] == 1
@@ -0,0 +1,117 @@
+# Django
+from django.core.management import call_command
+
+# Models
+from starwars.models import Character, Movie, Planet
+
+# Services
+from services import dumps
+from services.dumps import DumpError, iter_json_array, open_dump
+from services.populate import populate_characters, populate_movies, populate_planets
+
+# Utils
+from io import StringIO
+import json
+
+# Pytest
+import pytest
+
+
+def swapi_url(resource, swapi_id):
+    return f"https://swapi.dev/api/{resource}/{swapi_id}/"
+
+
+@pytest.mark.django_db
+class TestDumps:
+    """
+    Test class for the SWAPI dumps written by `dump_swapi` and read by `load_starwars_data --source`.
+    """
+
+    @pytest.fixture
+    def swapi_data(self):
+        populate_planets([{"url": swapi_url("planets", i), "name": f"Planet {i}"} for i in range(1, 4)])
+        populate_movies([
+            {
+                "url": swapi_url("films", i), "title": f"Film {i}", "episode_id": i, "opening_crawl": "...",
+                "director": "George Lucas", "producer": "Lucasfilm", "release_date": "1977-05-25",
+                "planets": [swapi_url("planets", j) for j in range(1, i + 1)],
+            }
+            for i in range(1, 3)
+        ])
+        populate_characters([
+            {
+                "url": swapi_url("people", i), "name": f"Character {i}", "species": [swapi_url("species", 1)],
+                "homeworld": swapi_url("planets", i), "films": [swapi_url("films", 1), swapi_url("films", 2)],
+            }
+            for i in range(1, 4)
+        ])
+        # Created through the API, so not part of the dump
+        Planet.objects.create(name="Unknown")
+
+    @staticmethod
+    def snapshot():
+        return (
+            sorted(Planet.objects.exclude(swapi_id=None).values_list("swapi_id", "name", "content_hash")),
+            sorted(Movie.objects.values_list("swapi_id", "title", "content_hash", "planets__swapi_id")),
+            sorted(Character.objects.values_list(
+                "swapi_id", "species", "homeworld__swapi_id", "movies__swapi_id", "content_hash"
+            )),
+        )
+
+    @pytest.mark.parametrize("target, dump_format", [
+        ("dump", "ndjson"),
+        ("dump.zip", "json"),
+        ("dump.tar.gz", "ndjson"),
+    ])
+    def test_dump_round_trip(self, swapi_data, tmp_path, target, dump_format):
+        """
+        Test writing the database as a dump and loading it back into an empty database.
+
+        Asserts:
+            - Every SWAPI row is dumped, rows without a SWAPI id are not.
+            - The loaded rows, their relations and content hashes match the dumped ones.
+        """
+        before = self.snapshot()
+        out = StringIO()
+        call_command("dump_swapi", str(tmp_path / target), format=dump_format, stdout=out)
+        assert "planets=3 films=2 people=3" in out.getvalue()
+
+        Character.objects.all().delete()
+        Movie.objects.all().delete()
+        Planet.objects.all().delete()
+        call_command("load_starwars_data", source=str(tmp_path / target), stdout=StringIO())
+
+        assert self.snapshot() == before
+        assert not Planet.objects.filter(swapi_id=None).exists()
+
+    def test_json_array_is_parsed_incrementally(self, tmp_path, monkeypatch):
+        """
+        Test the JSON array parser with items spanning several reads.
+
+        Asserts:
+            - Every item is parsed, including numbers split by a read.
+            - A document that is not an array is rejected.
+        """
+        monkeypatch.setattr(dumps, "READ_SIZE", 7)
+        items = [{"name": "Tatooine", "films": ["a", "b"]}, 12345, "text, with ] and [", None, {"nested": {"x": [1]}}]
+        (tmp_path / "items.json").write_text(' [\n' + ",\n".join(map(json.dumps, items)) + ' ] ')
+
+        with open(tmp_path / "items.json") as stream:
+            assert list(iter_json_array(stream)) == items
+
+        (tmp_path / "page.json").write_text('{"results": []}')
+        with open(tmp_path / "page.json") as stream, pytest.raises(DumpError):
+            list(iter_json_array(stream))
+
+    def test_missing_resource_is_reported(self, tmp_path):
+        """
+        Test opening a dump directory without every resource.
+
+        Asserts:
+            - The missing resources are listed in the error.
+        """
+        (tmp_path / "planets.ndjson").write_text("")
+
+        with pytest.raises(DumpError, match="films, people"):
+            with open_dump(tmp_path):
+                pass
@@ -0,0 +1,81 @@
+# Django
+from django.core.management import call_command
+
+# Models
+from starwars.models import Character, Movie, Planet
+
+# Services
+from services.bulk import format_copy_value
+
+# Utils
+from collections import Counter
+from io import StringIO
+
+# Pytest
+import pytest
+
+
+@pytest.mark.django_db
+class TestGenerate:
+    """
+    Test class for the synthetic dataset generator.
+    """
+
+    @staticmethod
+    def generate(**options):
+        call_command("generate_starwars_data", stdout=StringIO(), stderr=StringIO(), **options)
+
+    def test_rows_and_links_are_generated_in_chunks(self, django_assert_max_num_queries):
+        """
+        Test generating a dataset larger than a chunk.
+
+        Asserts:
+            - The requested number of rows is created.
+            - Every movie has planets and every character movies.
+            - The writes take a constant number of queries per chunk.
+        """
+        # Per chunk: rows and links (movies, characters); plus the planet and movie primary keys
+        with django_assert_max_num_queries(20):
+            self.generate(planets=50, movies=10, characters=250, batch_size=100, method="bulk", seed=1)
+
+        assert (Planet.objects.count(), Movie.objects.count(), Character.objects.count()) == (50, 10, 250)
+        assert not Movie.objects.filter(planets=None).exists()
+        assert not Character.objects.filter(movies=None).exists()
+
+    def test_homeworlds_are_skewed(self):
+        """
+        Test the distribution of the homeworlds.
+
+        Asserts:
+            - The most popular planet is the homeworld of many more characters than the median one.
+        """
+        self.generate(planets=100, movies=5, characters=2000, method="bulk", seed=2)
+
+        homeworlds = Character.objects.exclude(homeworld=None).values_list("homeworld", flat=True)
+        residents = sorted(Counter(homeworlds).values())
+        assert residents[-1] > 10 * residents[len(residents) // 2]
+
+    def test_seed_makes_datasets_reproducible(self):
+        """
+        Test generating twice with the same seed.
+
+        Asserts:
+            - The same names are generated.
+        """
+        self.generate(planets=20, seed=3, method="bulk")
+        first = list(Planet.objects.order_by("pk").values_list("name", flat=True))
+        Planet.objects.all().delete()
+        self.generate(planets=20, seed=3, method="bulk")
+
+        assert list(Planet.objects.order_by("pk").values_list("name", flat=True)) == first
+
+    def test_copy_values_are_escaped(self):
+        """
+        Test the text format of the values written with COPY.
+
+        Asserts:
+            - NULLs, booleans and the special characters are escaped.
+        """
+        assert format_copy_value(None) == "\\N"
+        assert format_copy_value(True) == "t"
+        assert format_copy_value("a\tb\nc\\d") == "a\\tb\\nc\\\\d"
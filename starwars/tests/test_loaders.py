@@ -0,0 +1,191 @@
+# Graphene
+from graphene.relay import Node
+
+# Models
+from starwars.models import Planet, Movie, Character
+
+# Schema
+from starwars.schema.loaders import DataLoader
+
+# Utils
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+# Pytest
+import pytest
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("graphql_url")
+class TestDataLoaders:
+    """
+    Test class for the DataLoader batching of node relations.
+    """
+
+    @staticmethod
+    def populate(size):
+        planets = [Planet.objects.create(name=f"Planet {i}") for i in range(size)]
+        movies = [
+            Movie.objects.create(
+                title=f"Movie {i}",
+                episode_id=i,
+                director="Lucas",
+                producers="Lucas",
+                release_date="1977-05-25",
+            )
+            for i in range(size)
+        ]
+        for movie in movies:
+            movie.planets.set(planets[:2])
+        for i in range(size):
+            character = Character.objects.create(name=f"Character {i}", homeworld=planets[i % len(planets)])
+            character.movies.set(movies)
+        return Node.to_global_id("MovieNode", movies[0].id)
+
+    @pytest.mark.parametrize("size", [3, 12])
+    def test_character_relations_are_batched(self, client, graphql_url, django_assert_num_queries, settings, size):
+        """
+        Test that nested character relations cost a constant number of queries.
+
+        Asserts:
+            - The query runs in 6 SQL statements whatever the page size (response cache
+              versions, movie, characters, homeworlds, movies, planets of the movies).
+            - Every character gets its homeworld and movies.
+        """
+        # Three levels of connections without `first` are over the default query budget
+        settings.GRAPHQL_QUERY_MAX_COST = 10 ** 7
+        movie_id = self.populate(size)
+        query = '''
+        {
+          movie(id: "%s") {
+            characters {
+              edges {
+                node {
+                  name
+                  homeworld { name }
+                  movies { edges { node { title planets { edges { node { name } } } } } }
+                }
+              }
+            }
+          }
+        }
+        ''' % movie_id
+        with django_assert_num_queries(6):
+            response = client.post(graphql_url, data={'query': query}, content_type='application/json')
+
+        data = response.json()
+        assert "errors" not in data
+        edges = data["data"]["movie"]["characters"]["edges"]
+        assert len(edges) == size
+        for edge in edges:
+            assert edge["node"]["homeworld"]["name"].startswith("Planet")
+            assert len(edge["node"]["movies"]["edges"]) == size
+            assert len(edge["node"]["movies"]["edges"][0]["node"]["planets"]["edges"]) == 2
+
+    def test_planet_relations_are_batched(self, client, graphql_url, django_assert_num_queries):
+        """
+        Test that planet residents and movies are loaded with one query each.
+
+        Asserts:
+            - The query runs in 5 SQL statements (response cache versions, movie, planets, residents, movies).
+            - Residents and movies are returned for each planet.
+        """
+        movie_id = self.populate(4)
+        query = '''
+        {
+          movie(id: "%s") {
+            planets {
+              edges {
+                node {
+                  name
+                  residents { edges { node { name } } }
+                  movies { edges { node { title } } }
+                }
+              }
+            }
+          }
+        }
+        ''' % movie_id
+        with django_assert_num_queries(5):
+            response = client.post(graphql_url, data={'query': query}, content_type='application/json')
+
+        edges = response.json()["data"]["movie"]["planets"]["edges"]
+        assert [len(edge["node"]["residents"]["edges"]) for edge in edges] == [1, 1]
+        assert [len(edge["node"]["movies"]["edges"]) for edge in edges] == [4, 4]
+
+    def test_nested_filters_are_applied(self, client, graphql_url):
+        """
+        Test that filter arguments on a batched relation are still honoured.
+
+        Asserts:
+            - Only the movies matching the filter are returned.
+        """
+        movie_id = self.populate(3)
+        query = '''
+        {
+          movie(id: "%s") {
+            characters(first: 1) {
+              edges { node { movies(title: "Movie 1") { edges { node { title } } } } }
+            }
+          }
+        }
+        ''' % movie_id
+        response = client.post(graphql_url, data={'query': query}, content_type='application/json')
+
+        movies = response.json()["data"]["movie"]["characters"]["edges"][0]["node"]["movies"]["edges"]
+        assert [edge["node"]["title"] for edge in movies] == ["Movie 1"]
+
+
+class TestDataLoader:
+    """
+    Test class for the DataLoader shared between threads.
+    """
+
+    def test_concurrent_loads_share_the_batch(self):
+        """
+        Test that keys requested from several threads while their batch is loading are not loaded again.
+
+        Asserts:
+            - The batch function is called once for all the queued keys.
+            - Every thread gets the value of its key.
+        """
+        calls, started = [], threading.Event()
+
+        def batch_load(keys):
+            calls.append(keys)
+            started.set()
+            time.sleep(0.1)
+            return {key: key * 2 for key in keys}
+
+        loader = DataLoader(batch_load)
+        loader.queue(range(8))
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            first = executor.submit(loader.load, 0)
+            started.wait(timeout=5)
+            values = [first.result()] + list(executor.map(loader.load, range(1, 8)))
+
+        assert calls == [list(range(8))]
+        assert values == [key * 2 for key in range(8)]
+
+    def test_failed_batch_is_loaded_again(self):
+        """
+        Test that the keys of a failed batch are not cached.
+
+        Asserts:
+            - The error of the batch function is raised.
+            - The next load calls the batch function again.
+        """
+        calls = []
+
+        def batch_load(keys):
+            calls.append(keys)
+            if len(calls) == 1:
+                raise ValueError("Database unavailable")
+            return {key: str(key) for key in keys}
+
+        loader = DataLoader(batch_load)
+        with pytest.raises(ValueError):
+            loader.load(1)
+        assert loader.load(1) == "1"
+        assert calls == [[1], [1]]
@@ -1,3 +1,19 @@
+# Django
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+
+# GraphQL
+from graphql_relay import to_global_id
+
+# Models
+from starwars.models import Character, Movie, Planet
+
+# Schema
+from starwars.schema.mutations import BulkDeleteMutation, PlanetFilterInput
+
+# Utils
+import datetime
+
 # Pytest
 import pytest
 
@@ -149,3 +165,237 @@ class TestGraphQLMutations:
         data = response.json()
         assert response.status_code == 200
         assert "errors" in data
+
+    def test_create_character_with_movies_batches_queries(self, client, graphql_url, django_assert_max_num_queries):
+        """
+        Test that the homeworld and movies of a new character are resolved in bulk.
+
+        Asserts:
+            - The character is linked to its homeworld and all its movies.
+            - The queries do not grow with the number of movies: one SELECT per node type,
+              the INSERTs of the character, its history and its links, and the savepoint.
+        """
+        planet = Planet.objects.create(name="Tatooine")
+        movies = [
+            Movie.objects.create(
+                title=f"Episode {i}", episode_id=i, director="George Lucas",
+                producers="Lucasfilm", release_date=datetime.date(1977, 5, 25),
+            )
+            for i in range(1, 7)
+        ]
+        mutation = '''
+        mutation ($homeworld: ID, $movies: [ID]) {
+          createCharacter(name: "Luke Skywalker", homeworld: $homeworld, movies: $movies) {
+            character { id }
+          }
+        }
+        '''
+        variables = {
+            "homeworld": to_global_id("PlanetNode", planet.pk),
+            "movies": [to_global_id("MovieNode", movie.pk) for movie in movies],
+        }
+        with django_assert_max_num_queries(7):
+            response = client.post(
+                graphql_url, data={'query': mutation, 'variables': variables}, content_type='application/json'
+            )
+
+        assert "errors" not in response.json()
+        character = Character.objects.get(name="Luke Skywalker")
+        assert character.homeworld == planet
+        assert character.movies.count() == 6
+
+    def test_create_movie_reports_every_invalid_id(self, client, graphql_url):
+        """
+        Test creating a movie with several invalid planet IDs.
+
+        Asserts:
+            - A single error lists every invalid ID: malformed, of another type and unknown.
+            - The movie is not created.
+        """
+        planet = Planet.objects.create(name="Hoth")
+        invalid_ids = ["SW_WRONG_ID", to_global_id("MovieNode", 1), to_global_id("PlanetNode", planet.pk + 1)]
+        mutation = '''
+        mutation ($planets: [ID]) {
+          createMovie(
+            title: "Bad Planets", episodeId: 11, director: "No One", producers: "None",
+            releaseDate: "2020-12-31", planets: $planets
+          ) {
+            movie { id }
+          }
+        }
+        '''
+        variables = {"planets": [to_global_id("PlanetNode", planet.pk), *invalid_ids]}
+        response = client.post(
+            graphql_url, data={'query': mutation, 'variables': variables}, content_type='application/json'
+        )
+
+        errors = response.json()["errors"]
+        assert len(errors) == 1
+        assert errors[0]["extensions"]["code"] == "INVALID_ID"
+        assert errors[0]["extensions"]["invalidIds"] == invalid_ids
+        assert not Movie.objects.filter(title="Bad Planets").exists()
+
+    def test_create_planets_in_bulk(self, client, graphql_url, django_assert_max_num_queries):
+        """
+        Test creating a list of planets.
+
+        Asserts:
+            - Every planet is created, with its history.
+            - The queries do not grow with the size of the batch.
+        """
+        mutation = '''
+        mutation ($planets: [PlanetInput!]!) {
+          createPlanets(planets: $planets) {
+            created
+            planets { name climate }
+            errors { index }
+          }
+        }
+        '''
+        variables = {"planets": [{"name": f"Planet {i}", "climate": "arid"} for i in range(50)]}
+        with django_assert_max_num_queries(4):
+            response = client.post(
+                graphql_url, data={'query': mutation, 'variables': variables}, content_type='application/json'
+            )
+
+        data = response.json()["data"]["createPlanets"]
+        assert data["created"] == 50
+        assert data["errors"] == []
+        assert data["planets"][49] == {"name": "Planet 49", "climate": "arid"}
+        assert Planet.history.count() == 50
+
+    def test_create_characters_reports_item_errors(self, client, graphql_url):
+        """
+        Test creating a list of characters with invalid items.
+
+        Asserts:
+            - Valid items are created with their homeworld and movies.
+            - Invalid items are skipped, with their index and field in `errors`.
+            - The output list is aligned with the input.
+        """
+        planet = Planet.objects.create(name="Tatooine")
+        movie = Movie.objects.create(
+            title="A New Hope", episode_id=4, director="George Lucas",
+            producers="Gary Kurtz", release_date=datetime.date(1977, 5, 25),
+        )
+        mutation = '''
+        mutation ($characters: [CharacterInput!]!) {
+          createCharacters(characters: $characters) {
+            created
+            characters { name homeworld { name } movies { edges { node { title } } } }
+            errors { index field messages }
+          }
+        }
+        '''
+        variables = {"characters": [
+            {"name": "Luke", "homeworld": to_global_id("PlanetNode", planet.pk),
+             "movies": [to_global_id("MovieNode", movie.pk)]},
+            {"name": "Bad Homeworld", "homeworld": "SW_WRONG_ID"},
+            {"name": "Bad Height", "height": "12345678901"},
+            {"name": "Leia", "movies": [to_global_id("MovieNode", movie.pk)]},
+        ]}
+        response = client.post(
+            graphql_url, data={'query': mutation, 'variables': variables}, content_type='application/json'
+        )
+
+        data = response.json()["data"]["createCharacters"]
+        assert data["created"] == 2
+        assert [error["index"] for error in data["errors"]] == [1, 2]
+        assert data["errors"][0] == {"index": 1, "field": "homeworld", "messages": ["Invalid ID: SW_WRONG_ID"]}
+        assert data["errors"][1]["field"] == "height"
+        assert data["characters"][1] is None and data["characters"][2] is None
+        assert data["characters"][0]["homeworld"] == {"name": "Tatooine"}
+        assert data["characters"][3]["movies"]["edges"] == [{"node": {"title": "A New Hope"}}]
+        assert movie.characters.count() == 2
+
+    def test_update_characters_by_filter(self, client, graphql_url, django_assert_max_num_queries):
+        """
+        Test updating the characters selected by a filter.
+
+        Asserts:
+            - Only the matching characters are updated, and the count is returned.
+            - A history row is written for each of them.
+            - The statements do not grow with the number of rows.
+        """
+        planet = Planet.objects.create(name="Tatooine")
+        Character.objects.bulk_create([Character(name="Clone") for _ in range(20)] + [Character(name="Yoda")])
+        mutation = '''
+        mutation ($homeworld: ID) {
+          updateCharacters(filter: {name: "Clone"}, set: {species: "Human", homeworld: $homeworld}) {
+            updated
+          }
+        }
+        '''
+        variables = {"homeworld": to_global_id("PlanetNode", planet.pk)}
+        with django_assert_max_num_queries(5):
+            response = client.post(
+                graphql_url, data={'query': mutation, 'variables': variables}, content_type='application/json'
+            )
+
+        assert response.json()["data"]["updateCharacters"]["updated"] == 20
+        assert Character.objects.filter(species="Human", homeworld=planet).count() == 20
+        assert Character.objects.get(name="Yoda").species == ""
+        history = Character.history.filter(history_type="~")
+        assert history.count() == 20
+        assert set(history.values_list("species", flat=True)) == {"Human"}
+
+    def test_update_requires_a_filter(self, client, graphql_url):
+        """
+        Test updating with an empty filter.
+
+        Asserts:
+            - The mutation is rejected and nothing is updated.
+        """
+        Planet.objects.create(name="Hoth")
+        mutation = 'mutation { updatePlanets(filter: {}, set: {climate: "frozen"}) { updated } }'
+        response = client.post(graphql_url, data={'query': mutation}, content_type='application/json')
+
+        assert response.json()["errors"][0]["message"] == "At least one filter is required"
+        assert Planet.objects.get(name="Hoth").climate == ""
+
+    def test_delete_planets_by_filter(self, client, graphql_url):
+        """
+        Test deleting the planets selected by a filter.
+
+        Asserts:
+            - The matching planets are deleted, and the count is returned.
+            - Their residents lose their homeworld and their movies lose them.
+            - A deletion history row is written for each of them, and a change history row
+              without homeworld for each of their residents.
+        """
+        planet = Planet.objects.create(name="Alderaan")
+        Planet.objects.create(name="Hoth")
+        character = Character.objects.create(name="Leia", homeworld=planet)
+        movie = Movie.objects.create(
+            title="A New Hope", episode_id=4, director="George Lucas",
+            producers="Gary Kurtz", release_date=datetime.date(1977, 5, 25),
+        )
+        movie.planets.add(planet)
+
+        mutation = 'mutation { deletePlanets(filter: {name: "Alderaan"}) { deleted } }'
+        response = client.post(graphql_url, data={'query': mutation}, content_type='application/json')
+
+        assert response.json()["data"]["deletePlanets"]["deleted"] == 1
+        assert list(Planet.objects.values_list("name", flat=True)) == ["Hoth"]
+        character.refresh_from_db()
+        assert character.homeworld is None
+        assert movie.planets.count() == 0
+        assert Planet.history.filter(history_type="-", name="Alderaan").count() == 1
+        change = Character.history.get(history_type="~", name="Leia")
+        assert change.homeworld_id is None
+        assert change.updated_at == character.updated_at
+
+    def test_delete_mutation_rejects_unsupported_on_delete(self):
+        """
+        Test defining a delete mutation of a model referenced with an `on_delete` it cannot apply.
+
+        Asserts:
+            - The class definition raises ImproperlyConfigured, since the admin log entries
+              of users are deleted in cascade.
+        """
+        with pytest.raises(ImproperlyConfigured, match="on_delete"):
+            class DeleteUsers(BulkDeleteMutation):
+                class Arguments:
+                    filter = PlanetFilterInput(required=True)
+
+                model = get_user_model()
@@ -0,0 +1,183 @@
+# Django
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# GraphQL
+from graphql_relay import offset_to_cursor
+
+# Models
+from starwars.models import Planet, Movie, Character
+
+# Schema
+from starwars.schema.optimizer import get_prefetch_limit
+
+# Pytest
+import pytest
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("graphql_url")
+class TestQueryOptimizer:
+    """
+    Test class for the selection-set-aware optimization of the connection querysets.
+    """
+
+    @pytest.fixture(autouse=True)
+    def populate(self):
+        tatooine = Planet.objects.create(name="Tatooine", climate="arid")
+        naboo = Planet.objects.create(name="Naboo", climate="temperate")
+        for episode_id, title in enumerate(["A New Hope", "The Empire Strikes Back", "Return of the Jedi"], 4):
+            movie = Movie.objects.create(
+                title=title,
+                episode_id=episode_id,
+                opening_crawl="It is a period of civil war...",
+                director="Lucas",
+                producers="Kurtz",
+                release_date="1977-05-25",
+            )
+            movie.planets.set([tatooine, naboo])
+        for name in ["Luke Skywalker", "Anakin Skywalker", "Padmé Amidala"]:
+            character = Character.objects.create(name=name, homeworld=tatooine)
+            character.movies.set(Movie.objects.all())
+
+    def test_deep_query_runs_in_constant_queries(self, client, graphql_url, django_assert_num_queries, settings):
+        """
+        Test a deep query going through fragments and nested connections.
+
+        Asserts:
+            - The query runs in 4 SQL statements
+              (response cache versions, characters joined with homeworld, movies, planets).
+            - The nested data is complete.
+        """
+        # Three levels of connections without `first` are over the default query budget
+        settings.GRAPHQL_QUERY_MAX_COST = 10 ** 7
+        query = '''
+        query {
+          allCharacters { edges { node { ...CharacterFields } } }
+        }
+        fragment CharacterFields on CharacterNode {
+          name
+          homeworld { name }
+          movies { edges { node { ... on MovieNode { title planets { edges { node { name } } } } } } }
+        }
+        '''
+        with django_assert_num_queries(4):
+            response = client.post(graphql_url, data={'query': query}, content_type='application/json')
+
+        data = response.json()
+        assert "errors" not in data
+        edges = data["data"]["allCharacters"]["edges"]
+        assert len(edges) == 3
+        for edge in edges:
+            assert edge["node"]["homeworld"]["name"] == "Tatooine"
+            assert len(edge["node"]["movies"]["edges"]) == 3
+            assert len(edge["node"]["movies"]["edges"][0]["node"]["planets"]["edges"]) == 2
+
+    def test_only_selected_columns_are_read(self, client, graphql_url):
+        """
+        Test that columns are only read when they are selected.
+
+        Asserts:
+            - `opening_crawl` is not read when it is not requested.
+            - `opening_crawl` is read when it is requested.
+        """
+        query = '{ allMovies { edges { node { title %s } } } }'
+
+        with CaptureQueriesContext(connection) as context:
+            client.post(graphql_url, data={'query': query % ''}, content_type='application/json')
+        assert not any("opening_crawl" in captured["sql"] for captured in context.captured_queries)
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(graphql_url, data={'query': query % 'openingCrawl'}, content_type='application/json')
+        assert any("opening_crawl" in captured["sql"] for captured in context.captured_queries)
+        assert response.json()["data"]["allMovies"]["edges"][0]["node"]["openingCrawl"].startswith("It is")
+
+    def test_prefetched_connections_are_filtered(self, client, graphql_url, django_assert_num_queries):
+        """
+        Test nested connections filtered through variables and aliases.
+
+        Asserts:
+            - The query runs in 5 SQL statements (response cache versions, planets, residents
+              and one per movies alias).
+            - Each alias is prefetched with its own filter.
+            - The reverse FK `residents` is prefetched as well.
+        """
+        query = '''
+        query ($title: String) {
+          allPlanets(name: "Tatooine") {
+            edges {
+              node {
+                residents { edges { node { name } } }
+                hope: movies(title: $title) { edges { node { title } } }
+                movies { edges { node { title } } }
+              }
+            }
+          }
+        }
+        '''
+        with django_assert_num_queries(5):
+            response = client.post(
+                graphql_url,
+                data={'query': query, 'variables': {'title': 'A New Hope'}},
+                content_type='application/json',
+            )
+
+        node = response.json()["data"]["allPlanets"]["edges"][0]["node"]
+        assert len(node["residents"]["edges"]) == 3
+        assert [edge["node"]["title"] for edge in node["hope"]["edges"]] == ["A New Hope"]
+        assert len(node["movies"]["edges"]) == 3
+
+    def test_prefetched_connections_are_paginated(self, client, graphql_url, django_assert_num_queries):
+        """
+        Test nested connections paginated with `first` and `after`.
+
+        Asserts:
+            - The movies of each character are prefetched in one SQL statement, limited to the
+              rows of the page by a window function.
+            - The pages and `hasNextPage` are those of the whole lists.
+            - With `totalCount`, all the rows are prefetched and counted.
+        """
+        query = '''
+        query ($after: String) {
+          allCharacters {
+            edges { node { movies(first: 1, after: $after) { pageInfo { hasNextPage } edges { node { title } } } } }
+          }
+        }
+        '''
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(graphql_url, data={'query': query}, content_type='application/json')
+        movies_sql = [captured["sql"] for captured in context.captured_queries if "starwars_movie" in captured["sql"]]
+        assert len(movies_sql) == 1
+        assert "ROW_NUMBER" in movies_sql[0].upper()
+
+        for edge in response.json()["data"]["allCharacters"]["edges"]:
+            movies = edge["node"]["movies"]
+            assert [movie["node"]["title"] for movie in movies["edges"]] == ["A New Hope"]
+            assert movies["pageInfo"]["hasNextPage"] is True
+
+        response = client.post(
+            graphql_url, data={'query': query, 'variables': {'after': offset_to_cursor(1)}},
+            content_type='application/json',
+        )
+        movies = response.json()["data"]["allCharacters"]["edges"][0]["node"]["movies"]
+        assert [movie["node"]["title"] for movie in movies["edges"]] == ["Return of the Jedi"]
+        assert movies["pageInfo"]["hasNextPage"] is False
+
+        query = '{ allCharacters { edges { node { movies(first: 1) { totalCount edges { node { title } } } } } } }'
+        response = client.post(graphql_url, data={'query': query}, content_type='application/json')
+        movies = response.json()["data"]["allCharacters"]["edges"][0]["node"]["movies"]
+        assert (movies["totalCount"], len(movies["edges"])) == (3, 1)
+
+    def test_prefetch_limit(self):
+        """
+        Asserts:
+            - The limit is the end of the page plus one row, after `after` and `offset`.
+            - `max_limit` is the page size without `first` and `last`.
+            - `before` bounds the limit, and `last` without `before` needs every row.
+        """
+        assert get_prefetch_limit({"first": 2}) == 3
+        assert get_prefetch_limit({"first": 2, "after": offset_to_cursor(4), "offset": 1}) == 9
+        assert get_prefetch_limit({}, max_limit=100) == 101
+        assert get_prefetch_limit({"first": 10, "before": offset_to_cursor(5)}) == 5
+        assert get_prefetch_limit({"last": 2, "before": offset_to_cursor(5)}) == 5
+        assert get_prefetch_limit({"last": 2}) is None
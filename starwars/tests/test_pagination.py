@@ -0,0 +1,142 @@
+# Django
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Models
+from starwars.models import Movie
+
+# Pytest
+import pytest
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("graphql_url")
+class TestKeysetPagination:
+    """
+    Test class for the keyset pagination of the `allX` connections.
+    """
+
+    QUERY = '''
+    query ($first: Int, $last: Int, $after: String, $before: String) {
+      allMovies(first: $first, last: $last, after: $after, before: $before) {
+        edges { cursor node { title } }
+        pageInfo { hasNextPage hasPreviousPage startCursor endCursor }
+      }
+    }
+    '''
+
+    @pytest.fixture(autouse=True)
+    def populate(self):
+        # Created out of episode order: the connection is ordered by episode
+        for episode_id in [5, 1, 4, 2, 6, 3]:
+            Movie.objects.create(
+                title=f"Episode {episode_id}",
+                episode_id=episode_id,
+                director="Lucas",
+                producers="Lucas",
+                release_date="1977-05-25",
+            )
+
+    def execute(self, client, graphql_url, **variables):
+        response = client.post(
+            graphql_url, data={'query': self.QUERY, 'variables': variables}, content_type='application/json'
+        )
+        data = response.json()
+        assert "errors" not in data
+        return data["data"]["allMovies"]
+
+    def test_walk_forward(self, client, graphql_url):
+        """
+        Test walking the whole collection forward, page by page.
+
+        Asserts:
+            - Pages follow the ordering key.
+            - `hasNextPage` is false on the last page only.
+            - No `COUNT(*)` is run.
+        """
+        titles, after = [], None
+        with CaptureQueriesContext(connection) as context:
+            while True:
+                page = self.execute(client, graphql_url, first=4, after=after)
+                titles += [edge["node"]["title"] for edge in page["edges"]]
+                if not page["pageInfo"]["hasNextPage"]:
+                    break
+                after = page["pageInfo"]["endCursor"]
+
+        assert titles == [f"Episode {episode_id}" for episode_id in range(1, 7)]
+        assert not any("COUNT(" in captured["sql"].upper() for captured in context.captured_queries)
+
+    def test_walk_backward(self, client, graphql_url):
+        """
+        Test paginating backwards with `last` and `before`.
+
+        Asserts:
+            - The page right before the cursor is returned in order.
+            - `hasPreviousPage` reflects the rows left before the page.
+        """
+        page = self.execute(client, graphql_url, last=2)
+        assert [edge["node"]["title"] for edge in page["edges"]] == ["Episode 5", "Episode 6"]
+        assert page["pageInfo"]["hasPreviousPage"] is True
+
+        page = self.execute(client, graphql_url, last=3, before=page["pageInfo"]["startCursor"])
+        assert [edge["node"]["title"] for edge in page["edges"]] == ["Episode 2", "Episode 3", "Episode 4"]
+        assert page["pageInfo"]["hasPreviousPage"] is True
+        assert page["pageInfo"]["hasNextPage"] is True
+
+    def test_total_count_is_opt_in(self, client, graphql_url):
+        """
+        Test that `totalCount` is counted only when it is selected.
+
+        Asserts:
+            - `totalCount` matches the filtered collection, not the page.
+        """
+        query = '{ allMovies(first: 2, director: "Lucas") { totalCount edges { node { title } } } }'
+        response = client.post(graphql_url, data={'query': query}, content_type='application/json')
+
+        data = response.json()["data"]["allMovies"]
+        assert data["totalCount"] == 6
+        assert len(data["edges"]) == 2
+
+    def test_offset_pagination_still_works(self, client, graphql_url):
+        """
+        Test that the `offset` argument keeps paginating by offset.
+
+        Asserts:
+            - The page starts at the given offset.
+        """
+        query = '{ allMovies(offset: 4) { edges { node { title } } } }'
+        response = client.post(graphql_url, data={'query': query}, content_type='application/json')
+
+        edges = response.json()["data"]["allMovies"]["edges"]
+        assert [edge["node"]["title"] for edge in edges] == ["Episode 5", "Episode 6"]
+
+    def test_invalid_cursor(self, client, graphql_url):
+        """
+        Test paginating with a cursor that was not issued by the connection.
+
+        Asserts:
+            - An error is returned.
+        """
+        response = client.post(
+            graphql_url,
+            data={'query': self.QUERY, 'variables': {'after': 'not-a-cursor'}},
+            content_type='application/json',
+        )
+        assert "errors" in response.json()
+
+    @pytest.mark.parametrize("variables", [{"first": -1}, {"first": -5}, {"last": -1}])
+    def test_negative_page_size(self, client, graphql_url, variables):
+        """
+        Test paginating with a negative `first` or `last`.
+
+        Asserts:
+            - The field is rejected with an explicit error instead of an empty page or a Django error.
+        """
+        response = client.post(
+            graphql_url, data={'query': self.QUERY, 'variables': variables}, content_type='application/json'
+        )
+        data = response.json()
+
+        assert data["data"]["allMovies"] is None
+        name = next(iter(variables))
+        assert data["errors"][0]["message"] == f"Argument '{name}' must be a non-negative integer."
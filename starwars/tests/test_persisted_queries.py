@@ -0,0 +1,204 @@
+# Django
+from django.core.management import call_command
+
+# Models
+from starwars.models import PersistedQuery
+
+# Starwars
+from starwars.documents import hash_query
+from starwars.persisted_queries import FileQueryStore
+from starwars.views import document_cache
+
+# Utils
+import json
+
+# Pytest
+import pytest
+
+
+QUERY = '{ allPlanets { edges { node { name } } } }'
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("graphql_url")
+class TestPersistedQueries:
+    """
+    Test class for the automatic persisted queries of the GraphQL view.
+    """
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        document_cache.clear()
+        yield
+        document_cache.clear()
+
+    @staticmethod
+    def post(client, graphql_url, query=None, query_hash=None):
+        data = {}
+        if query is not None:
+            data["query"] = query
+        if query_hash is not None:
+            data["extensions"] = {"persistedQuery": {"version": 1, "sha256Hash": query_hash}}
+        return client.post(graphql_url, data=data, content_type='application/json').json()
+
+    def test_unknown_hash_is_registered_on_retry(self, client, graphql_url):
+        """
+        Test the APQ round trip: hash only, then hash and query, then hash only.
+
+        Asserts:
+            - An unknown hash is answered with PersistedQueryNotFound.
+            - The retry with the query text registers it.
+            - The hash alone is then enough.
+        """
+        query_hash = hash_query(QUERY)
+
+        data = self.post(client, graphql_url, query_hash=query_hash)
+        assert data["errors"][0]["message"] == "PersistedQueryNotFound"
+        assert data["errors"][0]["extensions"]["code"] == "PERSISTED_QUERY_NOT_FOUND"
+
+        data = self.post(client, graphql_url, query=QUERY, query_hash=query_hash)
+        assert "errors" not in data
+        assert PersistedQuery.objects.filter(sha256_hash=query_hash).exists()
+
+        # Without the document cache, the query comes from the registry
+        document_cache.clear()
+        data = self.post(client, graphql_url, query_hash=query_hash)
+        assert "errors" not in data
+        assert "allPlanets" in data["data"]
+
+    def test_persisted_query_over_get(self, client, graphql_url):
+        """
+        Test sending a registered hash in the query string of a GET request.
+
+        Asserts:
+            - The query is executed.
+        """
+        query_hash = hash_query(QUERY)
+        PersistedQuery.objects.create(sha256_hash=query_hash, query=QUERY)
+
+        extensions = json.dumps({"persistedQuery": {"version": 1, "sha256Hash": query_hash}})
+        response = client.get(graphql_url, {"extensions": extensions}, HTTP_ACCEPT="application/json")
+        assert response.status_code == 200
+        assert "allPlanets" in response.json()["data"]
+
+    def test_hash_mismatch(self, client, graphql_url):
+        """
+        Test sending a query with the hash of another query.
+
+        Asserts:
+            - The request is rejected and nothing is registered.
+        """
+        data = self.post(client, graphql_url, query=QUERY, query_hash=hash_query("{ allMovies { totalCount } }"))
+        assert data["errors"][0]["extensions"]["code"] == "PERSISTED_QUERY_HASH_MISMATCH"
+        assert not PersistedQuery.objects.exists()
+
+    def test_invalid_query_is_not_registered(self, client, graphql_url):
+        """
+        Test registering a query that fails validation.
+
+        Asserts:
+            - The validation error is returned and nothing is registered.
+        """
+        query = '{ allPlanets { unknownField } }'
+        data = self.post(client, graphql_url, query=query, query_hash=hash_query(query))
+        assert "errors" in data
+        assert not PersistedQuery.objects.exists()
+
+    def test_allowlist_rejects_unregistered_operations(self, client, graphql_url, settings):
+        """
+        Test the allow-list mode.
+
+        Asserts:
+            - Unregistered queries are rejected, with or without hash, and are not registered.
+            - Registered queries are executed, sent as text or as hash.
+        """
+        settings.GRAPHQL_PERSISTED_QUERIES_ALLOWLIST = True
+
+        data = self.post(client, graphql_url, query=QUERY)
+        assert data["errors"][0]["extensions"]["code"] == "PERSISTED_QUERY_NOT_ALLOWED"
+        data = self.post(client, graphql_url, query=QUERY, query_hash=hash_query(QUERY))
+        assert data["errors"][0]["extensions"]["code"] == "PERSISTED_QUERY_NOT_ALLOWED"
+        assert not PersistedQuery.objects.exists()
+
+        PersistedQuery.objects.create(sha256_hash=hash_query(QUERY), query=QUERY)
+        assert "errors" not in self.post(client, graphql_url, query=QUERY)
+        assert "errors" not in self.post(client, graphql_url, query_hash=hash_query(QUERY))
+
+    def test_allowlist_rejects_removed_operations(self, client, graphql_url, settings):
+        """
+        Test removing a query from the allow-list once its document is cached.
+
+        Asserts:
+            - The query is rejected as soon as it is removed, although its document is still cached.
+        """
+        settings.GRAPHQL_PERSISTED_QUERIES_ALLOWLIST = True
+        PersistedQuery.objects.create(sha256_hash=hash_query(QUERY), query=QUERY)
+        assert "errors" not in self.post(client, graphql_url, query_hash=hash_query(QUERY))
+
+        PersistedQuery.objects.all().delete()
+        assert document_cache.info()["size"] == 1
+        data = self.post(client, graphql_url, query_hash=hash_query(QUERY))
+        assert data["errors"][0]["extensions"]["code"] == "PERSISTED_QUERY_NOT_ALLOWED"
+
+    def test_file_store_survives_restarts(self, client, graphql_url, settings, tmp_path):
+        """
+        Test the registry stored in a local JSON file.
+
+        Asserts:
+            - Registered queries are written to the file.
+            - The management command registers documents in the file.
+        """
+        settings.GRAPHQL_PERSISTED_QUERIES_STORE = "file"
+        settings.GRAPHQL_PERSISTED_QUERIES_FILE = str(tmp_path / "queries.json")
+
+        self.post(client, graphql_url, query=QUERY, query_hash=hash_query(QUERY))
+        assert json.loads((tmp_path / "queries.json").read_text()) == {hash_query(QUERY): QUERY}
+
+        document = tmp_path / "movies.graphql"
+        document.write_text('{ allMovies { edges { node { title } } } }')
+        settings.GRAPHQL_PERSISTED_QUERIES_FILE = str(tmp_path / "other.json")
+        call_command("register_persisted_queries", str(document))
+        assert hash_query(document.read_text()) in json.loads((tmp_path / "other.json").read_text())
+
+    def test_file_store_is_shared_between_processes(self, tmp_path):
+        """
+        Test two registries on the same file, as in two worker processes.
+
+        Asserts:
+            - Registrations of one registry do not overwrite those of the other.
+            - Each registry sees the queries registered by the other one.
+        """
+        path = str(tmp_path / "queries.json")
+        first, second = FileQueryStore(path), FileQueryStore(path)
+        assert first.get(hash_query(QUERY)) is None
+
+        second.add(hash_query(QUERY), QUERY)
+        first.add("a" * 64, "{ allMovies { edges { node { title } } } }")
+
+        assert first.get(hash_query(QUERY)) == QUERY
+        assert second.get("a" * 64) == "{ allMovies { edges { node { title } } } }"
+        assert set(json.loads((tmp_path / "queries.json").read_text())) == {hash_query(QUERY), "a" * 64}
+
+    def test_file_store_reads_the_file_when_it_changes(self, monkeypatch, tmp_path):
+        """
+        Test the cache of the registry stored in a file.
+
+        Asserts:
+            - Looking up unknown hashes does not read the file again while it is unchanged.
+            - A registration of another registry is read on the next lookup.
+        """
+        path = str(tmp_path / "queries.json")
+        store = FileQueryStore(path)
+        FileQueryStore(path).add("a" * 64, QUERY)
+        assert store.get("a" * 64) == QUERY
+
+        reads = []
+        read = store._read
+        monkeypatch.setattr(store, "_read", lambda: reads.append(1) or read())
+        for _ in range(3):
+            assert store.get("b" * 64) is None
+        assert reads == []
+
+        FileQueryStore(path).add("b" * 64, QUERY)
+        assert store.get("b" * 64) == QUERY
+        assert reads == [1]
@@ -0,0 +1,349 @@
+# Django
+from django.core.management import call_command
+
+# Models
+from starwars.models import Character, LoadState, Movie, Planet
+
+# Services
+from services import populate
+from services.populate import (
+    SwapiFetchError, fetch_all, fetch_resources, iter_items, populate_characters, populate_movies, populate_planets,
+    sync_movies, sync_planets,
+)
+from services.swapi_server import SwapiData, SwapiServer
+
+# Utils
+from io import StringIO
+from threading import Lock
+import time
+
+# Pytest
+import pytest
+
+
+class FakeResponse:
+    def __init__(self, data, status_code=200):
+        self.data = data
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise Exception(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self.data
+
+
+class FakeSession:
+    """
+    Session serving SWAPI-like pages of `size` items, counting the concurrent requests.
+    """
+
+    def __init__(self, counts, size=10, delay=0.01, failing=()):
+        self.counts = counts
+        self.size = size
+        self.delay = delay
+        self.failing = set(failing)
+        self.requested = []
+        self.active = self.max_active = 0
+        self.lock = Lock()
+
+    def get(self, url, **kwargs):
+        with self.lock:
+            self.requested.append(url)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+
+        if url in self.failing:
+            return FakeResponse(None, status_code=500)
+
+        resource, _, query = url.rstrip("/").partition("/?")
+        resource = resource.rstrip("/").split("/")[-1]
+        page = int(query.split("page=")[1]) if "page=" in query else 1
+        count = self.counts[resource]
+        start = (page - 1) * self.size
+        results = [{"id": i} for i in range(start, min(start + self.size, count))]
+        next_url = f"https://swapi.test/api/{resource}/?page={page + 1}" if start + self.size < count else None
+        return FakeResponse({"count": count, "next": next_url, "results": results})
+
+
+class TestFetchAll:
+    """
+    Test class for the concurrent SWAPI fetcher.
+    """
+
+    def test_pages_are_fetched_concurrently_in_order(self, settings):
+        """
+        Test fetching an endpoint of several pages.
+
+        Asserts:
+            - Every page is fetched once and the results keep the page order.
+            - Pages after the first one are fetched concurrently, within `SWAPI_MAX_WORKERS`.
+        """
+        settings.SWAPI_MAX_WORKERS = 4
+        session = FakeSession({"people": 82})
+
+        results = fetch_all("https://swapi.test/api/people/", session)
+
+        assert [item["id"] for item in results] == list(range(82))
+        assert len(session.requested) == 9
+        assert 1 < session.max_active <= 4
+
+    def test_resources_are_fetched_together(self, settings):
+        """
+        Test fetching several endpoints at once.
+
+        Asserts:
+            - The results of every endpoint are returned by URL.
+        """
+        session = FakeSession({"planets": 60, "films": 6})
+        urls = ["https://swapi.test/api/planets/", "https://swapi.test/api/films/"]
+
+        results = fetch_resources(urls, session)
+
+        assert len(results[urls[0]]) == 60
+        assert len(results[urls[1]]) == 6
+
+    def test_failed_page_truncates_results(self, settings):
+        """
+        Test an endpoint with a page that cannot be fetched.
+
+        Asserts:
+            - The pages before the failed one are kept.
+        """
+        session = FakeSession({"planets": 60}, failing={"https://swapi.test/api/planets/?page=3"})
+
+        results = fetch_all("https://swapi.test/api/planets/", session)
+
+        assert [item["id"] for item in results] == list(range(20))
+
+
+def swapi_url(resource, swapi_id):
+    return f"https://swapi.test/api/{resource}/{swapi_id}/"
+
+
+@pytest.mark.django_db
+class TestPopulate:
+    """
+    Test class for the loading of SWAPI data into the database.
+    """
+
+    def test_links_are_bulk_inserted(self, django_assert_max_num_queries):
+        """
+        Test populating movies and characters with their relations.
+
+        Asserts:
+            - Every movie-planet and character-movie link is written.
+            - The links of each through table take one INSERT, whatever their number.
+        """
+        populate_planets([{"url": swapi_url("planets", i), "name": f"Planet {i}"} for i in range(1, 11)])
+        populate_movies([
+            {
+                "url": swapi_url("films", i), "title": f"Film {i}", "episode_id": i, "opening_crawl": "",
+                "director": "George Lucas", "producer": "Lucasfilm", "release_date": "1977-05-25",
+                "planets": [swapi_url("planets", j) for j in range(1, 11)],
+            }
+            for i in range(1, 7)
+        ])
+
+        characters = [
+            {
+                "url": swapi_url("people", i), "name": f"Character {i}",
+                "films": [swapi_url("films", j) for j in range(1, 7)],
+            }
+            for i in range(1, 21)
+        ]
+        # Existing ids, planets and movies, the characters INSERT and the links INSERT
+        with django_assert_max_num_queries(5):
+            populate_characters(characters)
+
+        assert Movie.planets.through.objects.count() == 60
+        assert Character.movies.through.objects.count() == 120
+
+    def test_items_are_written_in_chunks(self, settings, monkeypatch, django_assert_num_queries):
+        """
+        Test populating planets from a stream larger than a chunk.
+
+        Asserts:
+            - The planets are written with one INSERT per chunk.
+            - The stream is consumed lazily: each chunk is written before the next items are read.
+        """
+        settings.SWAPI_BATCH_SIZE = 10
+        read = []
+
+        def stream():
+            for i in range(1, 26):
+                read.append(i)
+                yield {"url": swapi_url("planets", i), "name": f"Planet {i}"}
+
+        original_bulk_create = Planet.objects.bulk_create
+        written_after = []
+
+        def bulk_create(objs, *args, **kwargs):
+            written_after.append(len(read))
+            return original_bulk_create(objs, *args, **kwargs)
+
+        monkeypatch.setattr(Planet.objects, "bulk_create", bulk_create)
+        # Existing ids, then one INSERT per chunk
+        with django_assert_num_queries(4):
+            assert populate_planets(stream()) == 25
+
+        assert written_after == [10, 20, 25]
+
+
+def planets_data(count):
+    return [{"url": swapi_url("planets", i), "name": f"Planet {i}"} for i in range(1, count + 1)]
+
+
+def films_data(count, planets):
+    return [
+        {
+            "url": swapi_url("films", i), "title": f"Film {i}", "episode_id": i, "opening_crawl": "",
+            "director": "George Lucas", "producer": "Lucasfilm", "release_date": "1977-05-25",
+            "planets": [swapi_url("planets", j) for j in planets],
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+@pytest.mark.django_db
+class TestSync:
+    """
+    Test class for the incremental synchronization with the SWAPI.
+    """
+
+    def test_first_sync_inserts_rows_with_history(self):
+        """
+        Test synchronizing an empty database.
+
+        Asserts:
+            - Every row is inserted with its links and content hash.
+            - A creation history row is written per row.
+        """
+        assert sync_planets(planets_data(3)) == {"inserted": 3, "updated": 0, "unchanged": 0, "deleted": 0}
+        assert sync_movies(films_data(2, [1, 2]))["inserted"] == 2
+
+        assert Movie.planets.through.objects.count() == 4
+        assert all(Planet.objects.values_list("content_hash", flat=True))
+        assert Planet.history.filter(history_type="+").count() == 3
+
+    def test_unchanged_rows_are_skipped(self, django_assert_num_queries):
+        """
+        Test synchronizing data that did not change.
+
+        Asserts:
+            - Every row is counted as unchanged.
+            - The sync only reads the hashes of the chunk and counts the rows: nothing is written.
+        """
+        sync_planets(planets_data(3))
+        sync_movies(films_data(2, [1, 2]))
+
+        # Planet ids, hashes of the chunk and the row count
+        with django_assert_num_queries(3):
+            counts = sync_movies(films_data(2, [1, 2]))
+
+        assert counts == {"inserted": 0, "updated": 0, "unchanged": 2, "deleted": 0}
+
+    def test_changed_rows_are_updated_and_missing_rows_deleted(self):
+        """
+        Test synchronizing data where rows changed, appeared and disappeared.
+
+        Asserts:
+            - Changed rows are updated in place, keeping their primary key, with a change history row.
+            - Their links are diffed: removed targets are unlinked and new ones linked.
+            - Rows missing from the source are deleted.
+        """
+        sync_planets(planets_data(3))
+        sync_movies(films_data(3, [1, 2]))
+        movie = Movie.objects.get(swapi_id=1)
+
+        films = films_data(2, [2, 3])
+        films[0]["director"] = "Irvin Kershner"
+        counts = sync_movies(films)
+
+        assert counts == {"inserted": 0, "updated": 2, "unchanged": 0, "deleted": 1}
+        movie.refresh_from_db()
+        assert movie.director == "Irvin Kershner"
+        assert movie.history.filter(history_type="~").count() == 1
+        assert set(movie.planets.values_list("swapi_id", flat=True)) == {2, 3}
+        assert not Movie.objects.filter(swapi_id=3).exists()
+
+    def test_failed_page_aborts_sync(self):
+        """
+        Test that a sync never works on partial data.
+
+        Asserts:
+            - A page that cannot be fetched raises instead of truncating the stream.
+        """
+        session = FakeSession({"planets": 30}, failing={"https://swapi.test/api/planets/?page=2"})
+
+        with pytest.raises(SwapiFetchError):
+            list(iter_items("https://swapi.test/api/planets/", session, strict=True))
+
+
+@pytest.mark.django_db
+class TestSwapiServer:
+    """
+    Test class for the local SWAPI stand-in used by the loader benchmarks.
+    """
+
+    def test_load_from_local_server(self, settings):
+        """
+        Test `load_starwars_data` against the stand-in, with small pages and injected errors.
+
+        Asserts:
+            - Every generated item is loaded, the failed requests being retried.
+            - Every page is requested and the injected errors are counted.
+        """
+        settings.SWAPI_BACKOFF = 0
+        settings.SWAPI_RETRIES = 6
+        data = SwapiData.generate(planets=12, films=3, people=25)
+
+        with SwapiServer(data, page_size=5, error_rate=0.2, seed=1).start() as server:
+            settings.SWAPI_URL = server.url
+            call_command("load_starwars_data", stdout=StringIO())
+
+        assert (Planet.objects.count(), Movie.objects.count(), Character.objects.count()) == (12, 3, 25)
+        # 3 + 1 + 5 pages, plus the retried ones
+        assert server.requests[200] == 9
+        assert server.requests[500] > 0
+
+    def test_interrupted_load_is_resumed(self, settings, monkeypatch):
+        """
+        Test resuming a load interrupted by a page that cannot be fetched.
+
+        Asserts:
+            - The chunks written before the failure are committed, with the progress of their resource.
+            - `--resume` skips the loaded resources and fetches the pages after the last checkpoint only.
+            - Every item is loaded once.
+        """
+        settings.SWAPI_BATCH_SIZE = 10
+        data = SwapiData.generate(planets=12, films=3, people=25)
+        fetch_page = populate.fetch_page
+
+        def failing_fetch_page(session, url):
+            return None if url.endswith("people/?page=3") else fetch_page(session, url)
+
+        with SwapiServer(data, page_size=5).start() as server:
+            settings.SWAPI_URL = server.url
+            monkeypatch.setattr(populate, "fetch_page", failing_fetch_page)
+            with pytest.raises(SwapiFetchError):
+                call_command("load_starwars_data", stdout=StringIO(), stderr=StringIO())
+
+            # The page completed by the first chunk is only counted once the next item is read
+            state = LoadState.objects.get(resource="people")
+            assert (state.pages, state.items, state.completed) == (1, 10, False)
+            assert LoadState.objects.get(resource="films").completed
+            assert Character.objects.count() == 10
+
+            monkeypatch.setattr(populate, "fetch_page", fetch_page)
+            server.requests.clear()
+            call_command("load_starwars_data", resume=True, stdout=StringIO())
+
+        # People pages 2 to 5
+        assert server.requests[200] == 4
+        assert Character.objects.count() == 25
+        assert LoadState.objects.filter(completed=True).count() == 3
@@ -0,0 +1,214 @@
+# Django
+from django.core.management import call_command
+
+# Models
+from starwars.models import Character, Movie, Planet
+
+# GraphQL
+from graphql import get_operation_ast, parse
+
+# Starwars
+from starwars.response_cache import get_document_models, response_cache
+from starwars.schema import schema
+
+# Utils
+from io import StringIO
+import datetime
+
+# Pytest
+import pytest
+
+
+QUERY = '{ allMovies { edges { node { title planets { edges { node { name } } } } } } }'
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("graphql_url")
+class TestResponseCache:
+    """
+    Test class for the full-response cache of the GraphQL view.
+    """
+
+    @pytest.fixture
+    def movie(self):
+        movie = Movie.objects.create(
+            title="A New Hope", episode_id=4, director="George Lucas",
+            producers="Gary Kurtz", release_date=datetime.date(1977, 5, 25),
+        )
+        movie.planets.add(Planet.objects.create(name="Tatooine"))
+        return movie
+
+    @staticmethod
+    def post(client, graphql_url, query=QUERY, variables=None):
+        data = {'query': query}
+        if variables is not None:
+            data['variables'] = variables
+        return client.post(graphql_url, data=data, content_type='application/json').json()
+
+    def test_repeated_query_is_served_from_cache(self, client, graphql_url, movie, django_assert_num_queries):
+        """
+        Test that a repeated query is answered without executing it.
+
+        Asserts:
+            - The first request is a miss and the second one a hit whose only SQL query is the
+              lookup of the tag versions.
+            - Both responses hold the same data.
+            - The hit is counted.
+        """
+        first = self.post(client, graphql_url)
+        assert first["extensions"]["responseCache"] == "MISS"
+
+        with django_assert_num_queries(1):
+            second = self.post(client, graphql_url)
+
+        assert second["extensions"]["responseCache"] == "HIT"
+        assert second["data"] == first["data"]
+        assert response_cache.stats()["hits"] == 1
+
+    def test_variables_are_part_of_the_key(self, client, graphql_url, movie):
+        """
+        Test that the same document with other variables is a different entry.
+
+        Asserts:
+            - A query with new variables is a miss.
+        """
+        query = 'query ($first: Int) { allPlanets(first: $first) { edges { node { name } } } }'
+
+        assert self.post(client, graphql_url, query, {"first": 1})["extensions"]["responseCache"] == "MISS"
+        assert self.post(client, graphql_url, query, {"first": 1})["extensions"]["responseCache"] == "HIT"
+        assert self.post(client, graphql_url, query, {"first": 2})["extensions"]["responseCache"] == "MISS"
+
+    def test_save_invalidates_responses_reading_the_model(
+        self, client, graphql_url, movie, django_capture_on_commit_callbacks
+    ):
+        """
+        Test the invalidation by `post_save`.
+
+        Asserts:
+            - Saving a planet invalidates a response reading planets.
+            - The fresh response holds the new data.
+            - Saving a character does not invalidate it.
+        """
+        self.post(client, graphql_url)
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Character.objects.create(name="Luke Skywalker")
+        assert self.post(client, graphql_url)["extensions"]["responseCache"] == "HIT"
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Planet.objects.filter(name="Tatooine").update(name="Alderaan")
+            Planet.objects.get(name="Alderaan").save()
+
+        data = self.post(client, graphql_url)
+        assert data["extensions"]["responseCache"] == "MISS"
+        assert data["data"]["allMovies"]["edges"][0]["node"]["planets"]["edges"][0]["node"]["name"] == "Alderaan"
+
+    def test_relation_change_invalidates_both_sides(
+        self, client, graphql_url, movie, django_capture_on_commit_callbacks
+    ):
+        """
+        Test the invalidation by `m2m_changed`.
+
+        Asserts:
+            - Adding a planet to a movie invalidates a response reading only planets.
+            - The invalidations are counted.
+        """
+        query = '{ allPlanets { edges { node { name } } } }'
+        self.post(client, graphql_url, query)
+
+        invalidations = response_cache.stats()["invalidations"]
+        with django_capture_on_commit_callbacks(execute=True):
+            movie.planets.add(Planet.objects.create(name="Hoth"))
+
+        assert self.post(client, graphql_url, query)["extensions"]["responseCache"] == "MISS"
+        assert response_cache.stats()["invalidations"] > invalidations
+
+    def test_mutations_are_not_cached(self, client, graphql_url, django_capture_on_commit_callbacks):
+        """
+        Test that mutations are executed on every request and invalidate the cache.
+
+        Asserts:
+            - Two identical mutations create two planets.
+            - The planets query after the second mutation is a miss.
+        """
+        mutation = 'mutation { createPlanet(name: "Dagobah") { planet { name } } }'
+        query = '{ allPlanets { edges { node { name } } } }'
+
+        self.post(client, graphql_url, mutation)
+        self.post(client, graphql_url, query)
+        with django_capture_on_commit_callbacks(execute=True):
+            self.post(client, graphql_url, mutation)
+
+        assert Planet.objects.filter(name="Dagobah").count() == 2
+        data = self.post(client, graphql_url, query)
+        assert data["extensions"]["responseCache"] == "MISS"
+        assert len(data["data"]["allPlanets"]["edges"]) == 2
+
+    def test_stats_command(self, client, graphql_url, movie, django_capture_on_commit_callbacks):
+        """
+        Test the `response_cache_stats` command.
+
+        Asserts:
+            - The counters and hit rate are reported.
+            - `--invalidate` invalidates the cached responses.
+        """
+        self.post(client, graphql_url)
+        self.post(client, graphql_url)
+
+        out = StringIO()
+        with django_capture_on_commit_callbacks(execute=True):
+            call_command("response_cache_stats", "--invalidate", stdout=out, stderr=StringIO())
+
+        assert "hits=1 misses=1 hit_rate=50.00%" in out.getvalue()
+        assert self.post(client, graphql_url)["extensions"]["responseCache"] == "MISS"
+
+    def test_versions_are_bumped_on_commit(self, movie, django_capture_on_commit_callbacks):
+        """
+        Test that a write invalidates the responses only once it is committed.
+
+        Asserts:
+            - The versions do not change while the writing transaction is open, so a response
+              executed meanwhile, from the former rows, is not stored under the new versions.
+            - They change when it commits.
+        """
+        versions = response_cache.get_versions({Planet})
+
+        with django_capture_on_commit_callbacks(execute=True):
+            Planet.objects.create(name="Hoth")
+            assert response_cache.get_versions({Planet}) == versions
+
+        assert response_cache.get_versions({Planet}) != versions
+
+    def test_writes_of_other_processes_invalidate(
+        self, client, graphql_url, movie, settings, django_capture_on_commit_callbacks
+    ):
+        """
+        Test a write made by another process, e.g. `load_starwars_data` or another worker.
+
+        Asserts:
+            - The responses cached by this process are invalidated, although the other process
+              has its own local-memory cache: the versions are shared through the database.
+        """
+        self.post(client, graphql_url)
+
+        caches = settings.CACHES
+        settings.CACHES = {
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "other-process"}
+        }
+        with django_capture_on_commit_callbacks(execute=True):
+            Planet.objects.create(name="Hoth")
+        settings.CACHES = caches
+
+        assert self.post(client, graphql_url)["extensions"]["responseCache"] == "MISS"
+
+    def test_connection_without_nodes_is_tagged_with_its_model(self):
+        """
+        Test the tags of a response reading only the `totalCount` of a relation.
+
+        Asserts:
+            - The response is tagged with the model of the connection nodes.
+        """
+        document = parse('{ allMovies { edges { node { planets { totalCount } } } } }')
+        operation = get_operation_ast(document)
+
+        assert get_document_models(schema.graphql_schema, document, operation) == {Movie, Planet}
@@ -0,0 +1,165 @@
+# Django
+from django.db import DatabaseError
+from django.utils import timezone
+
+# Routers
+from api import routers
+from api.routers import STICKY_COOKIE, ReplicaMonitor, ReplicaRouter, reading_from_replicas
+
+# Models
+from starwars.models import DataVersion, Planet
+
+# Utils
+from datetime import timedelta
+
+# Pytest
+import pytest
+
+
+QUERY = "{ allPlanets { edges { node { name } } } }"
+MUTATION = 'mutation { createPlanet(name: "Mustafar") { planet { name } } }'
+
+
+class TestReplicaRouter:
+    """
+    Test class for the routing of reads to the read replicas.
+    """
+
+    @pytest.fixture
+    def lags(self, settings, monkeypatch):
+        settings.DATABASE_REPLICAS = ["replica_1", "replica_2"]
+        settings.DATABASE_REPLICA_MAX_LAG = 5
+        lags = {"replica_1": 0.5, "replica_2": 0.0}
+
+        def measure(alias):
+            if lags[alias] is None:
+                raise DatabaseError("Connection refused")
+            return lags[alias]
+
+        monkeypatch.setattr(routers, "replica_monitor", ReplicaMonitor(measure))
+        settings.DATABASE_REPLICA_LAG_CHECK_INTERVAL = 0
+        return lags
+
+    def test_reads_go_to_replicas_in_query_context(self, lags):
+        """
+        Asserts:
+            - Reads outside of a query operation and writes go to the primary.
+            - Reads of a query operation go to the replicas.
+            - Migrations only run on the primary.
+        """
+        router = ReplicaRouter()
+
+        assert router.db_for_read(Planet) == "default"
+        with reading_from_replicas():
+            assert {router.db_for_read(Planet) for _ in range(50)} == {"replica_1", "replica_2"}
+            assert router.db_for_write(Planet) == "default"
+        assert router.allow_migrate("default", "starwars")
+        assert not router.allow_migrate("replica_1", "starwars")
+
+    def test_lagging_replicas_are_skipped(self, lags):
+        """
+        Asserts:
+            - Replicas lagging over DATABASE_REPLICA_MAX_LAG or unreachable are skipped.
+            - Reads go to the primary when no replica is available.
+        """
+        router = ReplicaRouter()
+        lags.update({"replica_1": 30.0, "replica_2": 0.0})
+        with reading_from_replicas():
+            assert {router.db_for_read(Planet) for _ in range(20)} == {"replica_2"}
+
+            lags["replica_2"] = None
+            assert router.db_for_read(Planet) == "default"
+
+    def test_lag_is_measured_at_intervals(self, settings):
+        """
+        Asserts:
+            - The lag of a replica is measured again only after DATABASE_REPLICA_LAG_CHECK_INTERVAL.
+        """
+        settings.DATABASE_REPLICA_LAG_CHECK_INTERVAL = 60
+        calls = []
+        monitor = ReplicaMonitor(lambda alias: calls.append(alias) or 1.0)
+
+        assert [monitor.get_lag("replica_1") for _ in range(3)] == [1.0, 1.0, 1.0]
+        assert calls == ["replica_1"]
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures("graphql_url")
+class TestReadYourWrites:
+    """
+    Test class for the routing of the GraphQL operations.
+    """
+
+    @pytest.fixture
+    def replica_reads(self, settings, monkeypatch):
+        """
+        Record whether each read was routed to the replicas; the reads still go to the primary,
+        the only test database.
+        """
+        settings.DATABASE_REPLICAS = ["replica_1"]
+        reads = []
+        monkeypatch.setattr(routers.replica_monitor, "get_available", lambda aliases: reads.append(True) or [])
+        return reads
+
+    def test_queries_read_from_replicas(self, client, graphql_url, replica_reads):
+        """
+        Asserts:
+            - The reads of a query operation are routed to the replicas.
+            - The response does not set the sticky cookie.
+        """
+        response = client.post(graphql_url, data={"query": QUERY}, content_type="application/json")
+
+        assert "errors" not in response.json()
+        assert replica_reads
+        assert STICKY_COOKIE not in response.cookies
+
+    def test_client_sticks_to_primary_after_mutation(self, client, graphql_url, settings, replica_reads):
+        """
+        Asserts:
+            - A mutation sets the sticky cookie for DATABASE_REPLICA_STICKY_SECONDS.
+            - The next queries of the client read from the primary.
+        """
+        settings.DATABASE_REPLICA_STICKY_SECONDS = 10
+        response = client.post(graphql_url, data={"query": MUTATION}, content_type="application/json")
+
+        assert response.cookies[STICKY_COOKIE]["max-age"] == 10
+        replica_reads.clear()
+        response = client.post(graphql_url, data={"query": QUERY}, content_type="application/json")
+
+        assert response.json()["data"]["allPlanets"]["edges"] == [{"node": {"name": "Mustafar"}}]
+        assert not replica_reads
+
+    def test_batch_reads_its_writes(self, client, graphql_url, replica_reads):
+        """
+        Asserts:
+            - The queries following a mutation in a batch read from the primary.
+        """
+        client.post(graphql_url, data=[{"query": MUTATION}, {"query": QUERY}], content_type="application/json")
+
+        assert not replica_reads
+
+    def test_recent_writes_are_read_from_primary(
+        self, client, graphql_url, settings, replica_reads, django_capture_on_commit_callbacks
+    ):
+        """
+        Test the queries of other clients reading a model just written, e.g. by a command.
+
+        Asserts:
+            - While the replicas may not have replayed the write, they read from the primary, so
+              the response cached and tagged with the new versions holds the new rows.
+            - Once DATABASE_REPLICA_MAX_LAG + DATABASE_REPLICA_LAG_CHECK_INTERVAL seconds have passed,
+              they read from the replicas again.
+        """
+        settings.DATABASE_REPLICA_MAX_LAG = settings.DATABASE_REPLICA_LAG_CHECK_INTERVAL = 5
+        with django_capture_on_commit_callbacks(execute=True):
+            Planet.objects.create(name="Hoth")
+
+        response = client.post(graphql_url, data={"query": QUERY}, content_type="application/json")
+        assert response.json()["data"]["allPlanets"]["edges"] == [{"node": {"name": "Hoth"}}]
+        assert not replica_reads
+        assert STICKY_COOKIE not in response.cookies
+
+        DataVersion.objects.update(updated_at=timezone.now() - timedelta(seconds=11))
+        query = "{ allPlanets { edges { node { name climate } } } }"
+        client.post(graphql_url, data={"query": query}, content_type="application/json")
+        assert replica_reads
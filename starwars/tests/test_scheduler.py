@@ -0,0 +1,80 @@
+# Services
+from services.scheduler import PageBuffer, Stage, StageError, run_stages
+
+# Utils
+from threading import get_ident
+import time
+
+# Pytest
+import pytest
+
+
+class TestScheduler:
+    """
+    Test class for the DAG scheduler of the populate stages.
+    """
+
+    def test_independent_stages_run_concurrently(self):
+        """
+        Test a DAG of three independent pool stages and a local stage depending on two of them.
+
+        Asserts:
+            - The independent stages overlap: the run takes about as long as the slowest one.
+            - The local stage starts after its dependencies and runs on the calling thread.
+        """
+        threads = {}
+
+        def sleep(name, seconds):
+            def func():
+                threads[name] = get_ident()
+                time.sleep(seconds)
+            return func
+
+        stages = [
+            Stage("fetch a", sleep("fetch a", 0.2)),
+            Stage("fetch b", sleep("fetch b", 0.2)),
+            Stage("fetch c", sleep("fetch c", 0.3)),
+            Stage("write", sleep("write", 0), depends=["fetch a", "fetch b"], local=True),
+        ]
+        timings = run_stages(stages, max_workers=3)
+
+        assert max(end for _, end in timings.values()) < 0.5
+        assert timings["write"][0] >= max(timings["fetch a"][1], timings["fetch b"][1])
+        assert threads["write"] == get_ident()
+
+    def test_cycles_are_rejected(self):
+        """
+        Test stages depending on each other.
+
+        Asserts:
+            - The run is rejected before any stage starts.
+        """
+        calls = []
+        stages = [
+            Stage("a", lambda: calls.append("a"), depends=["b"]),
+            Stage("b", lambda: calls.append("b"), depends=["a"]),
+        ]
+
+        with pytest.raises(StageError, match="Cycle"):
+            run_stages(stages, max_workers=2)
+        assert calls == []
+
+    def test_buffer_delivers_pages_before_the_error(self):
+        """
+        Test a page buffer filled by a failing stream.
+
+        Asserts:
+            - The pages fetched before the error are read, then the error is raised.
+        """
+        def pages():
+            yield [1, 2]
+            raise ValueError("Page 2")
+
+        buffer = PageBuffer()
+        buffer.fill(pages())
+        read = []
+
+        with pytest.raises(ValueError):
+            for page in buffer:
+                read.append(page)
+        assert read == [[1, 2]]
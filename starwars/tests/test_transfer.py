@@ -0,0 +1,123 @@
+# Django
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+
+# Models
+from starwars.models import Character, Movie, Planet
+
+# Services
+from services import transfer
+from services.transfer import get_transfer_models
+
+# Utils
+from io import StringIO
+import datetime
+import threading
+
+# Pytest
+import pytest
+
+
+requires_postgresql = pytest.mark.skipif(connection.vendor != "postgresql", reason="COPY requires PostgreSQL")
+
+
+@pytest.mark.django_db
+class TestTransfer:
+    """
+    Test class for the COPY export and import commands.
+    """
+
+    def test_tables_are_ordered_by_dependency(self):
+        """
+        Test the order of the transferred tables.
+
+        Asserts:
+            - Each table comes after the tables its foreign keys reference.
+            - The history tables are only included on demand.
+        """
+        models = get_transfer_models(history=True)
+        for index, model in enumerate(models):
+            for field in model._meta.concrete_fields:
+                if field.is_relation and field.related_model in models:
+                    assert models.index(field.related_model) < index
+
+        assert len(get_transfer_models()) == 5
+
+    @pytest.mark.skipif(connection.vendor == "postgresql", reason="COPY is available")
+    def test_other_databases_are_rejected(self, tmp_path):
+        """
+        Test the commands on a database without COPY.
+
+        Asserts:
+            - The export is rejected with an explicit error.
+        """
+        with pytest.raises(CommandError, match="PostgreSQL"):
+            call_command("export_starwars", str(tmp_path), stdout=StringIO())
+
+    @requires_postgresql
+    @pytest.mark.django_db(transaction=True)
+    @pytest.mark.parametrize("copy_format", ["binary", "csv"])
+    def test_round_trip(self, tmp_path, copy_format):
+        """
+        Test exporting the tables and importing them back.
+
+        Asserts:
+            - The rows, relations and history are restored.
+            - The sequences continue after the imported primary keys.
+        """
+        planet = Planet.objects.create(name="Tatooine", swapi_id=1)
+        movie = Movie.objects.create(
+            title="A New Hope", episode_id=4, director="George Lucas", producers="Gary Kurtz",
+            release_date=datetime.date(1977, 5, 25),
+        )
+        movie.planets.add(planet)
+        Character.objects.create(name="Luke Skywalker", homeworld=planet).movies.add(movie)
+
+        call_command("export_starwars", str(tmp_path), format=copy_format, history=True, stdout=StringIO())
+        call_command("import_starwars", str(tmp_path), truncate=True, stdout=StringIO())
+
+        character = Character.objects.get()
+        assert character.homeworld.name == "Tatooine"
+        assert list(character.movies.values_list("planets__name", flat=True)) == ["Tatooine"]
+        assert Planet.history.count() == 1
+        assert Planet.objects.create(name="Hoth").pk > planet.pk
+
+    @requires_postgresql
+    @pytest.mark.django_db(transaction=True)
+    def test_export_reads_one_snapshot(self, monkeypatch, tmp_path):
+        """
+        Test exporting the tables while another connection writes them.
+
+        Asserts:
+            - The tables are read in one REPEATABLE READ transaction.
+            - A character created with a new homeworld once the planets are exported is not
+              exported, so the export has no character referencing a missing planet.
+        """
+        copy_to_file = transfer.copy_to_file
+        isolation_levels = []
+
+        def write():
+            Character.objects.create(name="Luke Skywalker", homeworld=Planet.objects.create(name="Tatooine"))
+            connection.close()
+
+        def copy_and_write(model, *args, **kwargs):
+            with connection.cursor() as cursor:
+                cursor.execute("SHOW transaction_isolation")
+                isolation_levels.append(cursor.fetchone()[0])
+            rows = copy_to_file(model, *args, **kwargs)
+            if model is Planet:
+                # Threads have their own connection
+                thread = threading.Thread(target=write)
+                thread.start()
+                thread.join()
+            return rows
+
+        monkeypatch.setattr(transfer, "copy_to_file", copy_and_write)
+        Planet.objects.create(name="Hoth")
+        manifest = transfer.export_tables(str(tmp_path))
+        rows = {table["table"]: table["rows"] for table in manifest["tables"]}
+
+        assert set(isolation_levels) == {"repeatable read"}
+        assert (rows[Planet._meta.db_table], rows[Character._meta.db_table]) == (1, 0)
+        assert Character.objects.count() == 1
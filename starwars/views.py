@@ -1,3 +1,529 @@
-from django.shortcuts import render
+# Django
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import HttpResponse, HttpResponseNotAllowed
+from django.http.response import HttpResponseBadRequest
 
-# Create your views here.
+# Graphene
+from graphene_django.constants import MUTATION_ERRORS_FLAG
+from graphene_django.settings import graphene_settings
+from graphene_django.utils.utils import set_rollback
+from graphene_django.views import GraphQLView, HttpError
+
+# GraphQL
+from graphql import ExecutionResult, OperationType, execute, get_operation_ast, validate_schema
+
+# Routers
+from api.routers import is_recent_write, is_sticky, reading_from_replicas, set_sticky_cookie, stick_to_primary
+
+# Starwars
+from starwars.complexity import check_query_complexity
+from starwars.conditional import NotModified, etag_matches, get_cache_control, get_etag
+from starwars.documents import (
+    DocumentCache, get_document_key, get_validated_document, hash_query, parse_and_validate
+)
+from starwars.executors import OrmExecutorMiddleware
+from starwars.persisted_queries import (
+    PERSISTED_QUERY_HASH_MISMATCH, PERSISTED_QUERY_NOT_ALLOWED, PERSISTED_QUERY_NOT_FOUND,
+    PersistedQueryError, get_persisted_query_hash, get_query_store
+)
+from starwars.response_cache import get_document_models, response_cache
+from starwars.schema.loaders import reset_loaders
+
+# Utils
+from asgiref.sync import sync_to_async
+from inspect import isawaitable
+import json
+
+
+# Shared by every request of the worker process
+document_cache = DocumentCache(maxsize=settings.GRAPHQL_DOCUMENT_CACHE_SIZE)
+
+
+class PreparedOperation:
+    """
+    Operation of a request ready to be executed (see `StarWarsGraphQLView.prepare_request`).
+
+    - `extensions`: extensions computed before the execution (cost, response cache status).
+    - `cache_key`, `versions`: response cache entry of the result, for cacheable queries.
+    """
+
+    def __init__(self, document, operation_ast, extensions, cache_key=None, versions=None):
+        self.document = document
+        self.operation_ast = operation_ast
+        self.extensions = extensions
+        self.cache_key = cache_key
+        self.versions = versions
+
+
+class StarWarsGraphQLView(GraphQLView):
+    """
+    GraphQL view of the API.
+
+    - Parsed and validated documents are kept in a per-worker LRU cache (`document_cache`),
+      keyed by schema version and query hash, so known query shapes skip parsing and validation.
+    - Automatic persisted queries: the `persistedQuery` extension may replace the query text
+      by its `sha256Hash`. Unknown hashes are answered with `PersistedQueryNotFound` and
+      registered when the client retries with the query text. With
+      `GRAPHQL_PERSISTED_QUERIES_ALLOWLIST`, only registered queries are executed.
+    - Operations are statically analyzed before execution: those deeper than
+      `GRAPHQL_QUERY_MAX_DEPTH` or costlier than `GRAPHQL_QUERY_MAX_COST` are rejected,
+      and the computed cost is reported in the `extensions` of the response.
+    - Results of query operations without errors are kept in the response cache
+      (`starwars.response_cache`) and invalidated when the models they read change.
+    - A JSON array of operations is executed as a batch (see `get_batch_response`),
+      of at most `GRAPHQL_BATCH_MAX_SIZE` operations.
+    - GET queries are answered with an ETag, built from the document, the variables and the
+      versions of the models they read, and with a per-operation Cache-Control; a matching
+      `If-None-Match` is answered with a 304 before the query is executed (`starwars.conditional`).
+    - Queries read from the replicas (`api.routers.ReplicaRouter`); after a mutation, the
+      reads of the request and of the client for `DATABASE_REPLICA_STICKY_SECONDS` use the primary.
+    """
+    document_cache = document_cache
+
+    def parse_body(self, request):
+        """
+        Parse the body of a request; a JSON array is returned as the list of its operations.
+
+        Raises:
+            - HttpError: If the body is invalid, or the batch is empty, too large or has
+              entries which are not operations.
+        """
+        if (
+            self.batch
+            or self.get_content_type(request) != "application/json"
+            or not request.body.lstrip().startswith(b"[")
+        ):
+            return super().parse_body(request)
+
+        try:
+            operations = json.loads(request.body)
+        except ValueError:
+            raise HttpError(HttpResponseBadRequest("POST body sent invalid JSON."))
+
+        max_size = settings.GRAPHQL_BATCH_MAX_SIZE
+        if not max_size:
+            raise HttpError(HttpResponseBadRequest("Batched operations are disabled."))
+        if not operations:
+            raise HttpError(HttpResponseBadRequest("Received an empty list of operations."))
+        if len(operations) > max_size:
+            raise HttpError(
+                HttpResponseBadRequest(f"Batches are limited to {max_size} operations, received {len(operations)}.")
+            )
+        if not all(isinstance(operation, dict) for operation in operations):
+            raise HttpError(HttpResponseBadRequest("Every entry of a batch must be a JSON query."))
+        return operations
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+        except NotModified as e:
+            return e.response
+        return set_sticky_cookie(request, self.set_cache_headers(request, response))
+
+    @staticmethod
+    def set_cache_headers(request, response):
+        """
+        Set the ETag and Cache-Control headers of a successful GET query (see `check_not_modified`).
+        """
+        headers = getattr(request, "graphql_cache_headers", None)
+        if headers and response.status_code == 200:
+            for name, value in headers.items():
+                response[name] = value
+        return response
+
+    def get_document(self, query, query_hash=None):
+        """
+        Get the parsed and validated document of a query.
+
+        Args:
+            query (str): The query text, may be None when `query_hash` is given.
+            query_hash (str, optional): SHA-256 of the query from the `persistedQuery` extension.
+        Returns:
+            tuple: (DocumentNode or None, list of errors).
+        Raises:
+            - PersistedQueryError: If the persisted query cannot be resolved or is not allowed.
+        """
+        schema = self.schema.graphql_schema
+        allowlist = settings.GRAPHQL_PERSISTED_QUERIES_ALLOWLIST
+
+        if query_hash is None and not allowlist:
+            return get_validated_document(
+                self.document_cache, schema, query, self.validation_rules, graphene_settings.MAX_VALIDATION_ERRORS
+            )
+
+        if query and query_hash and hash_query(query) != query_hash:
+            raise PersistedQueryError("Provided sha256Hash does not match query", PERSISTED_QUERY_HASH_MISMATCH)
+        query_hash = query_hash or hash_query(query)
+
+        # In allow-list mode the registry is checked before the document cache, so a query removed
+        # from it is rejected even when its document is still cached
+        store = get_query_store()
+        registered_query = store.get(query_hash) if allowlist else None
+        if allowlist and registered_query is None:
+            raise PersistedQueryError("Operation is not in the allow-list", PERSISTED_QUERY_NOT_ALLOWED)
+
+        key = get_document_key(schema, query_hash)
+        document = self.document_cache.get(key)
+        if document is not None:
+            return document, []
+
+        if registered_query is None:
+            registered_query = store.get(query_hash)
+            if registered_query is None and not query:
+                raise PersistedQueryError("PersistedQueryNotFound", PERSISTED_QUERY_NOT_FOUND)
+
+        document, errors = parse_and_validate(
+            schema, registered_query or query, self.validation_rules, graphene_settings.MAX_VALIDATION_ERRORS
+        )
+        if document is not None:
+            if registered_query is None:
+                store.add(query_hash, query)
+            self.document_cache.set(key, document)
+        return document, errors
+
+    def prepare_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        """
+        Run the steps of a request that precede the execution: persisted query, document,
+        operation type, complexity budgets and response cache lookup.
+
+        Returns:
+            ExecutionResult, PreparedOperation or None: The operation to execute, or the result of
+            the request when it ends here (errors or cached response; None to show GraphiQL).
+        Raises:
+            - HttpError: If there is no query or the operation is not allowed for the HTTP method.
+        """
+        try:
+            query_hash = get_persisted_query_hash(request, data)
+        except PersistedQueryError as e:
+            return ExecutionResult(data=None, errors=[e])
+
+        if not query and not query_hash:
+            if show_graphiql:
+                return None
+            raise HttpError(HttpResponseBadRequest("Must provide query string."))
+
+        schema = self.schema.graphql_schema
+
+        schema_validation_errors = validate_schema(schema)
+        if schema_validation_errors:
+            return ExecutionResult(data=None, errors=schema_validation_errors)
+
+        try:
+            document, errors = self.get_document(query, query_hash)
+        except PersistedQueryError as e:
+            return ExecutionResult(data=None, errors=[e])
+        if errors:
+            return ExecutionResult(data=None, errors=errors)
+
+        operation_ast = get_operation_ast(document, operation_name)
+
+        if (
+            request.method.lower() == "get"
+            and operation_ast is not None
+            and operation_ast.operation != OperationType.QUERY
+        ):
+            if show_graphiql:
+                return None
+
+            raise HttpError(
+                HttpResponseNotAllowed(
+                    ["POST"],
+                    f"Can only perform a {operation_ast.operation.value} operation from a POST request.",
+                )
+            )
+
+        extensions = {}
+        if operation_ast is not None:
+            extensions["cost"], error = check_query_complexity(
+                schema,
+                document,
+                operation_ast,
+                variables,
+                max_depth=settings.GRAPHQL_QUERY_MAX_DEPTH,
+                max_cost=settings.GRAPHQL_QUERY_MAX_COST,
+                default_list_size=graphene_settings.RELAY_CONNECTION_MAX_LIMIT,
+            )
+            if error is not None:
+                return ExecutionResult(data=None, errors=[error], extensions=extensions)
+
+        is_query = operation_ast is not None and operation_ast.operation == OperationType.QUERY
+        if is_query and (request.method.lower() == "get" or response_cache.enabled or settings.DATABASE_REPLICAS):
+            models = get_document_models(schema, document, operation_ast)
+            versions, changed_at = response_cache.read_versions(models)
+            # Rows written since the replicas last replayed are read from the primary (see `api.routers`)
+            request.reads_recent_writes = is_recent_write(changed_at)
+
+            if request.method.lower() == "get":
+                self.check_not_modified(request, schema, document, operation_name, variables, models, versions)
+
+        if is_query and response_cache.enabled:
+            cache_key = response_cache.get_key(schema, document, operation_name, variables)
+            data = response_cache.get(cache_key, versions)
+            extensions["responseCache"] = "HIT" if data is not None else "MISS"
+            if data is not None:
+                return ExecutionResult(data=data, extensions=extensions)
+
+            return PreparedOperation(document, operation_ast, extensions, cache_key, versions)
+        return PreparedOperation(document, operation_ast, extensions)
+
+    def check_not_modified(self, request, schema, document, operation_name, variables, models, versions):
+        """
+        Compute the ETag and the Cache-Control of a GET query, kept on the request for its response.
+
+        Raises:
+            - NotModified: If the `If-None-Match` of the request matches the ETag.
+        """
+        key = response_cache.get_key(schema, document, operation_name, variables)
+        headers = {
+            "ETag": get_etag(key, versions),
+            "Cache-Control": get_cache_control(models),
+        }
+        if etag_matches(request, headers["ETag"]):
+            raise NotModified(headers)
+        request.graphql_cache_headers = headers
+
+    def complete_request(self, prepared, result):
+        """
+        Cache the result of a prepared query and add the extensions of the preparation to it.
+        """
+        if prepared.cache_key is not None and not result.errors:
+            response_cache.set(prepared.cache_key, prepared.versions, result.data)
+        if prepared.extensions:
+            result.extensions = {**(result.extensions or {}), **prepared.extensions}
+        return result
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        prepared = self.prepare_request(request, data, query, variables, operation_name, show_graphiql)
+        if not isinstance(prepared, PreparedOperation):
+            return prepared
+
+        result = self.execute_document(request, prepared.document, prepared.operation_ast, variables, operation_name)
+        return self.complete_request(prepared, result)
+
+    def execute_document(self, request, document, operation_ast, variables, operation_name):
+        """
+        Execute a validated document, in a transaction for mutations when `ATOMIC_MUTATIONS` is set.
+        Queries read from the replicas, unless the client wrote recently (see `api.routers`).
+
+        Returns:
+            ExecutionResult: The result of the execution.
+        """
+        schema = self.schema.graphql_schema
+
+        try:
+            execute_options = {
+                "root_value": self.get_root_value(request),
+                "context_value": self.get_context(request),
+                "variable_values": variables,
+                "operation_name": operation_name,
+                "middleware": self.get_middleware(request),
+            }
+            if self.execution_context_class:
+                execute_options["execution_context_class"] = self.execution_context_class
+
+            is_mutation = operation_ast is not None and operation_ast.operation == OperationType.MUTATION
+            if is_mutation and (
+                graphene_settings.ATOMIC_MUTATIONS is True
+                or connection.settings_dict.get("ATOMIC_MUTATIONS", False) is True
+            ):
+                with transaction.atomic():
+                    result = execute(schema, document, **execute_options)
+                    if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+                        transaction.set_rollback(True)
+            else:
+                is_query = operation_ast is not None and operation_ast.operation == OperationType.QUERY
+                with reading_from_replicas(is_query and not is_sticky(request)):
+                    result = execute(schema, document, **execute_options)
+
+            if is_mutation:
+                # The next operations of a batch, and of the client for a while, must read the rows written
+                stick_to_primary(request)
+                reset_loaders(execute_options["context_value"])
+            return result
+        except Exception as e:
+            return ExecutionResult(errors=[e])
+
+    def get_response(self, request, data, show_graphiql=False):
+        if isinstance(data, list):
+            return self.get_batch_response(request, data)
+
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+
+        execution_result = self.execute_graphql_request(
+            request, data, query, variables, operation_name, show_graphiql
+        )
+
+        if getattr(request, MUTATION_ERRORS_FLAG, False) is True:
+            set_rollback()
+        if execution_result and execution_result.errors:
+            set_rollback()
+
+        return self.encode_result(request, execution_result, id, show_graphiql)
+
+    def encode_result(self, request, execution_result, id=None, show_graphiql=False):
+        """
+        Serialize the result of an operation.
+
+        Returns:
+            tuple: (JSON response body or None, HTTP status code).
+        """
+        if not execution_result or execution_result.errors:
+            # Only the responses without errors are cacheable
+            request.graphql_cache_headers = None
+
+        status_code = 200
+        if execution_result:
+            response = {}
+
+            if execution_result.errors:
+                response["errors"] = [self.format_error(e) for e in execution_result.errors]
+
+            if execution_result.errors and any(not getattr(e, "path", None) for e in execution_result.errors):
+                status_code = 400
+            else:
+                response["data"] = execution_result.data
+
+            if execution_result.extensions:
+                response["extensions"] = execution_result.extensions
+
+            if self.batch:
+                response["id"] = id
+                response["status"] = status_code
+
+            result = self.json_encode(request, response, pretty=show_graphiql)
+        else:
+            result = None
+
+        return result, status_code
+
+    def get_batch_response(self, request, operations):
+        """
+        Execute a batch of operations one after the other in the current request: they share its
+        database connection and its DataLoaders, so a row loaded by an operation is not fetched
+        again by the next ones (the loaders are reset after a mutation). An operation failing
+        does not fail the others.
+
+        Args:
+            request (HttpRequest): The request.
+            operations (list): The operations (dicts of `query`, `variables`, `operationName`...).
+        Returns:
+            tuple: (JSON array of the responses, in the order of the operations, HTTP status code).
+        """
+        responses = []
+        for operation in operations:
+            try:
+                responses.append(self.get_response(request, operation))
+            except HttpError as e:
+                responses.append(self.encode_http_error(request, e))
+        return self.encode_batch(responses)
+
+    def encode_http_error(self, request, error):
+        return self.json_encode(request, {"errors": [self.format_error(error)]}), error.response.status_code
+
+    @staticmethod
+    def encode_batch(responses):
+        return "[{}]".format(",".join(response[0] for response in responses)), 200
+
+
+class AsyncStarWarsGraphQLView(StarWarsGraphQLView):
+    """
+    GraphQL view for the ASGI entry point (`api.asgi`), selected by `GRAPHQL_ASYNC_VIEW`.
+
+    - A request waiting on the database does not hold a worker: the event loop of the
+      process serves the other requests meanwhile.
+    - The preparation of the request (see `StarWarsGraphQLView.prepare_request`) runs in the
+      sync thread of the request, and so do mutations, whole, in their transaction.
+    - Queries are executed on the event loop, their resolvers that query the database on the
+      bounded ORM pool (`starwars.executors.OrmExecutorMiddleware`): root fields, sibling
+      relations and list items resolve concurrently and share the DataLoader batches.
+    """
+    view_is_async = True
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            if request.method.lower() not in ("get", "post"):
+                raise HttpError(
+                    HttpResponseNotAllowed(["GET", "POST"], "GraphQL only supports GET and POST requests.")
+                )
+
+            data = self.parse_body(request)
+            if self.graphiql and self.can_display_graphiql(request, data):
+                return await sync_to_async(super().dispatch)(request, *args, **kwargs)
+
+            if self.batch:
+                responses = [await self.get_async_response(request, entry) for entry in data]
+                result = "[{}]".format(",".join(response[0] for response in responses))
+                status_code = max((response[1] for response in responses), default=200)
+            elif isinstance(data, list):
+                result, status_code = await self.get_async_batch_response(request, data)
+            else:
+                result, status_code = await self.get_async_response(request, data)
+
+            response = HttpResponse(status=status_code, content=result, content_type="application/json")
+            return set_sticky_cookie(request, self.set_cache_headers(request, response))
+
+        except NotModified as e:
+            return e.response
+
+        except HttpError as e:
+            response = e.response
+            response["Content-Type"] = "application/json"
+            response.content = self.json_encode(request, {"errors": [self.format_error(e)]})
+            return response
+
+    async def get_async_batch_response(self, request, operations):
+        """
+        Execute a batch of operations one after the other (see `StarWarsGraphQLView.get_batch_response`).
+        """
+        responses = []
+        for operation in operations:
+            try:
+                responses.append(await self.get_async_response(request, operation))
+            except HttpError as e:
+                responses.append(self.encode_http_error(request, e))
+        return self.encode_batch(responses)
+
+    async def get_async_response(self, request, data):
+        query, variables, operation_name, id = self.get_graphql_params(request, data)
+
+        prepared = await sync_to_async(self.prepare_request)(request, data, query, variables, operation_name)
+        if not isinstance(prepared, PreparedOperation):
+            return self.encode_result(request, prepared, id)
+
+        operation_ast = prepared.operation_ast
+        if operation_ast is not None and operation_ast.operation == OperationType.QUERY:
+            result = await self.execute_query(request, prepared.document, variables, operation_name)
+        else:
+            result = await sync_to_async(self.execute_document)(
+                request, prepared.document, operation_ast, variables, operation_name
+            )
+
+        result = await sync_to_async(self.complete_request)(prepared, result)
+        return self.encode_result(request, result, id)
+
+    async def execute_query(self, request, document, variables, operation_name):
+        """
+        Execute a validated query document on the event loop.
+
+        Returns:
+            ExecutionResult: The result of the execution.
+        """
+        try:
+            execute_options = {
+                "root_value": self.get_root_value(request),
+                "context_value": self.get_context(request),
+                "variable_values": variables,
+                "operation_name": operation_name,
+                "middleware": [*(self.get_middleware(request) or ()), OrmExecutorMiddleware()],
+            }
+            if self.execution_context_class:
+                execute_options["execution_context_class"] = self.execution_context_class
+
+            with reading_from_replicas(not is_sticky(request)):
+                result = execute(self.schema.graphql_schema, document, **execute_options)
+                if isawaitable(result):
+                    result = await result
+            return result
+        except Exception as e:
+            return ExecutionResult(errors=[e])
@@ -1,3 +1,6 @@
+# Django
+from django.core.cache import cache
+
 # Utils
 from utils import constants
 
@@ -8,3 +11,13 @@ import pytest
 @pytest.fixture
 def graphql_url():
     return constants.GRAPHQL_PATH
+
+
+@pytest.fixture(autouse=True)
+def clear_django_cache():
+    """
+    Start every test with an empty Django cache, so cached responses do not leak between tests.
+    """
+    cache.clear()
+    yield
+    cache.clear()